@@ -0,0 +1,269 @@
+# File: backtest/batch.py
+import numpy as np
+
+from config.loader import RegimeParams
+from regime.states import NUM_REGIME_CODES, REGIME_LABELS
+from strategy.signal import DirectionalSignal
+from backtest.scenario import ScenarioGenerator
+from backtest.features import rolling_mean
+from backtest import kernels
+
+
+class BatchBacktest:
+    """
+    Runs BacktestLoop's signal → risk → execution → accounting logic over
+    many paths at once. Time is still stepped tick by tick, but every step
+    is a vector operation across paths.
+
+    Differences from the per-tick engine, to keep it vectorizable:
+      - the regime is taken from the scenario (the generator's true
+        regime) instead of running RegimeDetector on each path
+      - liquidity is 1 / rolling-mean spread over liquidity_window ticks,
+        as in LiquidityEstimator, computed with a cumulative sum
+      - fills, latency and slippage draw from a per-run np.random.Generator
+
+    The tick recursion runs as NumPy operations across paths, or as a
+    per-path loop (backtest.kernels), compiled when Numba is installed.
+    Both consume the same pre-drawn noise, so a seed gives the same
+    results on either backend.
+    """
+
+    def __init__(self,
+                 params=None,
+                 initial_cash=100000,
+                 max_position=1.0,
+                 max_drawdown=0.05,
+                 max_exposure=1.0,
+                 volatility=0.01,
+                 base_slippage=0.0001,
+                 min_latency_ms=1,
+                 max_latency_ms=10,
+                 liquidity_window=50,
+                 seed=None,
+                 backend=None):
+        """
+        Parameters mirror the per-tick components: PositionManager
+        (max_position), RiskGovernor (max_drawdown, max_exposure, plus the
+        per-regime exposure caps in params), SlippageModel, LatencyModel,
+        LiquidityEstimator (liquidity_window). volatility is the value
+        main.py feeds to the signal and latency drift. backend is "numpy",
+        "kernel" (backtest.kernels, interpreted without Numba) or None to
+        pick per run (see kernels.use_kernel).
+        """
+        if backend not in (None, "numpy", "kernel"):
+            raise ValueError(f"Unknown backend: {backend}")
+        self.backend = backend
+        self.params = params if params is not None else RegimeParams.from_config()
+        self.signal = DirectionalSignal(self.params)
+        self.initial_cash = initial_cash
+        self.max_position = max_position
+        self.max_drawdown = max_drawdown
+        self.max_exposure = max_exposure
+        self.volatility = volatility
+        self.base_slippage = base_slippage
+        self.min_latency_ms = min_latency_ms
+        self.max_latency_ms = max_latency_ms
+        self.liquidity_window = liquidity_window
+        self.rng = np.random.default_rng(seed)
+
+    def run(self, scenario):
+        """
+        Backtest every path of a scenario.
+
+        Parameters:
+            scenario : dict from ScenarioGenerator.generate()
+
+        Returns:
+            dict of per-path arrays:
+                final_equity, pnl, max_drawdown, trades, killed,
+                pnl_by_regime (n_paths, NUM_REGIME_CODES)
+        """
+        bid, ask = scenario["bid"], scenario["ask"]
+        regimes = scenario["regime"]
+
+        mid = (bid + ask) / 2.0
+        rets = np.zeros_like(mid)
+        rets[:, 1:] = np.diff(mid, axis=1)
+        spread = np.maximum(ask - bid, 0.0)
+        liquidity = 1.0 / (rolling_mean(spread, self.liquidity_window) + 1e-6)
+
+        # Signals only depend on returns and regimes: compute them up front
+        target = self.targets(rets, regimes)
+        return self.simulate(mid, liquidity, regimes, target)
+
+    def targets(self, rets, regimes, signal=None, max_position=None):
+        """
+        Target positions for arrays of returns and regime codes
+        (DirectionalSignal.generate_batch + PositionManager.target_position).
+        """
+        signal = signal or self.signal
+        max_position = self.max_position if max_position is None else max_position
+        direction, strength = signal.generate_batch(rets, regimes, self.volatility)
+        return np.clip(direction * strength * max_position, -max_position, max_position)
+
+    def simulate(self, mid, liquidity, regimes, target,
+                 max_drawdown=None, max_exposure=None, common_noise=False):
+        """
+        Run risk, execution and accounting over precomputed arrays.
+
+        Parameters:
+            mid, liquidity : (n_ticks,) or (n_paths, n_ticks) arrays
+            regimes        : regime codes, same shapes
+            target         : (n_paths, n_ticks) target positions
+            max_drawdown   : optional per-path array overriding the setting
+            max_exposure   : optional per-path array overriding the setting
+            common_noise   : draw one fill/latency sample per tick shared by
+                             all paths, so paths that differ only in
+                             parameters see the same execution noise
+
+        Returns:
+            see run()
+        """
+        p = self.params
+        target = np.atleast_2d(target)
+        n_paths, n_ticks = target.shape
+        shape = (n_paths, n_ticks)
+        mid = np.broadcast_to(mid, shape)
+        liquidity = np.broadcast_to(liquidity, shape)
+        regimes = np.broadcast_to(np.asarray(regimes).astype(np.intp), shape)
+
+        max_drawdown = self.max_drawdown if max_drawdown is None else np.asarray(max_drawdown)
+        max_exposure = self.max_exposure if max_exposure is None else np.asarray(max_exposure)
+        caps = np.minimum(p.exposure_cap, np.reshape(max_exposure, (-1, 1)))
+        caps = np.broadcast_to(caps, (n_paths, NUM_REGIME_CODES))
+        slip_mult = p.slippage_multiplier
+        lat_mult = p.latency_multiplier
+        noise_size = 1 if common_noise else n_paths
+
+        # Noise for every tick up front (used or not), so both backends
+        # see the same draws
+        fill_noise = self.rng.uniform(0.6, 1.0, (n_ticks, noise_size))
+        latency = self.rng.integers(self.min_latency_ms, self.max_latency_ms + 1,
+                                    (n_ticks, noise_size))
+
+        backend = self.backend or ("kernel" if kernels.use_kernel(n_paths) else "numpy")
+        if backend == "kernel":
+            equity = np.empty(n_paths)
+            max_dd = np.empty(n_paths)
+            trades = np.empty(n_paths, dtype=np.int64)
+            alive = np.empty(n_paths, dtype=bool)
+            pnl_by_regime = np.zeros((n_paths, NUM_REGIME_CODES))
+            kernels.simulate_paths(
+                mid, liquidity, regimes, target, fill_noise, latency,
+                np.ascontiguousarray(caps, dtype=float),
+                np.broadcast_to(np.asarray(max_drawdown, dtype=float), n_paths),
+                np.asarray(slip_mult, dtype=float), np.asarray(lat_mult, dtype=np.int64),
+                float(self.volatility), float(self.base_slippage), float(self.initial_cash),
+                equity, max_dd, trades, alive, pnl_by_regime,
+            )
+            return self._results(equity, max_dd, trades, alive, pnl_by_regime)
+
+        cash = np.full(n_paths, float(self.initial_cash))
+        position = np.zeros(n_paths)
+        equity = cash.copy()
+        peak = np.zeros(n_paths)
+        max_dd = np.zeros(n_paths)
+        trades = np.zeros(n_paths, dtype=np.int64)
+        alive = np.ones(n_paths, dtype=bool)
+        pnl_by_regime = np.zeros((n_paths, NUM_REGIME_CODES))
+        last_equity = None
+        rows = np.arange(n_paths)
+
+        for t in range(n_ticks):
+            code = regimes[:, t]
+            m = mid[:, t]
+            liq = liquidity[:, t]
+
+            # Signal → position delta
+            delta = target[:, t] - position
+
+            # Risk: exposure caps (global and per regime), kill switch
+            exposure = np.abs(position)
+            trade = alive & (delta != 0) & (exposure <= caps[rows, code])
+
+            if trade.any():
+                abs_delta = np.abs(delta)
+                # PartialFillModel
+                fill = (np.clip(liq, 0.0, 1.0)
+                        * np.maximum(0.1, 1.0 - abs_delta)
+                        * fill_noise[t])
+                fill = np.clip(fill, 0.0, 1.0)
+                # LatencyModel
+                lat = latency[t] * lat_mult[code]
+                drifted = m * (1 + self.volatility * lat / 1000.0)
+                # SlippageModel
+                impact = self.base_slippage * abs_delta / np.maximum(liq, 1e-6) * slip_mult[code]
+                executed = drifted * (1 + np.sign(delta) * impact)
+
+                filled = np.where(trade, delta * fill, 0.0)
+                cash -= filled * executed
+                position += filled
+                trades += trade
+
+            # Mark to market (frozen once the kill switch has tripped)
+            new_equity = np.where(alive, cash + position * m, equity)
+            if last_equity is not None:
+                pnl_by_regime[rows, code] += new_equity - last_equity
+            last_equity = new_equity
+            equity = new_equity
+
+            # RiskGovernor.update
+            np.maximum(peak, equity, out=peak)
+            dd = (peak - equity) / np.maximum(peak, 1e-6)
+            np.maximum(max_dd, dd, out=max_dd)
+            alive &= dd <= max_drawdown
+
+        return self._results(equity, max_dd, trades, alive, pnl_by_regime)
+
+    def _results(self, equity, max_dd, trades, alive, pnl_by_regime):
+        return {
+            "final_equity": equity,
+            "pnl": equity - self.initial_cash,
+            "max_drawdown": max_dd,
+            "trades": trades,
+            "killed": ~alive,
+            "pnl_by_regime": pnl_by_regime,
+        }
+
+
+def run_stress(n_paths, n_ticks, chunk_paths=1000, params=None, seed=None, **backtest_kwargs):
+    """
+    Generate n_paths scenarios in chunks and backtest them, keeping only
+    per-path results so memory stays bounded by chunk_paths x n_ticks.
+
+    Returns:
+        dict of per-path result arrays (see BatchBacktest.run)
+    """
+    params = params if params is not None else RegimeParams.from_config()
+    seeds = np.random.SeedSequence(seed).spawn(2)
+    generator = ScenarioGenerator(params, seed=seeds[0])
+    backtest = BatchBacktest(params, seed=seeds[1], **backtest_kwargs)
+
+    parts = []
+    for start in range(0, n_paths, chunk_paths):
+        size = min(chunk_paths, n_paths - start)
+        parts.append(backtest.run(generator.generate(size, n_ticks)))
+    return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+
+def pnl_distribution(results, quantiles=(0.01, 0.05, 0.5, 0.95, 0.99)):
+    """
+    Summary of a stress run: PnL quantiles, VaR/expected shortfall at the
+    lowest quantile, kill-switch rate and mean PnL per regime.
+    """
+    pnl = results["pnl"]
+    q = np.quantile(pnl, quantiles)
+    var_level = min(quantiles)
+    tail = pnl[pnl <= np.quantile(pnl, var_level)]
+    by_regime = results["pnl_by_regime"].mean(axis=0)
+    return {
+        "mean": float(pnl.mean()),
+        "std": float(pnl.std()),
+        "quantiles": {float(k): float(v) for k, v in zip(quantiles, q)},
+        "var": float(-np.quantile(pnl, var_level)),
+        "expected_shortfall": float(-tail.mean()) if len(tail) else 0.0,
+        "kill_rate": float(results["killed"].mean()),
+        "mean_pnl_by_regime": {
+            REGIME_LABELS[c]: float(by_regime[c]) for c in range(1, NUM_REGIME_CODES)
+        },
+    }
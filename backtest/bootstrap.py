@@ -0,0 +1,242 @@
+# File: backtest/bootstrap.py
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from regime.states import NUM_REGIME_CODES, REGIME_LABELS
+from backtest.pnl_attribution import tick_pnl
+
+# Circular block bootstrap of per-tick PnL, grouped by regime.
+#
+# Each resample is the run's ticks re-assembled from blocks of `block`
+# consecutive ticks starting at random offsets, so the serial dependence
+# of PnL and the clustering of regimes survive resampling. Ticks keep
+# their regime; a resample's per-regime PnL, Sharpe and Sortino come from
+# the count, sum, sum of squares and downside sum of squares of that
+# regime's ticks inside the chosen blocks.
+#
+# Those moments are never gathered tick by tick. Prefix sums over the run
+# give the moments of any window as the difference of two rows, so a
+# resample costs O(blocks) row gathers instead of O(ticks), and a chunk
+# of resamples is one np.take over a (resamples, blocks) index array.
+
+GATHER_ROWS = 1 << 18
+
+
+def default_block(n):
+    """
+    Block length rule of thumb for n ticks: n^(1/3).
+    """
+    return max(1, int(round(n ** (1.0 / 3.0))))
+
+
+class RegimeMoments:
+    """
+    Per-regime prefix sums of tick PnL moments.
+
+    prefix[t] holds, for every regime present, the count, sum, sum of
+    squares and downside sum of squares of that regime's PnL over ticks
+    [0, t). Memory is n x regimes x 32 bytes.
+    """
+
+    def __init__(self, regime_codes, pnl):
+        """
+        Parameters:
+            regime_codes : integer regime code per tick
+            pnl          : PnL per tick
+        """
+        codes = np.asarray(regime_codes).astype(np.intp)
+        pnl = np.asarray(pnl, dtype=float)
+        if len(codes) != len(pnl):
+            raise ValueError("regime_codes and pnl differ in length")
+        self.n = len(pnl)
+        self.codes = np.flatnonzero(np.bincount(codes, minlength=NUM_REGIME_CODES))
+
+        # Column of each tick's regime among the regimes present
+        column = np.searchsorted(self.codes, codes)
+        self.prefix = np.zeros((self.n + 1, len(self.codes), 4))
+        ticks = self.prefix[1:]
+        rows = np.arange(self.n)
+        ticks[rows, column, 0] = 1.0
+        ticks[rows, column, 1] = pnl
+        ticks[rows, column, 2] = pnl * pnl
+        ticks[rows, column, 3] = np.minimum(pnl, 0.0) ** 2
+        np.cumsum(ticks, axis=0, out=ticks)
+
+    def _summed(self, bounds):
+        # Prefix moments summed over a (resamples, blocks) array of bounds
+        # in [0, 2n); bounds past the end wrap round to the start
+        wraps = bounds > self.n
+        rows = np.take(self.prefix, bounds - self.n * wraps, axis=0)
+        return rows.sum(axis=1) + wraps.sum(axis=1)[:, None, None] * self.prefix[-1]
+
+    def window(self, starts, lengths):
+        """
+        Per-regime moments summed over sets of circular windows.
+
+        Parameters:
+            starts  : (resamples, blocks) window starts in [0, n)
+            lengths : (blocks,) window lengths, each <= n
+
+        Returns:
+            (resamples, regimes, 4) array of count, sum, sum of squares and
+            downside sum of squares, regimes ordered as self.codes
+        """
+        out = np.empty((len(starts), len(self.codes), 4))
+        # Bound the gathered rows per pass; each is regimes x 32 bytes
+        step = max(1, GATHER_ROWS // max(1, starts.shape[1]))
+        for i in range(0, len(starts), step):
+            part = starts[i:i + step]
+            out[i:i + step] = self._summed(part + lengths) - self._summed(part)
+        return out
+
+    def total(self):
+        """
+        Per-regime moments of the whole run, as a (regimes, 4) array.
+        """
+        return self.prefix[-1].copy()
+
+
+def ratios(moments, periods=1.0):
+    """
+    PnL, Sharpe and Sortino ratios from (..., 4) moment arrays.
+
+    Parameters:
+        moments : count, sum, sum of squares, downside sum of squares
+        periods : ticks per annualization period (1 = per-tick ratios)
+
+    Returns:
+        pnl, sharpe, sortino arrays; ratios are NaN where undefined
+        (fewer than two ticks or no dispersion)
+    """
+    count, total, squares, downside = np.moveaxis(moments, -1, 0)
+    scale = np.sqrt(periods)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = total / count
+        var = (squares - total * mean) / (count - 1)
+        std = np.sqrt(np.maximum(var, 0.0))
+        sharpe = np.where((count > 1) & (std > 0), mean / std * scale, np.nan)
+        down = np.sqrt(downside / count)
+        sortino = np.where((count > 1) & (down > 0), mean / down * scale, np.nan)
+    return total, sharpe, sortino
+
+
+def _block_layout(n, block):
+    # Block lengths covering exactly n ticks; the last block is cut short
+    block = min(block, n)
+    blocks = -(-n // block)
+    lengths = np.full(blocks, block, dtype=np.intp)
+    lengths[-1] = n - block * (blocks - 1)
+    return lengths
+
+
+_WORKER = {}
+
+
+def _init_worker(moments):
+    # Sent once per worker process, not once per chunk
+    _WORKER["moments"] = moments
+
+
+def _resample_chunk(seed, size, block):
+    moments = _WORKER["moments"]
+    lengths = _block_layout(moments.n, block)
+    rng = np.random.default_rng(seed)
+    starts = rng.integers(0, moments.n, size=(size, len(lengths)))
+    return moments.window(starts, lengths)
+
+
+def resample(moments, n_resamples=2000, block=None, seed=0, workers=1, chunk=250):
+    """
+    Block-bootstrap per-regime moments.
+
+    Resamples are drawn in chunks, each from its own child of `seed`, so
+    the result does not depend on the number of workers.
+
+    Parameters:
+        moments     : RegimeMoments of the run
+        n_resamples : number of resamples
+        block       : block length in ticks (default default_block(n))
+        seed        : base seed
+        workers     : worker processes (1 runs in this process,
+                      None uses os.cpu_count())
+        chunk       : resamples drawn per job
+
+    Returns:
+        (n_resamples, regimes, 4) moment array (see RegimeMoments.window)
+    """
+    if moments.n == 0:
+        raise ValueError("cannot bootstrap an empty run")
+    if n_resamples < 1 or chunk < 1:
+        raise ValueError("n_resamples and chunk must be positive")
+    block = block or default_block(moments.n)
+    sizes = [min(chunk, n_resamples - s) for s in range(0, n_resamples, chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = list(zip(seeds, sizes, [block] * len(sizes)))
+    workers = workers or os.cpu_count() or 1
+
+    if workers <= 1 or len(jobs) <= 1:
+        _init_worker(moments)
+        parts = [_resample_chunk(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)),
+                                 initializer=_init_worker, initargs=(moments,)) as pool:
+            futures = [pool.submit(_resample_chunk, *job) for job in jobs]
+            parts = [f.result() for f in futures]
+    return np.concatenate(parts)
+
+
+def bootstrap_attribution(regime_codes, equity, n_resamples=2000, block=None, alpha=0.05,
+                          periods=1.0, seed=0, workers=1, chunk=250, last_equity=None):
+    """
+    Per-regime PnL, Sharpe and Sortino with block-bootstrap confidence
+    intervals, for judging whether RegimePnLTracker's attribution is
+    more than noise.
+
+    Parameters:
+        regime_codes : integer regime code per tick
+        equity       : equity per tick
+        n_resamples  : bootstrap resamples
+        block        : block length in ticks (default n^(1/3)); use at
+                       least the PnL autocorrelation length
+        alpha        : intervals cover 1 - alpha (percentile method)
+        periods      : ticks per annualization period (1 = per tick)
+        seed         : resampling seed
+        workers      : worker processes (see resample())
+        chunk        : resamples per job
+        last_equity  : equity before the first tick (None = start of run)
+
+    Returns:
+        dict keyed by statistic, then regime label:
+            ticks, pnl, pnl_ci, sharpe, sharpe_ci, sortino, sortino_ci,
+            p_value (two-sided bootstrap p-value of regime PnL != 0)
+        plus block and resamples. Undefined ratios are None.
+    """
+    moments = RegimeMoments(regime_codes, tick_pnl(equity, last_equity))
+    block = block or default_block(moments.n)
+    point = ratios(moments.total(), periods)
+    boot = ratios(resample(moments, n_resamples, block, seed, workers, chunk), periods)
+
+    quantiles = [100 * alpha / 2, 100 * (1 - alpha / 2)]
+    with np.errstate(invalid="ignore"):
+        bounds = [np.nanpercentile(b, quantiles, axis=0) for b in boot]
+    pnl_boot = boot[0]
+    p_value = np.minimum(1.0, 2 * np.minimum((pnl_boot <= 0).mean(axis=0),
+                                             (pnl_boot >= 0).mean(axis=0)))
+
+    labels = [REGIME_LABELS[c] for c in moments.codes]
+    counts = moments.total()[:, 0]
+    report = {"ticks": {label: int(c) for label, c in zip(labels, counts)}}
+    for name, values, (lo, hi) in zip(("pnl", "sharpe", "sortino"), point, bounds):
+        report[name] = {label: _number(v) for label, v in zip(labels, values)}
+        report[name + "_ci"] = {label: (_number(a), _number(b))
+                                for label, a, b in zip(labels, lo, hi)}
+    report["p_value"] = {label: float(p) for label, p in zip(labels, p_value)}
+    report["block"] = int(block)
+    report["resamples"] = int(n_resamples)
+    return report
+
+
+def _number(value):
+    return None if np.isnan(value) else float(value)
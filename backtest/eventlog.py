@@ -0,0 +1,404 @@
+# File: backtest/eventlog.py
+import json
+import os
+import struct
+
+import numpy as np
+
+from engine.engine import DEFAULT_FEATURES, RAMMEEngine
+
+# File layout:
+#   header  : MAGIC, uint32 version, uint32 header size, JSON {"features": [...]},
+#             zero-padded to a multiple of 64 bytes
+#   records : fixed-width little-endian rows (see record_dtype), one per tick
+#
+# The file is only ever appended to, so a crash leaves at most one partial
+# record at the end, which readers ignore.
+MAGIC = b"RAMMELOG"
+VERSION = 1
+_PREFIX = struct.Struct("<8sII")
+
+FEATURE_PREFIX = "feature."
+
+
+def record_dtype(features=DEFAULT_FEATURES):
+    """
+    Record layout for a feature set. Fields are in pipeline order, so the
+    first differing field of a record names the first stage that diverged.
+    """
+    fields = [
+        ("tick", "<i8"),
+        ("bid", "<f8"), ("ask", "<f8"), ("bid_size", "<f8"), ("ask_size", "<f8"),
+        ("mid", "<f8"),
+    ]
+    fields += [(FEATURE_PREFIX + name, "<f8") for name in features]
+    fields += [
+        ("regime", "u1"),
+        ("signal", "i1"), ("strength", "<f8"), ("delta", "<f8"),
+        ("traded", "?"),
+        ("fill_ratio", "<f8"), ("executed_price", "<f8"),
+        ("position", "<f8"), ("equity", "<f8"),
+        ("alive", "?"),
+    ]
+    return np.dtype(fields)
+
+
+# Pipeline stage each field belongs to (features map to "engine")
+STAGES = {
+    "tick": "input", "bid": "input", "ask": "input", "bid_size": "input", "ask_size": "input",
+    "mid": "engine", "regime": "engine",
+    "signal": "signal", "strength": "signal", "delta": "signal",
+    "traded": "risk",
+    "fill_ratio": "execution", "executed_price": "execution",
+    "position": "accounting", "equity": "accounting", "alive": "risk",
+}
+
+ENGINE_FIELDS = ("mid", "regime")
+INPUT_FIELDS = ("tick", "bid", "ask", "bid_size", "ask_size")
+
+
+def stage_of(field):
+    return "engine" if field.startswith(FEATURE_PREFIX) else STAGES[field]
+
+
+def _header(features):
+    meta = json.dumps({"features": list(features)}).encode()
+    size = -(-(_PREFIX.size + len(meta)) // 64) * 64
+    return _PREFIX.pack(MAGIC, VERSION, size) + meta.ljust(size - _PREFIX.size, b"\0")
+
+
+def _read_header(fh):
+    prefix = fh.read(_PREFIX.size)
+    if len(prefix) < _PREFIX.size:
+        raise ValueError("Not a RAMME event log")
+    magic, version, size = _PREFIX.unpack(prefix)
+    if magic != MAGIC:
+        raise ValueError("Not a RAMME event log")
+    if version != VERSION:
+        raise ValueError(f"Unsupported event log version {version}")
+    meta = json.loads(fh.read(size - _PREFIX.size).rstrip(b"\0"))
+    return tuple(meta["features"]), size
+
+
+# -------------------------
+# Writing
+# -------------------------
+class EventBuffer:
+    """
+    In-memory block of event records; the loop's logging hook.
+
+    BacktestLoop.enable_logging() calls record() once per tick with the
+    tick's inputs and every stage's output.
+    """
+
+    def __init__(self, features=DEFAULT_FEATURES, capacity=4096):
+        """
+        Parameters:
+            features : engine feature names stored per record
+            capacity : records held before the buffer is full
+        """
+        self.features = tuple(features)
+        self.dtype = record_dtype(self.features)
+        self.rows = np.zeros(capacity, dtype=self.dtype)
+        self.size = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.size
+
+    def record(self, bid, ask, bid_size, ask_size, mid, regime, features,
+               signal, strength, delta, traded, fill_ratio, executed_price,
+               position, equity, alive, tick=None):
+        """
+        Append one tick. tick defaults to the number of records so far.
+        """
+        if self.size == len(self.rows):
+            self.flush()
+        get = features.get
+        nan = np.nan
+        self.rows[self.size] = (
+            (self.count if tick is None else tick, bid, ask, bid_size, ask_size, mid)
+            + tuple(get(name, nan) for name in self.features)
+            + (regime, signal, strength, delta, traded, fill_ratio, executed_price,
+               position, equity, alive)
+        )
+        self.size += 1
+        self.count += 1
+
+    def flush(self):
+        """
+        Make room for more records. A bare buffer has nowhere to put them
+        (see EventLogWriter), so a full buffer is an error.
+        """
+        raise OverflowError("event buffer is full")
+
+    def clear(self):
+        self.size = 0
+
+    def block(self):
+        """
+        View of the buffered records.
+        """
+        return self.rows[:self.size]
+
+
+class EventLogWriter(EventBuffer):
+    """
+    Append-only binary event log of a run, one fixed-width record per tick.
+
+    Records are buffered and written in blocks. Opening an existing log
+    appends to it (the feature set must match), dropping a trailing
+    partial record. A pickled writer (e.g. inside a checkpoint) reopens
+    its file on unpickling, truncated to the records it had written, so a
+    resumed run continues the log exactly where the checkpoint was taken.
+    """
+
+    def __init__(self, path, features=DEFAULT_FEATURES, buffer_size=4096):
+        """
+        Parameters:
+            path        : log file
+            features    : engine feature names stored per record
+            buffer_size : records written per block
+        """
+        super().__init__(features, buffer_size)
+        self.path = path
+        self._open()
+
+    def _open(self, truncate_to=None):
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            with open(self.path, "rb") as fh:
+                features, self.offset = _read_header(fh)
+            if features != self.features:
+                raise ValueError(f"{self.path} logs features {features}, not {self.features}")
+            records = (os.path.getsize(self.path) - self.offset) // self.dtype.itemsize
+            if truncate_to is not None:
+                records = min(records, truncate_to)
+            self.fh = open(self.path, "r+b")
+            self.fh.truncate(self.offset + records * self.dtype.itemsize)
+            self.fh.seek(0, os.SEEK_END)
+            self.count = records
+        else:
+            header = _header(self.features)
+            self.offset = len(header)
+            self.fh = open(self.path, "wb")
+            self.fh.write(header)
+            self.count = 0
+        self.size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def flush(self):
+        if self.size:
+            self.fh.write(self.rows[:self.size].tobytes())
+            self.size = 0
+        self.fh.flush()
+
+    def close(self):
+        if not self.fh.closed:
+            self.flush()
+            self.fh.close()
+
+    def __getstate__(self):
+        self.flush()
+        return {"path": self.path, "features": self.features,
+                "buffer_size": len(self.rows), "count": self.count}
+
+    def __setstate__(self, state):
+        EventBuffer.__init__(self, state["features"], state["buffer_size"])
+        self.path = state["path"]
+        self._open(truncate_to=state["count"])
+
+
+# -------------------------
+# Reading
+# -------------------------
+class EventLog:
+    """
+    Read-only, memory-mapped view of an event log.
+
+    log[i] is the i-th record (tick start_tick + i); log.column(name) is a
+    zero-copy view of one field over the whole run.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as fh:
+            self.features, self.offset = _read_header(fh)
+        self.dtype = record_dtype(self.features)
+        n = (os.path.getsize(path) - self.offset) // self.dtype.itemsize
+        if n:
+            self.records = np.memmap(path, dtype=self.dtype, mode="r", offset=self.offset, shape=(n,))
+        else:
+            self.records = np.zeros(0, dtype=self.dtype)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        return self.records[index]
+
+    @property
+    def start_tick(self):
+        return int(self.records["tick"][0]) if len(self.records) else 0
+
+    def column(self, name):
+        if name in self.features:
+            name = FEATURE_PREFIX + name
+        return self.records[name]
+
+    def at(self, tick):
+        """
+        The record of one tick as a dict (features nested).
+        """
+        row = self.records[tick - self.start_tick]
+        out = {name: row[name].item() for name in self.dtype.names
+               if not name.startswith(FEATURE_PREFIX)}
+        out["features"] = {f: float(row[FEATURE_PREFIX + f]) for f in self.features}
+        return out
+
+    def close(self):
+        self.records = None
+
+
+# -------------------------
+# Comparison
+# -------------------------
+def _differs(a, b, rtol=0.0, atol=0.0):
+    if a.dtype.kind != "f":
+        return a != b
+    both_nan = np.isnan(a) & np.isnan(b)
+    if rtol == 0.0 and atol == 0.0:
+        return ~((a == b) | both_nan)
+    return ~(np.isclose(a, b, rtol=rtol, atol=atol) | both_nan)
+
+
+def _first_divergence(a, b, fields, offset, rtol, atol):
+    """
+    First row where any field differs, with every differing field there.
+    """
+    first = None
+    masks = {}
+    for name in fields:
+        mask = _differs(a[name], b[name], rtol, atol)
+        masks[name] = mask
+        hits = np.flatnonzero(mask)
+        if len(hits) and (first is None or hits[0] < first):
+            first = int(hits[0])
+    if first is None:
+        return None, masks
+    diverged = {name: (a[name][first].item(), b[name][first].item())
+                for name in fields if masks[name][first]}
+    stage = stage_of(next(iter(diverged)))
+    return {"tick": int(a["tick"][first]), "index": offset + first,
+            "stage": stage, "fields": diverged}, masks
+
+
+def diff(a, b, fields=None, rtol=0.0, atol=0.0, chunk=1 << 18):
+    """
+    Compare two event logs record by record.
+
+    Parameters:
+        a, b   : EventLog instances or paths
+        fields : fields to compare (default: all fields both logs share)
+        rtol, atol : float tolerances (default exact; NaN equals NaN)
+        chunk  : records compared per block
+
+    Returns:
+        dict with
+            compared   : records compared (the shorter log's length)
+            lengths    : (len(a), len(b))
+            first      : first divergence {tick, index, stage, fields: {name: (a, b)}}
+                         or None
+            counts     : {field: records that differ}
+    """
+    a = a if isinstance(a, EventLog) else EventLog(a)
+    b = b if isinstance(b, EventLog) else EventLog(b)
+    if fields is None:
+        fields = [name for name in a.dtype.names if name in b.dtype.names]
+    n = min(len(a), len(b))
+    # Exact comparison of identically laid out logs: byte-equal blocks
+    # (the common case before a divergence) are skipped with one memcmp
+    raw = rtol == 0.0 and atol == 0.0 and a.dtype == b.dtype
+    first = None
+    counts = dict.fromkeys(fields, 0)
+    for start in range(0, n, chunk):
+        block_a = a.records[start:start + chunk]
+        block_b = b.records[start:start + chunk]
+        if raw and block_a.tobytes() == block_b.tobytes():
+            continue
+        found, masks = _first_divergence(block_a, block_b, fields, start, rtol, atol)
+        if first is None:
+            first = found
+        for name, mask in masks.items():
+            counts[name] += int(np.count_nonzero(mask))
+    return {"compared": n, "lengths": (len(a), len(b)), "first": first, "counts": counts}
+
+
+def replay(log, engine=None, loop=None, start=0, stop=None, rtol=0.0, atol=0.0, block=4096):
+    """
+    Re-feed a log's recorded ticks and stop at the first divergence.
+
+    With the default, a fresh RAMMEEngine recomputes mid, features and
+    regime, which are deterministic given the ticks. With loop (a
+    BacktestLoop in the same state, RNGs included, as the logged run
+    started in) the whole pipeline is re-run and every stage compared.
+
+    Parameters:
+        log         : EventLog or path
+        engine      : engine to replay through (default RAMMEEngine with
+                      the log's feature set)
+        loop        : BacktestLoop to replay through instead of an engine
+        start, stop : record range (an engine started mid-log needs its
+                      windows warmed up, so divergences right after a
+                      nonzero start are expected)
+        rtol, atol  : float tolerances (default exact)
+        block       : records replayed between comparisons
+
+    Returns:
+        dict with replayed (record count) and first (as in diff(), or None)
+    """
+    log = log if isinstance(log, EventLog) else EventLog(log)
+    stop = len(log) if stop is None else min(stop, len(log))
+    buffer = EventBuffer(log.features, block)
+    if loop is not None:
+        fields = [name for name in log.dtype.names if name not in INPUT_FIELDS]
+        loop.enable_logging(buffer)
+        step = loop.step
+    else:
+        fields = list(ENGINE_FIELDS) + [FEATURE_PREFIX + f for f in log.features]
+        engine = engine if engine is not None else RAMMEEngine(feature_set=log.features)
+        step = None
+
+    replayed = 0
+    try:
+        for lo in range(start, stop, block):
+            logged = log.records[lo:min(lo + block, stop)]
+            buffer.clear()
+            bid, ask = logged["bid"].tolist(), logged["ask"].tolist()
+            bid_size, ask_size = logged["bid_size"].tolist(), logged["ask_size"].tolist()
+            if step is not None:
+                for i in range(len(logged)):
+                    step(bid[i], ask[i], bid_size[i], ask_size[i])
+            else:
+                rows = buffer.rows
+                for i in range(len(logged)):
+                    mid, code, features = engine.on_tick_code(bid[i], ask[i], bid_size[i], ask_size[i])
+                    rows["mid"][i] = mid
+                    rows["regime"][i] = code
+                    for f in log.features:
+                        rows[FEATURE_PREFIX + f][i] = features.get(f, np.nan)
+                buffer.size = len(logged)
+            replayed_block = buffer.block().copy()
+            replayed_block["tick"] = logged["tick"]
+            first, _ = _first_divergence(logged, replayed_block, fields, lo, rtol, atol)
+            if first is not None:
+                return {"replayed": first["index"] - start + 1, "first": first}
+            replayed += len(logged)
+    finally:
+        if loop is not None:
+            loop.disable_logging()
+    return {"replayed": replayed, "first": None}
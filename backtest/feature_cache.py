@@ -0,0 +1,196 @@
+# File: backtest/feature_cache.py
+import glob
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+
+import numpy as np
+
+from backtest.features import compute_features
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Sources whose changes invalidate cached features
+CODE_FILES = (
+    "backtest/features.py",
+    "regime/states.py",
+)
+
+_code_version = None
+
+
+def code_version():
+    """
+    Hash of the feature-computing sources (computed once per process).
+    """
+    global _code_version
+    if _code_version is None:
+        h = hashlib.blake2b(digest_size=16)
+        for pattern in CODE_FILES:
+            for path in sorted(glob.glob(os.path.join(ROOT_DIR, pattern))):
+                h.update(os.path.relpath(path, ROOT_DIR).encode())
+                with open(path, "rb") as fh:
+                    h.update(fh.read())
+        _code_version = h.hexdigest()
+    return _code_version
+
+
+def fingerprint(*arrays):
+    """
+    Content hash of the input tick arrays (dtype, shape and bytes).
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for a in arrays:
+        a = np.ascontiguousarray(a)
+        h.update(f"{a.dtype.str}{a.shape}".encode())
+        h.update(memoryview(a).cast("B"))
+    return h.hexdigest()
+
+
+class FeatureCache:
+    """
+    On-disk cache of feature arrays.
+
+    Entries are keyed by (input fingerprint, feature parameters, code
+    version) and stored as one .npy file per column, loaded back as
+    read-only memory maps, so a hit costs no recomputation and no copy.
+    The cache is bounded by max_bytes; least recently used entries are
+    evicted first.
+    """
+
+    def __init__(self, root=None, max_bytes=2 * 1024 ** 3):
+        """
+        Parameters:
+            root      : cache directory (default $RAMME_CACHE_DIR or
+                        ~/.cache/ramme/features)
+            max_bytes : total size limit
+        """
+        self.root = root or os.environ.get("RAMME_CACHE_DIR") or os.path.expanduser(
+            os.path.join("~", ".cache", "ramme", "features")
+        )
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.root, exist_ok=True)
+
+    def key(self, data_hash, params):
+        blob = json.dumps(
+            {"data": data_hash, "params": params, "code": code_version()},
+            sort_keys=True, default=str,
+        )
+        return hashlib.blake2b(blob.encode(), digest_size=16).hexdigest()
+
+    def _dir(self, key):
+        return os.path.join(self.root, key)
+
+    def get(self, key):
+        """
+        Returns:
+            dict of read-only memmapped arrays, or None on a miss
+        """
+        out = self._load(key)
+        if out is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return out
+
+    def _load(self, key):
+        path = self._dir(key)
+        meta_path = os.path.join(path, "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as fh:
+            meta = json.load(fh)
+        out = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+            for name in meta["columns"]
+        }
+        # Access time drives LRU eviction
+        os.utime(meta_path)
+        return out
+
+    def put(self, key, arrays, params=None):
+        """
+        Store a dict of arrays under key (atomically), then evict down to
+        max_bytes.
+        """
+        final = self._dir(key)
+        tmp = os.path.join(self.root, f".tmp-{uuid.uuid4().hex}")
+        os.makedirs(tmp)
+        size = 0
+        for name, a in arrays.items():
+            np.save(os.path.join(tmp, f"{name}.npy"), np.asarray(a))
+            size += os.path.getsize(os.path.join(tmp, f"{name}.npy"))
+        with open(os.path.join(tmp, "meta.json"), "w") as fh:
+            json.dump({"columns": list(arrays), "bytes": size, "params": params,
+                       "created": time.time()}, fh, default=str)
+        try:
+            os.replace(tmp, final)
+        except OSError:
+            # Another process stored the same key first
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+
+    def entries(self):
+        """
+        (last_access, bytes, key) for every entry, oldest first.
+        """
+        out = []
+        for key in os.listdir(self.root):
+            meta_path = os.path.join(self._dir(key), "meta.json")
+            if key.startswith(".") or not os.path.exists(meta_path):
+                continue
+            with open(meta_path) as fh:
+                size = json.load(fh)["bytes"]
+            out.append((os.path.getmtime(meta_path), size, key))
+        return sorted(out)
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, max_bytes=None):
+        """
+        Drop least recently used entries until the cache fits max_bytes.
+        """
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in entries:
+            if total <= limit:
+                break
+            shutil.rmtree(self._dir(key), ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        self.evict(0)
+
+    def get_or_compute(self, params, compute, *arrays):
+        """
+        Cached compute(*arrays, **params).
+        """
+        key = self.key(fingerprint(*arrays), params)
+        out = self.get(key)
+        if out is None:
+            arrays = compute(*arrays, **params)
+            self.put(key, arrays, params)
+            # Serve the memmapped copy unless it was evicted straight away
+            out = self._load(key) or arrays
+        return out
+
+
+def cached_features(cache, bid, ask, **params):
+    """
+    compute_features() through a FeatureCache (or directly if cache is None).
+    """
+    if cache is None:
+        return compute_features(bid, ask, **params)
+    return cache.get_or_compute(dict(params, kind="features"), _compute_features, bid, ask)
+
+
+def _compute_features(bid, ask, kind, **params):
+    return compute_features(bid, ask, **params)
+
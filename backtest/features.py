@@ -0,0 +1,154 @@
+# File: backtest/features.py
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from regime.states import MarketRegime
+
+# Columns of compute_features(); everything a backtest needs from the
+# engine, independent of strategy, risk and regime-threshold parameters
+FEATURE_COLUMNS = (
+    "mid", "return", "spread", "liquidity",
+    "ret_mean", "ret_var", "ret_mean_abs", "entropy",
+)
+
+TREND = MarketRegime.TREND.value
+MEAN_REVERT = MarketRegime.MEAN_REVERT.value
+VOLATILE = MarketRegime.VOLATILE.value
+
+
+def rolling_mean(x, window):
+    """
+    Mean of the last min(window, t + 1) values at every t (the averaging
+    LiquidityEstimator does per tick), via a cumulative sum.
+    """
+    x = np.asarray(x, dtype=float)
+    csum = np.cumsum(x, axis=-1)
+    window_sum = csum.copy()
+    window_sum[..., window:] -= csum[..., :-window]
+    counts = np.minimum(np.arange(1, x.shape[-1] + 1), window)
+    return window_sum / counts
+
+
+def _row_entropy(rows, bins):
+    """
+    EntropyCalculator.normalized_entropy for every row, replicating
+    np.histogram(density=True) and np.sum's summation order so the result
+    matches the per-tick detector bit for bit.
+    """
+    n_rows, width = rows.shape
+    first = rows.min(axis=1)
+    last = rows.max(axis=1)
+    flat = first == last
+    first = np.where(flat, first - 0.5, first)
+    last = np.where(flat, last + 0.5, last)
+
+    edges = np.linspace(first, last, bins + 1, axis=1)
+    f_indices = ((rows - first[:, None]) / (last - first)[:, None]) * bins
+    indices = f_indices.astype(np.intp)
+    indices[indices == bins] -= 1
+    row_idx = np.arange(n_rows)[:, None]
+    indices -= rows < edges[row_idx, indices]
+    indices += (rows >= edges[row_idx, indices + 1]) & (indices != bins - 1)
+
+    counts = np.bincount((indices + row_idx * bins).ravel(), minlength=n_rows * bins)
+    counts = counts.reshape(n_rows, bins)
+    hist = counts / np.diff(edges, axis=1) / width
+
+    # hist[hist > 0] keeps the non-empty bins in order; np.sum adds fewer
+    # than 8 values left to right and 8+ values as an 8-way tree
+    nonzero = hist > 0
+    order = np.argsort(~nonzero, axis=1, kind="stable")
+    hist = np.take_along_axis(hist, order, axis=1)
+    k = nonzero.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        terms = np.where(np.arange(bins) < k[:, None], hist * np.log(hist), 0.0)
+
+    sequential = terms[:, 0].copy()
+    for j in range(1, bins):
+        sequential += terms[:, j]
+    total = sequential
+    if bins >= 8:
+        c = terms
+        tree = ((c[:, 0] + c[:, 1]) + (c[:, 2] + c[:, 3])) + ((c[:, 4] + c[:, 5]) + (c[:, 6] + c[:, 7]))
+        for j in range(8, bins):
+            tree += c[:, j]
+        total = np.where(k >= 8, tree, sequential)
+
+    max_entropy = np.log(bins)
+    return -total / max_entropy if max_entropy > 0 else np.zeros(n_rows)
+
+
+def compute_features(bid, ask, liquidity_window=50, detector_window=100,
+                     entropy_window=20, bins=10, chunk=65536):
+    """
+    RAMMEEngine's per-tick outputs for a whole tick archive, as arrays.
+
+    Parameters:
+        bid, ask         : 1-D arrays of top-of-book prices
+        liquidity_window : LiquidityEstimator window
+        detector_window  : RegimeDetector window
+        entropy_window   : EntropyCalculator window (capped at detector_window)
+        bins             : entropy histogram bins
+        chunk            : rows processed at once for the rolling statistics
+
+    Returns:
+        dict of float arrays (FEATURE_COLUMNS). ret_mean/ret_var/
+        ret_mean_abs/entropy are the RegimeDetector statistics over the
+        trailing detector_window returns and NaN during warm-up; pass them
+        to classify_regimes() for any threshold setting.
+    """
+    bid = np.asarray(bid, dtype=float)
+    ask = np.asarray(ask, dtype=float)
+    n = len(bid)
+
+    raw_mid = (bid + ask) / 2.0
+    ret = np.zeros(n)
+    ret[1:] = raw_mid[1:] - raw_mid[:-1]
+    spread = np.maximum(ask - bid, 0.0)
+
+    out = {
+        "mid": np.maximum(raw_mid, 0.01),
+        "return": ret,
+        "spread": spread,
+        "liquidity": 1.0 / (rolling_mean(spread, liquidity_window) + 1e-6),
+    }
+    for name in ("ret_mean", "ret_var", "ret_mean_abs", "entropy"):
+        out[name] = np.full(n, np.nan)
+
+    w = detector_window
+    ew = min(w, entropy_window)
+    if n >= w:
+        windows = sliding_window_view(ret, w)
+        tails = sliding_window_view(ret, ew)[w - ew:]
+        for start in range(0, len(windows), chunk):
+            rows = windows[start:start + chunk]
+            sl = slice(start + w - 1, start + w - 1 + len(rows))
+            out["ret_mean"][sl] = rows.mean(axis=1)
+            out["ret_var"][sl] = rows.var(axis=1)
+            out["ret_mean_abs"][sl] = np.abs(rows).mean(axis=1)
+            out["entropy"][sl] = _row_entropy(np.ascontiguousarray(tails[start:start + chunk]), bins)
+    return out
+
+
+def classify_regimes(features, entropy_threshold=0.5, trend_factor=2.0):
+    """
+    RegimeDetector.detect() over precomputed statistics.
+
+    Returns:
+        uint8 array of regime codes (VOLATILE during warm-up)
+    """
+    mean = features["ret_mean"]
+    var = features["ret_var"]
+    entropy = features["entropy"]
+    warm = ~np.isnan(mean)
+
+    with np.errstate(invalid="ignore"):
+        trending = np.abs(mean) > trend_factor * np.sqrt(var)
+        volatile = var > 5 * features["ret_mean_abs"]
+        low_entropy = entropy < entropy_threshold
+
+    codes = np.full(len(mean), MEAN_REVERT, dtype=np.uint8)
+    codes[volatile & ~low_entropy] = VOLATILE
+    codes[trending & low_entropy] = TREND
+    codes[~warm] = VOLATILE
+    return codes
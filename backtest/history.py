@@ -0,0 +1,160 @@
+import os
+
+import numpy as np
+
+from regime.states import regime_labels
+
+
+class TickHistory:
+    """
+    Columnar per-tick history.
+
+    Each column is a NumPy array grown geometrically on append. The regime
+    is stored as a uint8 code and only turned into labels by to_columns().
+    """
+
+    COLUMNS = (
+        ("tick", np.int64),
+        ("regime", np.uint8),
+        ("mid", np.float64),
+        ("equity", np.float64),
+        ("traded", np.bool_),
+        ("return", np.float64),
+    )
+
+    def __init__(self, capacity=1024):
+        self.size = 0
+        self.columns = {
+            name: np.empty(capacity, dtype=dtype) for name, dtype in self.COLUMNS
+        }
+
+    def __len__(self):
+        return self.size
+
+    def _grow(self):
+        for name, col in self.columns.items():
+            grown = np.empty(max(2 * len(col), 1), dtype=col.dtype)
+            grown[:self.size] = col[:self.size]
+            self.columns[name] = grown
+
+    def append(self, tick, regime, mid, equity, traded, ret):
+        """
+        Append one tick.
+
+        Parameters:
+            tick   : tick index
+            regime : integer regime code
+            mid    : mid price
+            equity : equity after the tick
+            traded : whether a trade occurred
+            ret    : tick return
+        """
+        i = self.size
+        if i == len(self.columns["tick"]):
+            self._grow()
+        cols = self.columns
+        cols["tick"][i] = tick
+        cols["regime"][i] = regime
+        cols["mid"][i] = mid
+        cols["equity"][i] = equity
+        cols["traded"][i] = traded
+        cols["return"][i] = ret
+        self.size = i + 1
+
+    def column(self, name):
+        """
+        View of one column over the filled rows.
+        """
+        return self.columns[name][:self.size]
+
+    def to_columns(self, labels=True):
+        """
+        Filled columns as a dict of arrays (e.g. for pandas.DataFrame).
+
+        Parameters:
+            labels : convert the regime column to label strings
+        """
+        out = {name: self.column(name) for name, _ in self.COLUMNS}
+        if labels:
+            out["regime"] = regime_labels(out["regime"])
+        return out
+
+
+class TickRing(TickHistory):
+    """
+    Bounded columnar history: the last `capacity` ticks in a ring buffer.
+
+    Memory is allocated once. If spill_dir is given, every time the ring
+    wraps the full buffer (exactly the previous `capacity` ticks, in
+    order) is written to spill_dir as one .npz chunk before it is
+    overwritten, so the complete run can be reloaded with read_spill().
+    """
+
+    def __init__(self, capacity=65536, spill_dir=None):
+        super().__init__(capacity)
+        self.capacity = capacity
+        self.total = 0
+        self.spill_dir = spill_dir
+        self.chunks = 0
+        self.spilled = 0
+        if spill_dir is not None:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def append(self, tick, regime, mid, equity, traded, ret):
+        i = self.total % self.capacity
+        if i == 0 and self.total and self.spill_dir is not None:
+            self.spill()
+        cols = self.columns
+        cols["tick"][i] = tick
+        cols["regime"][i] = regime
+        cols["mid"][i] = mid
+        cols["equity"][i] = equity
+        cols["traded"][i] = traded
+        cols["return"][i] = ret
+        self.total += 1
+        self.size = len(self)
+
+    def spill(self):
+        """
+        Write the buffered ticks not yet on disk as the next chunk.
+        """
+        n = self.total - self.spilled
+        if n <= 0:
+            return
+        start = self.spilled % self.capacity
+        path = os.path.join(self.spill_dir, f"chunk_{self.chunks:06d}.npz")
+        np.savez(path, **{name: col[start:start + n] for name, col in self.columns.items()})
+        self.chunks += 1
+        self.spilled = self.total
+
+    def column(self, name):
+        """
+        One column over the buffered rows, oldest first (a copy once the
+        ring has wrapped).
+        """
+        col = self.columns[name]
+        if self.total <= self.capacity:
+            return col[:self.total]
+        i = self.total % self.capacity
+        return np.concatenate((col[i:], col[:i]))
+
+
+def read_spill(spill_dir, labels=True):
+    """
+    Concatenate the chunks written by TickRing.spill() into columns.
+    """
+    paths = sorted(p for p in os.listdir(spill_dir) if p.startswith("chunk_") and p.endswith(".npz"))
+    parts = []
+    for p in paths:
+        with np.load(os.path.join(spill_dir, p)) as data:
+            parts.append({name: data[name] for name, _ in TickHistory.COLUMNS})
+    out = {
+        name: np.concatenate([part[name] for part in parts]) if parts else np.empty(0, dtype=dtype)
+        for name, dtype in TickHistory.COLUMNS
+    }
+    if labels:
+        out["regime"] = regime_labels(out["regime"])
+    return out
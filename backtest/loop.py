@@ -0,0 +1,275 @@
+# File: backtest/loop.py
+from engine.engine import RAMMEEngine
+from strategy.signal import DirectionalSignal
+from strategy.position import PositionManager
+from execution.fill import PartialFillModel
+from execution.slippage import SlippageModel
+from execution.latency import LatencyModel
+from backtest.simulator import BacktestSimulator
+from backtest.pnl_attribution import RegimePnLTracker
+from risk.governor import RiskGovernor
+
+# Engine features read by the execution stage. Volatility is optional, as
+# in the signal stage, and falls back to the engine default of 0.01.
+EXECUTION_FEATURES = ("liquidity",)
+
+
+def required_features(signal_engine=None):
+    """
+    Engine feature_set for a BacktestLoop: the signal engine's
+    required_features (default DirectionalSignal's) plus EXECUTION_FEATURES.
+    """
+    signal = signal_engine if signal_engine is not None else DirectionalSignal
+    return tuple(dict.fromkeys(tuple(signal.required_features) + EXECUTION_FEATURES))
+
+
+class BacktestLoop:
+    """
+    Per-tick trading pipeline as run by main.py:
+    engine → signal → risk → execution → accounting
+    """
+
+    def __init__(self,
+                 engine=None,
+                 signal_engine=None,
+                 position_mgr=None,
+                 fill_model=None,
+                 slippage_model=None,
+                 latency_model=None,
+                 sim=None,
+                 risk=None,
+                 pnl_tracker=None,
+                 profiler=None,
+                 event_log=None):
+        """
+        Components default to main.py's setup. If profiler (a
+        StageProfiler) is given, every tick records the engine's
+        "features"/"regime" stages and the loop's "signal", "risk",
+        "execution" and "accounting" stages. If event_log (a
+        backtest.eventlog.EventLogWriter) is given, every tick's inputs
+        and stage outputs are appended to it. engine must compute
+        EXECUTION_FEATURES (see required_features()).
+        """
+        self.engine = engine or RAMMEEngine()
+        missing = [f for f in EXECUTION_FEATURES if f not in self.engine.feature_set]
+        if missing:
+            raise ValueError(
+                f"engine feature_set lacks {missing}, read by the execution stage; "
+                "build it with backtest.loop.required_features()"
+            )
+        self.signal_engine = signal_engine or DirectionalSignal()
+        self.position_mgr = position_mgr or PositionManager(max_position=1.0)
+        self.fill_model = fill_model or PartialFillModel()
+        self.slippage_model = slippage_model or SlippageModel()
+        self.latency_model = latency_model or LatencyModel()
+        self.sim = sim or BacktestSimulator(initial_cash=100000)
+        self.risk = risk or RiskGovernor(
+            max_drawdown=0.05,
+            max_exposure=1.0,
+            regime_limits={"VOLATILE": 0.5}
+        )
+        self.pnl_tracker = pnl_tracker or RegimePnLTracker()
+
+        self.profiler = None
+        self.event_log = None
+        if profiler is not None:
+            self.enable_profiling(profiler)
+        if event_log is not None:
+            self.enable_logging(event_log)
+
+    def enable_profiling(self, profiler):
+        """
+        Switch step() to the instrumented path (engine included).
+        """
+        self.profiler = profiler
+        self.engine.enable_profiling(profiler)
+        self._select_step()
+
+    def disable_profiling(self):
+        self.profiler = None
+        self.engine.disable_profiling()
+        self._select_step()
+
+    def enable_logging(self, event_log):
+        """
+        Switch step() to the path that records every tick into event_log
+        (anything with EventBuffer.record()). The logged path also records
+        stage timings while profiling is enabled.
+        """
+        self.event_log = event_log
+        self._select_step()
+
+    def disable_logging(self):
+        self.event_log = None
+        self._select_step()
+
+    def _select_step(self):
+        # The plain step() runs unless logging or profiling is enabled
+        self.__dict__.pop("step", None)
+        if self.event_log is not None:
+            self.step = self._step_logged
+        elif self.profiler is not None:
+            self.step = self._step_profiled
+
+    # -------------------------
+    # Stages
+    # -------------------------
+    def _decide(self, features, regime):
+        ret = features.get("return", 0.0)
+        volatility = features.get("volatility", 0.01)
+        signal, strength = self.signal_engine.generate(ret, regime, volatility)
+        target_pos = self.position_mgr.target_position(signal, strength)
+        return signal, strength, self.position_mgr.delta(target_pos)
+
+    def _signal(self, features, regime):
+        return self._decide(features, regime)[2]
+
+    def _allowed(self, delta, regime):
+        return delta != 0 and self.risk.allow_trade(regime, self.position_mgr.exposure())
+
+    def _quote(self, delta, mid_price, regime, features):
+        """
+        Fill ratio and executed price for an order of size delta.
+        """
+        liquidity = features["liquidity"]
+        volatility = features.get("volatility", 0.01)
+
+        fill_ratio = self.fill_model.fill_ratio(liquidity, abs(delta))
+
+        latency_ms = self.latency_model.sample_latency(regime)
+        drifted_price = self.latency_model.apply_price_drift(mid_price, latency_ms, volatility)
+
+        executed_price = self.slippage_model.apply(
+            drifted_price,
+            abs(delta),
+            liquidity,
+            side=1 if delta > 0 else -1,
+            regime=regime
+        )
+        return fill_ratio, executed_price
+
+    def _fill(self, delta, mid_price, fill_ratio, executed_price):
+        equity = self.sim.step(
+            target_delta=delta,
+            mid_price=mid_price,
+            fill_ratio=fill_ratio,
+            executed_price=executed_price
+        )
+
+        self.position_mgr.update(delta * fill_ratio)
+        return equity
+
+    def _execute(self, delta, mid_price, regime, features):
+        fill_ratio, executed_price = self._quote(delta, mid_price, regime, features)
+        return self._fill(delta, mid_price, fill_ratio, executed_price)
+
+    def _account(self, regime, equity, traded):
+        self.pnl_tracker.update(regime, equity, traded=traded)
+        return self.risk.update(equity)
+
+    # -------------------------
+    # Tick
+    # -------------------------
+    def step(self, bid, ask, bid_size, ask_size):
+        """
+        Run one tick.
+
+        Returns:
+            (mid_price, regime_code, features, equity, traded, alive)
+            where alive is False once the drawdown kill switch trips
+        """
+        mid_price, regime, features = self.engine.on_tick_code(bid, ask, bid_size, ask_size)
+
+        delta = self._signal(features, regime)
+
+        if self._allowed(delta, regime):
+            equity = self._execute(delta, mid_price, regime, features)
+            traded = True
+        else:
+            equity = self.sim.mark_to_market(mid_price)
+            traded = False
+
+        alive = self._account(regime, equity, traded)
+        return mid_price, regime, features, equity, traded, alive
+
+    def _step_profiled(self, bid, ask, bid_size, ask_size):
+        """
+        step() with per-stage timings.
+        """
+        prof = self.profiler
+        now = prof.now
+        prof.begin_tick()
+
+        mid_price, regime, features = self.engine.on_tick_code(bid, ask, bid_size, ask_size)
+
+        t0 = now()
+        delta = self._signal(features, regime)
+        t1 = now()
+        prof.record("signal", t0, t1)
+
+        allowed = self._allowed(delta, regime)
+        t2 = now()
+        prof.record("risk", t1, t2)
+
+        if allowed:
+            equity = self._execute(delta, mid_price, regime, features)
+            traded = True
+        else:
+            equity = self.sim.mark_to_market(mid_price)
+            traded = False
+        t3 = now()
+        prof.record("execution", t2, t3)
+
+        alive = self._account(regime, equity, traded)
+        prof.record("accounting", t3, now())
+
+        prof.end_tick()
+        return mid_price, regime, features, equity, traded, alive
+
+    def _step_logged(self, bid, ask, bid_size, ask_size):
+        """
+        step() that records the tick's inputs and stage outputs, plus the
+        _step_profiled() stage timings when a profiler is set.
+        """
+        prof = self.profiler
+        if prof is not None:
+            now = prof.now
+            prof.begin_tick()
+
+        mid_price, regime, features = self.engine.on_tick_code(bid, ask, bid_size, ask_size)
+
+        if prof is not None:
+            t0 = now()
+        signal, strength, delta = self._decide(features, regime)
+        if prof is not None:
+            t1 = now()
+            prof.record("signal", t0, t1)
+
+        allowed = self._allowed(delta, regime)
+        if prof is not None:
+            t2 = now()
+            prof.record("risk", t1, t2)
+
+        if allowed:
+            fill_ratio, executed_price = self._quote(delta, mid_price, regime, features)
+            equity = self._fill(delta, mid_price, fill_ratio, executed_price)
+            traded = True
+        else:
+            fill_ratio, executed_price = 0.0, float("nan")
+            equity = self.sim.mark_to_market(mid_price)
+            traded = False
+        if prof is not None:
+            t3 = now()
+            prof.record("execution", t2, t3)
+
+        alive = self._account(regime, equity, traded)
+        if prof is not None:
+            prof.record("accounting", t3, now())
+            prof.end_tick()
+
+        self.event_log.record(
+            bid, ask, bid_size, ask_size, mid_price, regime, features,
+            signal, strength, delta, traded, fill_ratio, executed_price,
+            self.sim.position, equity, alive,
+        )
+        return mid_price, regime, features, equity, traded, alive
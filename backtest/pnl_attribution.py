@@ -1,61 +1,94 @@
+import numpy as np
+
+from regime.states import NUM_REGIME_CODES, REGIME_LABELS, regime_code
+
+
 class RegimePnLTracker:
     """
     Tracks PnL, drawdown, and activity by regime.
+
+    Accumulators are arrays indexed by integer regime code; labels are only
+    attached in report().
     """
 
     def __init__(self):
         self.last_equity = None
-        self.pnl_by_regime = {}
-        self.peak_by_regime = {}
-        self.drawdown_by_regime = {}
-        self.trades_by_regime = {}
+        self.pnl = np.zeros(NUM_REGIME_CODES)
+        self.peak = np.full(NUM_REGIME_CODES, -np.inf)
+        self.max_drawdown = np.zeros(NUM_REGIME_CODES)
+        self.trades = np.zeros(NUM_REGIME_CODES, dtype=np.int64)
+        self.seen = np.zeros(NUM_REGIME_CODES, dtype=bool)
 
     def update(self, regime, equity, traded=False):
         """
         Update PnL attribution for a regime.
 
         Parameters:
-            regime  : current regime label
+            regime  : current regime code (or label)
             equity  : current equity
             traded  : whether a trade occurred this step
         """
+        code = regime_code(regime)
+        self.seen[code] = True
+
+        # Peak
+        peak = self.peak[code]
+        if equity > peak:
+            peak = equity
+            self.peak[code] = peak
+
         if self.last_equity is None:
             self.last_equity = equity
-            self.peak_by_regime.setdefault(regime, equity)
-            self.drawdown_by_regime.setdefault(regime, 0.0)
-            self.trades_by_regime.setdefault(regime, 0)
             return
 
-        pnl = equity - self.last_equity
-
         # PnL
-        self.pnl_by_regime.setdefault(regime, 0.0)
-        self.pnl_by_regime[regime] += pnl
+        self.pnl[code] += equity - self.last_equity
 
         # Trade count
         if traded:
-            self.trades_by_regime[regime] = self.trades_by_regime.get(regime, 0) + 1
+            self.trades[code] += 1
 
         # Drawdown
-        peak = self.peak_by_regime.get(regime, equity)
-        peak = max(peak, equity)
-        self.peak_by_regime[regime] = peak
-
         dd = (peak - equity) / max(peak, 1e-6)
-        self.drawdown_by_regime[regime] = max(
-            self.drawdown_by_regime.get(regime, 0.0), dd
-        )
+        if dd > self.max_drawdown[code]:
+            self.max_drawdown[code] = dd
 
         self.last_equity = equity
 
+    def update_batch(self, regime_codes, equity, traded=None):
+        """
+        Fold a block of ticks into the tracker in one vectorized pass.
+        Equivalent to calling update() for each tick in order.
+
+        Parameters:
+            regime_codes : integer regime code per tick
+            equity       : equity per tick
+            traded       : optional bool per tick
+        """
+        equity = np.asarray(equity, dtype=float)
+        if len(equity) == 0:
+            return
+
+        result = attribute(
+            regime_codes, equity, traded,
+            last_equity=self.last_equity, peak=self.peak,
+        )
+        self.pnl += result["pnl"]
+        self.trades += result["trades"]
+        self.peak = result["peak"]
+        np.maximum(self.max_drawdown, result["max_drawdown"], out=self.max_drawdown)
+        self.seen |= result["ticks"] > 0
+        self.last_equity = float(equity[-1])
+
     def report(self):
         """
-        Final attribution report.
+        Final attribution report, keyed by regime label.
         """
+        codes = np.flatnonzero(self.seen)
         return {
-            "pnl": dict(self.pnl_by_regime),
-            "max_drawdown": dict(self.drawdown_by_regime),
-            "trades": dict(self.trades_by_regime),
+            "pnl": {REGIME_LABELS[c]: float(self.pnl[c]) for c in codes},
+            "max_drawdown": {REGIME_LABELS[c]: float(self.max_drawdown[c]) for c in codes},
+            "trades": {REGIME_LABELS[c]: int(self.trades[c]) for c in codes},
         }
 
     def reset(self):
@@ -63,3 +96,87 @@ class RegimePnLTracker:
         Reset tracker state.
         """
         self.__init__()
+
+
+def tick_pnl(equity, last_equity=None):
+    """
+    Per-tick PnL from an equity path. At the start of a run
+    (last_equity None) the first tick has no previous equity and carries
+    no PnL.
+    """
+    equity = np.asarray(equity, dtype=float)
+    pnl = np.empty(len(equity))
+    pnl[1:] = np.diff(equity)
+    if len(equity):
+        pnl[0] = 0.0 if last_equity is None else equity[0] - last_equity
+    return pnl
+
+
+def attribute(regime_codes, equity, traded=None, last_equity=None, peak=None):
+    """
+    Per-regime attribution over whole tick arrays, using grouped
+    reductions instead of a per-tick loop.
+
+    Parameters:
+        regime_codes : integer regime code per tick
+        equity       : equity per tick
+        traded       : optional bool per tick
+        last_equity  : equity before the first tick (None = start of run)
+        peak         : optional per-regime peaks carried over from earlier ticks
+
+    Returns:
+        dict of arrays indexed by regime code:
+            pnl, trades, ticks, peak, max_drawdown
+    """
+    # uint8 codes keep the stable argsort below on NumPy's radix sort path
+    codes = np.asarray(regime_codes).astype(np.uint8, copy=False)
+    equity = np.asarray(equity, dtype=float)
+    n = len(equity)
+    k = NUM_REGIME_CODES
+
+    # PnL of each tick is attributed to that tick's regime
+    pnl = np.bincount(codes, weights=tick_pnl(equity, last_equity), minlength=k)
+
+    if traded is None:
+        trades = np.zeros(k, dtype=np.int64)
+    else:
+        traded = np.asarray(traded, dtype=bool)
+        if last_equity is None and n:
+            traded = traded.copy()
+            traded[0] = False
+        trades = np.bincount(codes[traded], minlength=k).astype(np.int64)
+
+    # Peaks and drawdowns need a running max per regime, so group the ticks
+    # by regime (stable sort keeps time order within a group) and run the
+    # accumulation segment by segment.
+    ticks = np.zeros(k, dtype=np.int64)
+    peak_out = np.full(k, -np.inf) if peak is None else np.array(peak, dtype=float)
+    max_dd = np.zeros(k)
+    if n:
+        order = np.argsort(codes, kind="stable")
+        grouped_codes = codes[order]
+        grouped_equity = equity[order]
+        starts = np.flatnonzero(np.r_[True, grouped_codes[1:] != grouped_codes[:-1]])
+        ends = np.r_[starts[1:], n]
+        group = grouped_codes[starts]
+        ticks[group] = ends - starts
+
+        running_peak = np.empty(n)
+        for start, end in zip(starts, ends):
+            np.maximum.accumulate(grouped_equity[start:end], out=running_peak[start:end])
+            np.maximum(running_peak[start:end], peak_out[grouped_codes[start]],
+                       out=running_peak[start:end])
+        peak_out[group] = running_peak[ends - 1]
+
+        # dd = (peak - equity) / max(peak, 1e-6), computed in place
+        dd = np.subtract(running_peak, grouped_equity, out=grouped_equity)
+        dd /= np.maximum(running_peak, 1e-6, out=running_peak)
+        max_dd[group] = np.maximum.reduceat(dd, starts)
+
+    return {
+        "pnl": pnl,
+        "trades": trades,
+        "ticks": ticks,
+        "peak": peak_out,
+        "max_drawdown": max_dd,
+    }
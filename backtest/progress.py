@@ -0,0 +1,71 @@
+# File: backtest/progress.py
+import sys
+import time
+
+
+class ProgressReporter:
+    """
+    Throttled progress line for long runs.
+
+    update() is cheap enough to call every tick: the clock is only read
+    every check_every calls and a line is written at most once per
+    interval seconds.
+    """
+
+    def __init__(self, total=None, interval=1.0, unit="ticks", stream=None, check_every=256):
+        """
+        Parameters:
+            total       : expected count (enables % and ETA), optional
+            interval    : seconds between progress lines (<= 0 disables)
+            unit        : name of the counted items
+            stream      : output stream (default sys.stderr)
+            check_every : calls between clock reads
+        """
+        self.total = total
+        self.interval = interval
+        self.unit = unit
+        self.stream = stream or sys.stderr
+        self.check_every = max(1, check_every)
+        self.count = 0
+        self.start = time.perf_counter()
+        self._next = self.start + interval
+        self._calls = 0
+
+    def update(self, count=None, **fields):
+        """
+        Record progress (count defaults to one more than before); extra
+        keyword fields are appended to the line, e.g. equity=...
+        """
+        self.count = self.count + 1 if count is None else count
+        self._calls += 1
+        if self.interval <= 0 or self._calls % self.check_every:
+            return
+        now = time.perf_counter()
+        if now >= self._next:
+            self._next = now + self.interval
+            self._write(now, fields)
+
+    def _write(self, now, fields):
+        elapsed = now - self.start
+        rate = self.count / elapsed if elapsed > 0 else 0.0
+        parts = [f"{self.count:,} {self.unit}"]
+        if self.total:
+            parts[0] += f"/{self.total:,} ({100.0 * self.count / self.total:.0f}%)"
+            if rate > 0:
+                parts.append(f"eta {(self.total - self.count) / rate:,.0f}s")
+        parts.append(f"{rate:,.0f} {self.unit}/s")
+        parts.extend(f"{k} {v:,.2f}" if isinstance(v, float) else f"{k} {v}" for k, v in fields.items())
+        print(" | ".join(parts), file=self.stream, flush=True)
+
+    def finish(self, **fields):
+        """
+        Write a final line and return the elapsed seconds.
+        """
+        now = time.perf_counter()
+        if self.interval > 0:
+            self._write(now, fields)
+        return now - self.start
+
+    def rate(self):
+        elapsed = time.perf_counter() - self.start
+        return self.count / elapsed if elapsed > 0 else 0.0
@@ -0,0 +1,120 @@
+# File: backtest/scenario.py
+import numpy as np
+
+from config.loader import RegimeParams
+
+
+class ScenarioGenerator:
+    """
+    Vectorized Monte Carlo tick generator.
+
+    Produces (n_paths x n_ticks) arrays of regime, mid, bid, ask and sizes
+    in one call, with Markov regime switching and per-regime drift,
+    volatility, mean reversion and jumps. The dynamics follow
+    RAMMEEngine._simulate_tick; parameters come from RegimeParams
+    (config/regimes.yaml, "simulation" and "transitions" sections).
+    """
+
+    def __init__(self, params=None, seed=None):
+        """
+        Parameters:
+            params : RegimeParams (defaults to config/*.yaml)
+            seed   : seed for the internal np.random.Generator
+        """
+        self.params = params if params is not None else RegimeParams.from_config()
+        self.rng = np.random.default_rng(seed)
+
+    def regime_paths(self, n_paths, n_ticks, initial_regime=None):
+        """
+        Simulate Markov regime paths.
+
+        Parameters:
+            initial_regime : regime code for tick 0 (default: drawn from
+                             the transition matrix's initial row)
+
+        Returns:
+            (n_paths, n_ticks) uint8 array of regime codes
+        """
+        cum = np.cumsum(self.params.transitions, axis=1)
+        cum[:, -1] = 1.0
+        regimes = np.empty((n_paths, n_ticks), dtype=np.uint8)
+        if n_ticks == 0:
+            return regimes
+
+        u = self.rng.random((n_paths, n_ticks))
+        if initial_regime is None:
+            current = np.searchsorted(cum[0], u[:, 0], side="right")
+        else:
+            current = np.full(n_paths, initial_regime, dtype=np.intp)
+        regimes[:, 0] = current
+        for t in range(1, n_ticks):
+            # Inverse-CDF draw from each path's current transition row
+            current = (u[:, t, None] >= cum[current]).sum(axis=1)
+            regimes[:, t] = current
+        return regimes
+
+    def generate(self, n_paths, n_ticks, s0=100.0, initial_regime=None, regimes=None):
+        """
+        Generate scenarios.
+
+        Parameters:
+            n_paths        : number of independent paths
+            n_ticks        : ticks per path
+            s0             : starting mid price
+            initial_regime : optional regime code for tick 0
+            regimes        : optional precomputed (n_paths, n_ticks) regime codes
+
+        Returns:
+            dict of (n_paths, n_ticks) arrays:
+                regime, mid, bid, ask, bid_size, ask_size
+        """
+        p = self.params
+        rng = self.rng
+        if regimes is None:
+            regimes = self.regime_paths(n_paths, n_ticks, initial_regime)
+        codes = regimes.astype(np.intp)
+
+        # Everything that does not depend on the price path is drawn and
+        # looked up for all ticks at once
+        drift = p.sim_drift[codes]
+        shocks = p.sim_vol[codes] * rng.standard_normal((n_paths, n_ticks))
+        jumps = rng.random((n_paths, n_ticks)) < p.sim_jump_prob[codes]
+        signs = rng.integers(0, 2, (n_paths, n_ticks)) * 2 - 1
+        base_ret = drift + shocks + np.where(jumps, signs * p.sim_jump_size[codes], 0.0)
+
+        kappa = p.sim_mean_reversion[codes]
+        if not kappa.any():
+            # No path dependence beyond compounding: one cumulative product,
+            # with the 0.01 floor applied as a running clamp
+            growth = np.maximum(1.0 + base_ret, 0.0)
+            mid = s0 * np.cumprod(growth, axis=1)
+            if (mid < 0.01).any():
+                mid = self._compound(s0, base_ret, kappa)
+        else:
+            mid = self._compound(s0, base_ret, kappa)
+
+        low, high = p.sim_spread
+        spread = rng.uniform(low, high, (n_paths, n_ticks))
+        return {
+            "regime": regimes,
+            "mid": mid,
+            "bid": mid - spread / 2,
+            "ask": mid + spread / 2,
+            "bid_size": rng.poisson(p.sim_size_lambda, (n_paths, n_ticks)),
+            "ask_size": rng.poisson(p.sim_size_lambda, (n_paths, n_ticks)),
+        }
+
+    def _compound(self, s0, base_ret, kappa):
+        """
+        Tick-by-tick compounding (vectorized over paths) for mean
+        reversion and the price floor.
+        """
+        n_paths, n_ticks = base_ret.shape
+        mean_price = self.params.sim_mean_price
+        mid = np.empty((n_paths, n_ticks))
+        price = np.full(n_paths, float(s0))
+        for t in range(n_ticks):
+            ret = base_ret[:, t] + kappa[:, t] * (mean_price - price)
+            price = np.maximum(price * (1.0 + ret), 0.01)
+            mid[:, t] = price
+        return mid
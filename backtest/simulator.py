@@ -1,15 +1,24 @@
+from collections import deque
+
+
 class BacktestSimulator:
     """
     End-to-end backtest simulator:
     signal → position → execution → PnL
     """
 
-    def __init__(self, initial_cash=100000):
+    def __init__(self, initial_cash=100000, max_history=None):
+        """
+        Parameters:
+            initial_cash : starting cash
+            max_history  : trade records kept in history (None = all,
+                           0 = none); bounded runs use a deque
+        """
         self.initial_cash = initial_cash
         self.cash = initial_cash
         self.position = 0.0
         self.equity = initial_cash
-        self.history = []
+        self.history = [] if max_history is None else deque(maxlen=max_history)
 
     def execute_trade(self, qty, price):
         """
@@ -0,0 +1,158 @@
+# File: backtest/streaming.py
+import math
+from collections import deque
+
+from backtest.history import TickRing
+from backtest.loop import BacktestLoop
+from backtest.simulator import BacktestSimulator
+
+
+class EquityStats:
+    """
+    Online equity aggregates in constant memory.
+
+    Per-tick PnL mean and standard deviation use Welford's update, so a
+    run of any length is summarized without keeping its equity curve.
+    """
+
+    def __init__(self):
+        self.ticks = 0
+        self.trades = 0
+        self.initial_equity = None
+        self.equity = None
+        self.min_equity = math.inf
+        self.max_equity = -math.inf
+        self.peak = -math.inf
+        self.drawdown = 0.0
+        self.max_drawdown = 0.0
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def update(self, equity, traded=False):
+        """
+        Fold one tick into the aggregates.
+        """
+        if self.equity is None:
+            self.initial_equity = equity
+        else:
+            # Welford on the PnL of this tick
+            pnl = equity - self.equity
+            n = self.ticks
+            delta = pnl - self._mean
+            self._mean += delta / n
+            self._m2 += delta * (pnl - self._mean)
+        self.ticks += 1
+        self.equity = equity
+        if traded:
+            self.trades += 1
+
+        if equity < self.min_equity:
+            self.min_equity = equity
+        if equity > self.max_equity:
+            self.max_equity = equity
+        if equity > self.peak:
+            self.peak = equity
+        self.drawdown = (self.peak - equity) / max(self.peak, 1e-6)
+        if self.drawdown > self.max_drawdown:
+            self.max_drawdown = self.drawdown
+
+    def report(self):
+        """
+        Summary dict; PnL statistics are per tick.
+        """
+        n = self.ticks - 1
+        std = math.sqrt(self._m2 / (n - 1)) if n > 1 else 0.0
+        pnl = self.equity - self.initial_equity if self.ticks else 0.0
+        return {
+            "ticks": self.ticks,
+            "trades": self.trades,
+            "final_equity": self.equity,
+            "pnl": pnl,
+            "min_equity": self.min_equity if self.ticks else None,
+            "max_equity": self.max_equity if self.ticks else None,
+            "max_drawdown": self.max_drawdown,
+            "drawdown": self.drawdown,
+            "mean_tick_pnl": self._mean,
+            "std_tick_pnl": std,
+            "sharpe_per_tick": self._mean / std if std > 0 else 0.0,
+        }
+
+
+class StreamingBacktest:
+    """
+    BacktestLoop run in constant memory, for runs of unbounded length.
+
+    Nothing grows with the number of ticks: the latest ticks are kept in
+    a TickRing (optionally spilled to disk in chunks as it wraps),
+    equity statistics in EquityStats and per-regime attribution in the
+    loop's RegimePnLTracker, which are all fixed-size. The simulator's
+    trade history is switched to a bounded deque.
+    """
+
+    def __init__(self, loop=None, ring_capacity=65536, spill_dir=None, max_trade_history=0):
+        """
+        Parameters:
+            loop              : BacktestLoop (default: main.py's setup)
+            ring_capacity     : ticks kept in memory
+            spill_dir         : directory for TickRing chunks (None = no spill)
+            max_trade_history : simulator trade records kept
+        """
+        if loop is None:
+            loop = BacktestLoop(sim=BacktestSimulator(initial_cash=100000,
+                                                      max_history=max_trade_history))
+        elif not isinstance(loop.sim.history, deque):
+            loop.sim.history = deque(loop.sim.history, maxlen=max_trade_history)
+        self.loop = loop
+        self.ring = TickRing(ring_capacity, spill_dir)
+        self.stats = EquityStats()
+        self.killed = False
+
+    def step(self, bid, ask, bid_size, ask_size):
+        """
+        Run one tick through the loop and record it; returns the loop's
+        (mid, regime, features, equity, traded, alive).
+        """
+        result = self.loop.step(bid, ask, bid_size, ask_size)
+        mid, regime, features, equity, traded, alive = result
+        self.ring.append(self.stats.ticks, regime, mid, equity, traded, features.get("return", 0.0))
+        self.stats.update(equity, traded)
+        if not alive:
+            self.killed = True
+        return result
+
+    def run(self, ticks, max_ticks=None, stop_on_kill=True, progress=None):
+        """
+        Consume an iterable of (bid, ask, bid_size, ask_size) ticks.
+
+        Parameters:
+            ticks        : any iterable, including an endless generator
+            max_ticks    : stop after this many ticks (None = until exhausted)
+            stop_on_kill : stop when the drawdown kill switch trips
+            progress     : optional ProgressReporter
+
+        Returns:
+            report()
+        """
+        step = self.step
+        count = 0
+        for bid, ask, bid_size, ask_size in ticks:
+            if max_ticks is not None and count >= max_ticks:
+                break
+            alive = step(bid, ask, bid_size, ask_size)[-1]
+            count += 1
+            if progress is not None:
+                progress.update(equity=self.stats.equity)
+            if stop_on_kill and not alive:
+                break
+        return self.report()
+
+    def close(self):
+        """
+        Write ticks not yet spilled (no-op without spill_dir).
+        """
+        if self.ring.spill_dir is not None:
+            self.ring.spill()
+
+    def report(self):
+        return dict(self.stats.report(), killed=self.killed,
+                    attribution=self.loop.pnl_tracker.report())
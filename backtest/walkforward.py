@@ -0,0 +1,242 @@
+# File: backtest/walkforward.py
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from config.loader import RegimeParams
+from regime.states import regime_code
+from strategy.signal import DirectionalSignal
+from backtest.batch import BatchBacktest
+from backtest.features import classify_regimes
+from backtest.feature_cache import cached_features
+
+# Grid keys understood by evaluate():
+#   entropy_threshold, trend_factor   RegimeDetector thresholds
+#   detector_window                   RegimeDetector window (own feature set)
+#   gain.<REGIME>                     DirectionalSignal gain for one regime
+#   max_position                      PositionManager limit
+#   max_drawdown, max_exposure        RiskGovernor limits
+DETECTOR_DEFAULTS = {"entropy_threshold": 0.5, "trend_factor": 2.0, "detector_window": 100}
+
+
+def param_grid(grid):
+    """
+    Expand {name: [values]} into a list of parameter dicts.
+    """
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def walk_forward_folds(n_ticks, train, test, step=None, anchored=False, start=0):
+    """
+    Rolling (or anchored) train/test splits over [start, n_ticks).
+
+    Parameters:
+        train    : train fold length in ticks
+        test     : test fold length in ticks
+        step     : distance between fold starts (default test)
+        anchored : train folds always start at `start` and grow
+
+    Returns:
+        list of ((train_start, train_end), (test_start, test_end))
+    """
+    step = step or test
+    folds = []
+    begin = start
+    while begin + train + test <= n_ticks:
+        train_start = start if anchored else begin
+        folds.append(((train_start, begin + train), (begin + train, begin + train + test)))
+        begin += step
+    return folds
+
+
+def _signal_for(params, combo):
+    gains = {k: v for k, v in combo.items() if k.startswith("gain.")}
+    if not gains:
+        return None
+    p = params.copy()
+    for key, gain in gains.items():
+        p.signal_gain[regime_code(key.split(".", 1)[1])] = gain
+    return DirectionalSignal(p)
+
+
+def evaluate(features, combos, start, stop, params=None, seed=0, **backtest_kwargs):
+    """
+    Backtest every parameter combo on ticks [start, stop) in one batched
+    run (one path per combo, common execution noise).
+
+    Parameters:
+        features : {detector_window: compute_features() output}, covering
+                   the whole archive so folds reuse the same arrays
+        combos   : list of parameter dicts (see module keys)
+
+    Returns:
+        dict of per-combo arrays (see BatchBacktest.run)
+    """
+    params = params if params is not None else RegimeParams.from_config()
+    backtest = BatchBacktest(params, seed=seed, **backtest_kwargs)
+    sl = slice(start, stop)
+
+    regime_cache = {}
+    signal_cache = {}
+    targets = []
+    for combo in combos:
+        detector = {k: combo.get(k, v) for k, v in DETECTOR_DEFAULTS.items()}
+        key = tuple(sorted(detector.items()))
+        f = features[detector["detector_window"]]
+        if key not in regime_cache:
+            regime_cache[key] = classify_regimes(
+                f, detector["entropy_threshold"], detector["trend_factor"]
+            )[sl]
+        regimes = regime_cache[key]
+
+        gain_key = tuple(sorted((k, v) for k, v in combo.items() if k.startswith("gain.")))
+        if gain_key not in signal_cache:
+            signal_cache[gain_key] = _signal_for(params, combo)
+        targets.append((
+            regimes,
+            backtest.targets(f["return"][sl], regimes, signal_cache[gain_key],
+                             combo.get("max_position")),
+        ))
+
+    # Price and liquidity do not depend on the detector window
+    f = next(iter(features.values()))
+    return backtest.simulate(
+        f["mid"][sl],
+        f["liquidity"][sl],
+        np.stack([r for r, _ in targets]),
+        np.stack([t for _, t in targets]),
+        max_drawdown=[c.get("max_drawdown", backtest.max_drawdown) for c in combos],
+        max_exposure=[c.get("max_exposure", backtest.max_exposure) for c in combos],
+        common_noise=True,
+    )
+
+
+def score(results, objective="pnl"):
+    """
+    Per-combo score: "pnl", "pnl_per_drawdown" or callable(results).
+    """
+    if callable(objective):
+        return np.asarray(objective(results))
+    if objective == "pnl":
+        return results["pnl"]
+    if objective == "pnl_per_drawdown":
+        return results["pnl"] / np.maximum(results["max_drawdown"], 1e-6)
+    raise ValueError(f"Unknown objective: {objective}")
+
+
+# -------------------------
+# Workers
+# -------------------------
+_WORKER = {}
+
+
+def _init_worker(features, params, backtest_kwargs):
+    # Sent once per worker process, not once per fold
+    _WORKER.update(features=features, params=params, backtest_kwargs=backtest_kwargs)
+
+
+def _run_fold(index, fold, combos, objective, seed):
+    features = _WORKER["features"]
+    params = _WORKER["params"]
+    kwargs = _WORKER["backtest_kwargs"]
+    (train_start, train_end), (test_start, test_end) = fold
+
+    train = evaluate(features, combos, train_start, train_end, params, seed, **kwargs)
+    scores = score(train, objective)
+    best = int(np.argmax(scores))
+
+    test = evaluate(features, [combos[best]], test_start, test_end, params, seed + 1, **kwargs)
+    return {
+        "fold": index,
+        "train": (train_start, train_end),
+        "test": (test_start, test_end),
+        "params": combos[best],
+        "train_score": float(scores[best]),
+        "test_pnl": float(test["pnl"][0]),
+        "test_max_drawdown": float(test["max_drawdown"][0]),
+        "test_trades": int(test["trades"][0]),
+        "test_killed": bool(test["killed"][0]),
+    }
+
+
+class WalkForward:
+    """
+    Walk-forward optimization over a tick archive.
+
+    Engine features are computed once for the whole archive (once per
+    detector window in the grid) and shared by every fold and every
+    parameter combo; each train fold's grid search is one batched
+    BatchBacktest run, and folds run in parallel worker processes.
+    """
+
+    def __init__(self, bid, ask, grid, train, test, step=None, anchored=False,
+                 objective="pnl", params=None, workers=None, seed=0,
+                 feature_kwargs=None, feature_cache=None, **backtest_kwargs):
+        """
+        Parameters:
+            bid, ask       : 1-D tick archive
+            grid           : {param: [values]} (see module keys)
+            train, test    : fold lengths in ticks
+            step, anchored : see walk_forward_folds()
+            objective      : train-fold selection criterion (see score())
+            params         : RegimeParams (defaults to config/*.yaml)
+            workers        : worker processes (default os.cpu_count();
+                             1 runs folds in this process)
+            seed           : execution-noise seed
+            feature_kwargs : extra compute_features() arguments
+            feature_cache  : optional FeatureCache; features for an archive
+                             already seen are memory-mapped from disk
+            backtest_kwargs: BatchBacktest settings
+        """
+        self.combos = param_grid(grid)
+        self.folds = walk_forward_folds(len(bid), train, test, step, anchored)
+        self.objective = objective
+        self.params = params if params is not None else RegimeParams.from_config()
+        self.workers = workers or os.cpu_count() or 1
+        self.seed = seed
+        self.backtest_kwargs = backtest_kwargs
+
+        windows = sorted({c.get("detector_window", DETECTOR_DEFAULTS["detector_window"])
+                          for c in self.combos})
+        kwargs = dict(feature_kwargs or {})
+        kwargs.setdefault("liquidity_window", backtest_kwargs.get("liquidity_window", 50))
+        self.features = {
+            w: cached_features(feature_cache, bid, ask, detector_window=w, **kwargs)
+            for w in windows
+        }
+
+    def run(self):
+        """
+        Returns:
+            list of per-fold dicts: fold, train, test, params (best combo),
+            train_score, test_pnl, test_max_drawdown, test_trades, test_killed
+        """
+        init_args = (self.features, self.params, self.backtest_kwargs)
+        jobs = [(i, fold, self.combos, self.objective, self.seed)
+                for i, fold in enumerate(self.folds)]
+
+        if self.workers <= 1 or len(jobs) <= 1:
+            _init_worker(*init_args)
+            return [_run_fold(*job) for job in jobs]
+
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(jobs)),
+                                 initializer=_init_worker, initargs=init_args) as pool:
+            futures = [pool.submit(_run_fold, *job) for job in jobs]
+            return [f.result() for f in futures]
+
+    @staticmethod
+    def summary(results):
+        """
+        Out-of-sample totals across folds.
+        """
+        pnl = np.array([r["test_pnl"] for r in results])
+        return {
+            "folds": len(results),
+            "oos_pnl": float(pnl.sum()),
+            "oos_mean_pnl": float(pnl.mean()) if len(pnl) else 0.0,
+            "oos_hit_rate": float((pnl > 0).mean()) if len(pnl) else 0.0,
+            "worst_drawdown": max((r["test_max_drawdown"] for r in results), default=0.0),
+        }
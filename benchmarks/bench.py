@@ -0,0 +1,53 @@
+# File: benchmarks/bench.py
+"""
+Run the benchmark suite, record a baseline, or compare against it.
+
+    python benchmarks/bench.py run                  # run and print
+    python benchmarks/bench.py baseline             # run and store as baseline
+    python benchmarks/bench.py compare              # fail on regressions
+    python benchmarks/bench.py compare --threshold 5 --runslow
+
+Results are stored per machine under benchmarks/results/. compare checks
+the current run against the most recently stored result and exits
+non-zero if any benchmark's median got slower by more than --threshold
+percent.
+"""
+import argparse
+import os
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STORAGE = os.path.join(HERE, "results")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RAMME benchmark suite")
+    parser.add_argument("command", choices=["run", "baseline", "compare"])
+    parser.add_argument("--threshold", type=int, default=10,
+                        help="allowed median slowdown in percent (compare)")
+    parser.add_argument("--runslow", action="store_true",
+                        help="include the 10^5 / 10^6 tick end-to-end loops")
+    parser.add_argument("-k", default=None, help="pytest -k expression")
+    args = parser.parse_args(argv)
+
+    pytest_args = [HERE, "-q", f"--benchmark-storage=file://{STORAGE}"]
+    if args.runslow:
+        pytest_args.append("--runslow")
+    if args.k:
+        pytest_args += ["-k", args.k]
+
+    if args.command == "baseline":
+        pytest_args.append("--benchmark-save=baseline")
+    elif args.command == "compare":
+        pytest_args += [
+            "--benchmark-compare",
+            f"--benchmark-compare-fail=median:{args.threshold}%",
+        ]
+
+    return pytest.main(pytest_args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+# File: benchmarks/bench_bars.py
+"""
+Bar aggregation throughput over chunked ticks.
+"""
+import numpy as np
+import pytest
+
+from data.bars import BarAggregator
+
+CHUNK = 65536
+
+
+@pytest.fixture(scope="module")
+def ticks():
+    """
+    10^6 irregular ticks (exponential gaps, ~1 ms apart) with sparse prints.
+    """
+    rng = np.random.default_rng(0)
+    n = 1_000_000
+    ts = np.cumsum(rng.exponential(1e-3, n))
+    mid = 100.0 + np.cumsum(rng.normal(0.0, 0.01, n))
+    sizes = rng.integers(1, 100, n)
+    volume = rng.choice([0.0, 0.0, 0.0, 100.0, 500.0], n)
+    return ts, mid - 0.01, mid + 0.01, sizes, sizes, volume
+
+
+def _run(kind, size, ticks):
+    bars = BarAggregator(kind, size)
+    for i in range(0, len(ticks[0]), CHUNK):
+        bars.update(*(col[i:i + CHUNK] for col in ticks))
+    bars.flush()
+    return bars.bars
+
+
+@pytest.mark.parametrize("kind,size", [("time", 1.0), ("tick", 1000), ("volume", 50_000), ("dollar", 5e6)])
+def test_bars(benchmark, ticks, kind, size):
+    benchmark(_run, kind, size, ticks)
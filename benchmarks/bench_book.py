@@ -0,0 +1,37 @@
+# File: benchmarks/bench_book.py
+"""
+Message decoding and order book reconstruction throughput.
+"""
+import pytest
+
+from data.itch import decode, encode_messages, synthetic_messages
+from microstructure.book_builder import BookBuilder
+
+
+@pytest.fixture(scope="module")
+def archive():
+    """
+    ~225k framed ITCH-style messages (10^5 orders) as bytes.
+    """
+    return encode_messages(synthetic_messages(100_000, seed=0))
+
+
+@pytest.fixture(scope="module")
+def messages(archive):
+    cols, _ = decode(archive, 0, len(archive))
+    return cols
+
+
+def test_decode(benchmark, archive):
+    decode(archive, 0, len(archive))  # compile
+    benchmark(decode, archive, 0, len(archive))
+
+
+def test_book_build(benchmark, messages):
+    BookBuilder(interval_messages=100).apply(messages)  # compile
+    benchmark(lambda: BookBuilder(interval_messages=100).apply(messages))
+
+
+def test_book_build_clock_snapshots(benchmark, messages):
+    BookBuilder(interval_ns=10**6).apply(messages)
+    benchmark(lambda: BookBuilder(interval_ns=10**6).apply(messages))
@@ -0,0 +1,31 @@
+# File: benchmarks/bench_bootstrap.py
+"""
+Block-bootstrap resampling of per-regime PnL.
+"""
+import numpy as np
+import pytest
+
+from backtest.bootstrap import RegimeMoments, bootstrap_attribution, resample
+
+
+@pytest.fixture(scope="module")
+def run():
+    """
+    10^5 ticks in regime spells of ~50 ticks, with a random-walk equity.
+    """
+    rng = np.random.default_rng(0)
+    n = 100_000
+    codes = np.repeat(rng.integers(1, 6, n // 50), 50)
+    equity = 100_000 + np.cumsum(rng.normal(0.0, 0.01, n))
+    return codes, equity
+
+
+def test_resample(benchmark, run):
+    codes, equity = run
+    moments = RegimeMoments(codes, np.diff(equity, prepend=equity[0]))
+    benchmark(resample, moments, 1000)
+
+
+def test_bootstrap_attribution(benchmark, run):
+    codes, equity = run
+    benchmark(bootstrap_attribution, codes, equity, 1000)
@@ -0,0 +1,63 @@
+# File: benchmarks/bench_components.py
+"""
+Per-component hot-path benchmarks.
+"""
+import itertools
+
+from engine.engine import RAMMEEngine
+from regime.detector import RegimeDetector
+from regime.entropy import EntropyCalculator
+from microstructure.liquidity import LiquidityEstimator
+from microstructure.toxicity import ToxicityEstimator
+from execution.twap import TWAPExecutor
+from backtest.simulator import BacktestSimulator
+
+
+def test_engine_on_tick(benchmark, ticks):
+    engine = RAMMEEngine()
+    # Warm the windows so every call runs the full detector path
+    for tick in ticks[:200]:
+        engine.on_tick(*tick)
+    stream = itertools.cycle(ticks)
+    benchmark(lambda: engine.on_tick(*next(stream)))
+
+
+def test_regime_detect(benchmark, returns):
+    detector = RegimeDetector()
+    for r in returns:
+        detector.update(r)
+    benchmark(detector.detect)
+
+
+def test_shannon_entropy(benchmark, returns):
+    calc = EntropyCalculator()
+    benchmark(calc.shannon_entropy, returns)
+
+
+def test_rolling_entropy(benchmark, returns):
+    calc = EntropyCalculator()
+    benchmark(calc.rolling_entropy, returns)
+
+
+def test_liquidity_score(benchmark, ticks):
+    est = LiquidityEstimator()
+    for bid, ask, bid_size, ask_size in ticks[:50]:
+        est.update(ask - bid, bid_size, ask_size)
+    benchmark(est.liquidity_score)
+
+
+def test_toxicity_score(benchmark, returns):
+    est = ToxicityEstimator()
+    for r in returns[:20]:
+        est.update(r)
+    benchmark(est.toxicity_score)
+
+
+def test_twap_generate_orders(benchmark):
+    twap = TWAPExecutor(slices=5)
+    benchmark(twap.generate_orders, 10.0, 100.0, 1.0, 0.02)
+
+
+def test_backtest_step(benchmark):
+    sim = BacktestSimulator()
+    benchmark(sim.step, 0.1, 100.0, 0.8, 100.01)
@@ -0,0 +1,43 @@
+# File: benchmarks/bench_end_to_end.py
+"""
+End-to-end loops equivalent to main.py (without per-tick printing).
+"""
+import pytest
+
+from backtest.loop import BacktestLoop
+from backtest.shock import ShockGenerator
+
+
+def run_main_loop(n_ticks):
+    """
+    main.py's loop for n_ticks. The kill switch is evaluated but does not
+    stop the run, so every size does the same work per tick.
+    """
+    loop = BacktestLoop()
+    shock = ShockGenerator()
+    price = 100.0
+
+    for _ in range(n_ticks):
+        price = shock.apply(price)
+        bid = price - 0.1
+        ask = price + 0.1
+        bids = [(bid - 0.1, 10), (bid - 0.2, 8), (bid - 0.3, 6)]
+        asks = [(ask + 0.1, 9), (ask + 0.2, 7), (ask + 0.3, 5)]
+        loop.engine.orderbook.update(bids, asks)
+        loop.step(bid, ask, 10, 10)
+
+    return loop.pnl_tracker.report()
+
+
+def test_main_loop_1e4(benchmark):
+    benchmark.pedantic(run_main_loop, args=(10_000,), rounds=3, iterations=1)
+
+
+@pytest.mark.slow
+def test_main_loop_1e5(benchmark):
+    benchmark.pedantic(run_main_loop, args=(100_000,), rounds=1, iterations=1)
+
+
+@pytest.mark.slow
+def test_main_loop_1e6(benchmark):
+    benchmark.pedantic(run_main_loop, args=(1_000_000,), rounds=1, iterations=1)
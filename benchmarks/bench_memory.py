@@ -0,0 +1,84 @@
+# File: benchmarks/bench_memory.py
+"""
+Streaming mode memory: resident set size must stay flat however long the
+run, so it is sampled through the run and compared against a baseline
+taken after warm-up (engine windows full, ring wrapped once).
+
+The 10^7 tick check is a plain assertion, not a benchmark; it takes
+about 20 minutes and runs only when selected:
+
+    python -m pytest benchmarks/bench_memory.py -m memory
+"""
+import os
+import random
+
+import pytest
+
+from backtest.streaming import StreamingBacktest
+
+# Allowed RSS growth after warm-up; allocator noise is well below this,
+# a history leaking even one float per tick is far above it at 10^7 ticks
+MAX_GROWTH_MB = 8.0
+RING_CAPACITY = 65536
+
+pytestmark = pytest.mark.skipif(not os.path.exists("/proc/self/statm"),
+                                reason="reads RSS from /proc")
+
+
+def rss_mb():
+    with open("/proc/self/statm") as fh:
+        return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def shock_ticks():
+    """
+    main.py's market, endless. The walk is reflected above 10 so that
+    prices stay positive over 10^7 ticks.
+    """
+    price = 100.0
+    while True:
+        if random.random() < 0.2:
+            price += random.choice((-3.0, 3.0))
+            if price < 10.0:
+                price = 20.0 - price
+        yield price - 0.1, price + 0.1, 10, 10
+
+
+def run_streaming(n_ticks, spill_dir=None, samples=20):
+    """
+    Stream n_ticks and return (baseline_mb, peak_mb, report). The kill
+    switch does not stop the run, so every tick does the full work.
+    """
+    backtest = StreamingBacktest(ring_capacity=RING_CAPACITY, spill_dir=spill_dir)
+    source = shock_ticks()
+    warmup = min(2 * RING_CAPACITY, n_ticks // 2)
+    backtest.run(source, max_ticks=warmup, stop_on_kill=False)
+    baseline = peak = rss_mb()
+
+    block = (n_ticks - warmup) // samples
+    for _ in range(samples):
+        backtest.run(source, max_ticks=block, stop_on_kill=False)
+        peak = max(peak, rss_mb())
+    backtest.close()
+    return baseline, peak, backtest.report()
+
+
+def check_flat(result, n_ticks):
+    baseline, peak, report = result
+    assert report["ticks"] >= n_ticks - 20
+    assert peak - baseline < MAX_GROWTH_MB, f"RSS grew {peak - baseline:.1f} MB"
+
+
+def test_streaming_memory_1e5(benchmark):
+    result = benchmark.pedantic(run_streaming, args=(100_000,), rounds=1, iterations=1)
+    check_flat(result, 100_000)
+
+
+def test_streaming_spill_memory_1e5(benchmark, tmp_path):
+    result = benchmark.pedantic(run_streaming, args=(100_000, str(tmp_path)), rounds=1, iterations=1)
+    check_flat(result, 100_000)
+
+
+@pytest.mark.memory
+def test_streaming_memory_1e7():
+    check_flat(run_streaming(10_000_000), 10_000_000)
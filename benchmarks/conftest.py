@@ -0,0 +1,69 @@
+# File: benchmarks/conftest.py
+import os
+import random
+import sys
+
+import numpy as np
+import pytest
+
+# The project has no install step; make the top-level packages importable
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--runslow", action="store_true", default=False,
+        help="also run the 10^5 / 10^6 tick end-to-end benchmarks",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: long end-to-end benchmark")
+    config.addinivalue_line("markers", "memory: long RSS assertion, selected with -m memory")
+
+
+def pytest_collection_modifyitems(config, items):
+    runslow = config.getoption("--runslow")
+    # Memory checks run only when asked for by marker expression
+    memory = "memory" in (config.getoption("markexpr") or "")
+    skip_slow = pytest.mark.skip(reason="needs --runslow")
+    skip_memory = pytest.mark.skip(reason="select with -m memory")
+    for item in items:
+        if "memory" in item.keywords and not memory:
+            item.add_marker(skip_memory)
+        elif "slow" in item.keywords and not runslow:
+            item.add_marker(skip_slow)
+
+
+@pytest.fixture(autouse=True)
+def seeded():
+    """
+    Fix both global RNGs the components draw from.
+    """
+    random.seed(0)
+    np.random.seed(0)
+
+
+@pytest.fixture
+def ticks():
+    """
+    10k synthetic top-of-book ticks as (bid, ask, bid_size, ask_size) lists.
+    """
+    rng = np.random.default_rng(0)
+    mid = 100.0 + np.cumsum(rng.normal(0, 0.05, 10_000))
+    spread = rng.uniform(0.01, 0.05, 10_000)
+    bid = (mid - spread / 2).tolist()
+    ask = (mid + spread / 2).tolist()
+    bid_size = rng.poisson(10, 10_000).tolist()
+    ask_size = rng.poisson(10, 10_000).tolist()
+    return list(zip(bid, ask, bid_size, ask_size))
+
+
+@pytest.fixture
+def returns():
+    """
+    100 returns, the RegimeDetector window.
+    """
+    return np.random.default_rng(1).normal(0, 0.01, 100).tolist()
@@ -0,0 +1,184 @@
+# File: config/loader.py
+import os
+
+import numpy as np
+import yaml
+
+from regime.states import MarketRegime, NUM_REGIME_CODES
+
+CONFIG_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_config(name, config_dir=None):
+    """
+    Load one YAML config file as a dict.
+
+    Parameters:
+        name       : file stem, e.g. "regimes", "execution", "risk"
+        config_dir : directory holding the YAML files (defaults to config/)
+
+    Returns:
+        dict (empty if the file is missing or empty)
+    """
+    path = os.path.join(config_dir or CONFIG_DIR, f"{name}.yaml")
+    if not os.path.exists(path):
+        return {}
+    with open(path) as fh:
+        return yaml.safe_load(fh) or {}
+
+
+def regime_table(section, field, default, dtype=float):
+    """
+    Compile a per-regime config section into an array indexed by regime code.
+
+    Parameters:
+        section : {regime_name: {field: value}} or, if field is None,
+                  {regime_name: value}; "default" fills unlisted regimes
+        field   : key to read from each regime entry, or None
+        default : value used when neither the regime nor "default" sets it
+        dtype   : array dtype
+
+    Returns:
+        np.ndarray of length NUM_REGIME_CODES
+    """
+    section = section or {}
+
+    def _value(entry, fallback):
+        if field is None:
+            return fallback if entry is None else entry
+        if isinstance(entry, dict):
+            return entry.get(field, fallback)
+        return fallback
+
+    unknown = set(section) - {"default"} - {r.name for r in MarketRegime}
+    if unknown:
+        raise ValueError(f"Unknown regime(s) in config: {sorted(unknown)}")
+
+    base = _value(section.get("default"), default)
+    table = np.full(NUM_REGIME_CODES, base, dtype=dtype)
+    for regime in MarketRegime:
+        if regime.name in section:
+            table[regime.value] = _value(section[regime.name], base)
+    return table
+
+
+def transition_matrix(section, stay=0.995):
+    """
+    Compile the "transitions" config section into a Markov matrix over
+    regime codes (NUM_REGIME_CODES x NUM_REGIME_CODES).
+
+    Row/column 0 (unknown regime) is never entered; its row holds the
+    uniform distribution over MarketRegime, used as the initial state.
+
+    Parameters:
+        section : {"stay": p} and/or explicit rows {FROM: {TO: p}}
+        stay    : default self-transition probability
+    """
+    section = dict(section or {})
+    stay = float(section.pop("stay", stay))
+    unknown = set(section) - {r.name for r in MarketRegime}
+    if unknown:
+        raise ValueError(f"Unknown regime(s) in transitions: {sorted(unknown)}")
+
+    codes = [r.value for r in MarketRegime]
+    k = len(codes)
+    matrix = np.zeros((NUM_REGIME_CODES, NUM_REGIME_CODES))
+    matrix[0, codes] = 1.0 / k
+    for regime in MarketRegime:
+        row = matrix[regime.value]
+        if regime.name in section:
+            for target, p in section[regime.name].items():
+                row[MarketRegime[target].value] = p
+        else:
+            row[codes] = (1.0 - stay) / max(k - 1, 1)
+            row[regime.value] = stay if k > 1 else 1.0
+        total = row.sum()
+        if total <= 0:
+            raise ValueError(f"Transition row for {regime.name} is empty")
+        row /= total
+    return matrix
+
+
+class RegimeParams:
+    """
+    Regime-indexed parameter tables compiled from config/*.yaml.
+
+    Every table is a NumPy array of length NUM_REGIME_CODES, so a lookup is
+    table[code] for a single tick or table[codes] for an array of ticks.
+    """
+
+    def __init__(self, regimes=None, execution=None, risk=None):
+        """
+        Parameters:
+            regimes   : parsed regimes.yaml
+            execution : parsed execution.yaml
+            risk      : parsed risk.yaml
+        """
+        regimes = regimes or {}
+        execution = execution or {}
+        risk = risk or {}
+
+        # Signal
+        signal = regimes.get("signal")
+        self.signal_direction = regime_table(signal, "direction", 0, np.int8)
+        self.signal_gain = regime_table(signal, "gain", 0.0)
+        self.signal_vol_scaled = regime_table(signal, "vol_scaled", False, bool)
+
+        # Strategy morphing
+        morph = regimes.get("morph")
+        self.position_size = regime_table(morph, "position_size", 0.5)
+        self.stop_loss = regime_table(morph, "stop_loss", 1.0)
+
+        # Synthetic tick generation
+        simulation = regimes.get("simulation") or {}
+        sim_regimes = simulation.get("regimes")
+        self.sim_drift = regime_table(sim_regimes, "drift", 0.0)
+        self.sim_vol = regime_table(sim_regimes, "vol", 0.0005)
+        self.sim_mean_reversion = regime_table(sim_regimes, "mean_reversion", 0.0)
+        self.sim_jump_prob = regime_table(sim_regimes, "jump_prob", 0.0)
+        self.sim_jump_size = regime_table(sim_regimes, "jump_size", 0.0)
+        self.sim_mean_price = float(simulation.get("mean_price", 100.0))
+        self.sim_spread = tuple(simulation.get("spread", (0.01, 0.05)))
+        self.sim_size_lambda = float(simulation.get("size_lambda", 10))
+        self.transitions = transition_matrix(regimes.get("transitions"))
+
+        # Execution
+        slippage = execution.get("slippage") or {}
+        latency = execution.get("latency") or {}
+        self.slippage_multiplier = regime_table(
+            slippage.get("regime_multiplier"), None, 1.0
+        )
+        self.latency_multiplier = regime_table(
+            latency.get("regime_multiplier"), None, 1, np.int64
+        )
+        adaptive = execution.get("adaptive") or {}
+        self.execution_kappa = regime_table(adaptive.get("kappa"), None, 0.0)
+
+        # Risk
+        self.exposure_cap = regime_table(risk.get("regime_limits"), None, np.inf)
+
+    @classmethod
+    def from_config(cls, config_dir=None):
+        """
+        Build tables from the YAML files in config_dir.
+        """
+        return cls(
+            regimes=load_config("regimes", config_dir),
+            execution=load_config("execution", config_dir),
+            risk=load_config("risk", config_dir),
+        )
+
+    def tables(self):
+        """
+        All tables as a {name: array} dict.
+        """
+        return {k: v for k, v in vars(self).items() if isinstance(v, np.ndarray)}
+
+    def copy(self):
+        """
+        Deep copy, e.g. to perturb one table in a parameter sweep.
+        """
+        params = RegimeParams.__new__(RegimeParams)
+        for name, value in vars(self).items():
+            setattr(params, name, value.copy() if isinstance(value, np.ndarray) else value)
+        return params
@@ -0,0 +1,270 @@
+# File: data/bars.py
+import numpy as np
+
+# Bars from irregular top-of-book ticks, ahead of RAMMEEngine.
+#
+# Every kind of bar is a bucket on a monotone clock:
+#   time    tick timestamp                  (size in timestamp units)
+#   tick    tick count                      (size in ticks)
+#   volume  traded volume before the tick   (size in shares)
+#   dollar  traded value before the tick    (size in volume x mid)
+# and bar k holds the ticks whose clock lies in [k * size, (k + 1) * size).
+# Time bars are aligned to multiples of size and empty intervals produce
+# no bar. A volume or dollar bar closes on the tick that takes the running
+# total past its boundary, so bars average `size` (one large print can
+# overshoot several boundaries and still make a single bar).
+#
+# BarAggregator works a chunk of ticks at a time with grouped reductions;
+# the bar still open at the end of a chunk is carried as one row of
+# partial aggregates and merged into the next chunk's first bar.
+
+BAR_KINDS = ("time", "tick", "volume", "dollar")
+
+# Aggregate -> how bars and partial bars combine
+_REDUCE = {
+    "first_ts": "first",
+    "last_ts": "last",
+    "ticks": "sum",
+    "open": "first",
+    "high": "max",
+    "low": "min",
+    "close": "last",
+    "bid": "last",
+    "ask": "last",
+    "bid_size": "sum",
+    "ask_size": "sum",
+    "volume": "sum",
+    "dollar": "sum",
+    "mid_volume": "sum",
+    "mid_sum": "sum",
+    "spread_sum": "sum",
+    "spread_min": "min",
+    "spread_max": "max",
+}
+
+# Columns of the bars returned by update(), flush() and aggregate()
+BAR_COLUMNS = (
+    "first_ts", "last_ts", "ticks", "open", "high", "low", "close", "vwap",
+    "volume", "dollar", "bid", "ask", "bid_size", "ask_size",
+    "spread_mean", "spread_min", "spread_max",
+)
+
+
+class BarAggregator:
+    """
+    Streaming reducer from ticks to time, tick, volume or dollar bars.
+
+    Feed chunks of tick arrays to update(); it returns the bars completed
+    by the chunk as a dict of column arrays (BAR_COLUMNS). flush() closes
+    the open bar, e.g. at the end of the feed. Prices are mids: OHLC, a
+    volume-weighted mid (the mean mid for bars without volume) and the
+    closing bid/ask; sizes are summed and spreads summarized per bar.
+    """
+
+    def __init__(self, kind="time", size=1.0):
+        """
+        Parameters:
+            kind : one of BAR_KINDS
+            size : bar size on the kind's clock (see module comment)
+        """
+        if kind not in BAR_KINDS:
+            raise ValueError(f"Unknown bar kind: {kind!r} (expected one of {BAR_KINDS})")
+        if not size > 0:
+            raise ValueError("bar size must be positive")
+        if kind == "tick" and int(size) != size:
+            raise ValueError("tick bar size must be a whole number of ticks")
+        self.kind = kind
+        self.size = size
+        self.ticks = 0      # ticks seen
+        self.bars = 0       # bars emitted
+        self._clock = 0.0   # running volume or dollar total
+        self._open = None   # partial aggregates of the open bar
+        self._open_key = None
+
+    @property
+    def pending(self):
+        """
+        Ticks in the open bar.
+        """
+        return int(self._open["ticks"][0]) if self._open is not None else 0
+
+    def _keys(self, ts, volume, dollar):
+        # Bar key of each tick, and whether the chunk's last tick closes its bar
+        n = len(ts)
+        if self.kind == "time":
+            ts = np.asarray(ts)
+            if ts.dtype.kind in "iu" and float(self.size).is_integer():
+                # Integer clocks (e.g. epoch nanoseconds) stay exact
+                return ts.astype(np.int64) // int(self.size), False
+            return np.floor(ts / self.size).astype(np.int64), False
+        if self.kind == "tick":
+            keys = (self.ticks + np.arange(n, dtype=np.int64)) // int(self.size)
+            return keys, (self.ticks + n) % int(self.size) == 0
+        flow = volume if self.kind == "volume" else dollar
+        after = self._clock + np.cumsum(flow)
+        before = np.empty(n)
+        before[0] = self._clock
+        before[1:] = after[:-1]
+        keys = np.floor(before / self.size).astype(np.int64)
+        self._clock = float(after[-1])
+        return keys, np.floor(after[-1] / self.size) > keys[-1]
+
+    def update(self, ts, bid, ask, bid_size, ask_size, volume=None):
+        """
+        Add a chunk of ticks.
+
+        Parameters:
+            ts                : timestamps, non-decreasing
+            bid, ask          : best quotes
+            bid_size, ask_size: quoted sizes
+            volume            : traded volume per tick (needed for volume
+                                and dollar bars; None = quotes only)
+
+        Returns:
+            dict of BAR_COLUMNS arrays for the bars completed so far
+        """
+        bid = np.asarray(bid, dtype=float)
+        ask = np.asarray(ask, dtype=float)
+        n = len(bid)
+        if volume is None:
+            if self.kind in ("volume", "dollar"):
+                raise ValueError(f"{self.kind} bars need traded volume per tick")
+            volume = np.zeros(n)
+        if n == 0:
+            return _finish(_empty())
+        volume = np.asarray(volume, dtype=float)
+
+        mid = (bid + ask) / 2
+        spread = ask - bid
+        dollar = volume * mid
+        keys, last_closed = self._keys(ts, volume, dollar)
+        if np.any(keys[1:] < keys[:-1]) or (self._open is not None and keys[0] < self._open_key):
+            raise ValueError("ticks must be in clock order (non-decreasing timestamps)")
+        self.ticks += n
+
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        ends = np.r_[starts[1:], n]
+        ts = np.asarray(ts)
+        bars = _reduce({
+            "first_ts": ts, "last_ts": ts, "ticks": np.ones(n, dtype=np.int64),
+            "open": mid, "high": mid, "low": mid, "close": mid,
+            "bid": bid, "ask": ask,
+            "bid_size": np.asarray(bid_size, dtype=np.int64),
+            "ask_size": np.asarray(ask_size, dtype=np.int64),
+            "volume": volume, "dollar": dollar, "mid_volume": mid * volume, "mid_sum": mid,
+            "spread_sum": spread, "spread_min": spread, "spread_max": spread,
+        }, starts, ends)
+
+        # The carried bar either continues into this chunk or was complete
+        if self._open is not None:
+            if keys[0] == self._open_key:
+                bars = _concat([_merge(self._open, _rows(bars, 0, 1)), _rows(bars, 1, None)])
+            else:
+                bars = _concat([self._open, bars])
+        self._open = None
+        if not last_closed:
+            self._open = _rows(bars, -1, None)
+            self._open_key = keys[-1]
+            bars = _rows(bars, 0, -1)
+        self.bars += len(bars["ticks"])
+        return _finish(bars)
+
+    def flush(self):
+        """
+        Close the open bar.
+
+        Returns:
+            dict of BAR_COLUMNS arrays with zero or one bar
+        """
+        bars = self._open if self._open is not None else _empty()
+        self._open = None
+        self.bars += len(bars["ticks"])
+        return _finish(bars)
+
+
+def aggregate(ts, bid, ask, bid_size, ask_size, volume=None, kind="time", size=1.0):
+    """
+    Bars over whole tick arrays, the last (possibly partial) bar included.
+    """
+    bars = BarAggregator(kind, size)
+    return concat_bars([bars.update(ts, bid, ask, bid_size, ask_size, volume), bars.flush()])
+
+
+def concat_bars(parts):
+    """
+    Concatenate bar dicts returned by update()/flush().
+    """
+    return {name: np.concatenate([p[name] for p in parts]) for name in BAR_COLUMNS}
+
+
+def bar_ticks(bars):
+    """
+    Bars as engine ticks (bid, ask, bid_size, ask_size): the closing
+    quotes with the bar's summed sizes, as TickConflator feeds buckets, so
+    the engine's price return is the net move over each bar.
+    """
+    return zip(bars["bid"].tolist(), bars["ask"].tolist(),
+               bars["bid_size"].tolist(), bars["ask_size"].tolist())
+
+
+# -------------------------
+# Aggregate helpers
+# -------------------------
+def _reduce(cols, starts, ends):
+    out = {}
+    for name, how in _REDUCE.items():
+        col = cols[name]
+        if how == "first":
+            out[name] = col[starts]
+        elif how == "last":
+            out[name] = col[ends - 1]
+        elif how == "sum":
+            out[name] = np.add.reduceat(col, starts)
+        elif how == "max":
+            out[name] = np.maximum.reduceat(col, starts)
+        else:
+            out[name] = np.minimum.reduceat(col, starts)
+    return out
+
+
+def _merge(a, b):
+    # One-row aggregates of consecutive pieces of the same bar
+    out = {}
+    for name, how in _REDUCE.items():
+        if how == "first":
+            out[name] = a[name]
+        elif how == "last":
+            out[name] = b[name]
+        elif how == "sum":
+            out[name] = a[name] + b[name]
+        elif how == "max":
+            out[name] = np.maximum(a[name], b[name])
+        else:
+            out[name] = np.minimum(a[name], b[name])
+    return out
+
+
+def _rows(aggs, start, stop):
+    return {name: col[start:stop] for name, col in aggs.items()}
+
+
+def _concat(parts):
+    return {name: np.concatenate([p[name] for p in parts]) for name in _REDUCE}
+
+
+def _empty():
+    ints = ("first_ts", "last_ts", "ticks", "bid_size", "ask_size")
+    return {name: np.zeros(0, dtype=np.int64 if name in ints else float) for name in _REDUCE}
+
+
+def _finish(aggs):
+    ticks = aggs["ticks"]
+    volume = aggs["volume"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_mid = aggs["mid_sum"] / ticks
+        vwap = np.where(volume > 0, aggs["mid_volume"] / volume, mean_mid)
+        spread_mean = aggs["spread_sum"] / ticks
+    out = {name: aggs[name] for name in BAR_COLUMNS if name in aggs}
+    out["vwap"] = vwap
+    out["spread_mean"] = spread_mean
+    return {name: out[name] for name in BAR_COLUMNS}
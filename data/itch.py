@@ -0,0 +1,343 @@
+# File: data/itch.py
+import numpy as np
+
+from engine.jit import njit
+
+
+# Subset of NASDAQ TotalView-ITCH 5.0 as stored in exchange archives: every
+# message is prefixed by a 2-byte big-endian length, then
+#   type (1) stock_locate (2) tracking (2) timestamp (6, ns since midnight)
+# and the type-specific body below. Prices are integers in 1/10000 units.
+# Messages of other types are skipped by the decoder.
+ADD = ord("A")              # ref 8, side 1 ('B'/'S'), shares 4, stock 8, price 4
+ADD_MPID = ord("F")         # as ADD, plus attribution 4
+EXECUTE = ord("E")          # ref 8, shares 4, match 8
+EXECUTE_PRICE = ord("C")    # ref 8, shares 4, match 8, printable 1, price 4
+CANCEL = ord("X")           # ref 8, shares 4
+DELETE = ord("D")           # ref 8
+REPLACE = ord("U")          # ref 8, new ref 8, shares 4, price 4
+STOCK_DIRECTORY = ord("R")  # stock 8, ...
+
+MESSAGE_LENGTHS = {
+    ADD: 36, ADD_MPID: 40, EXECUTE: 31, EXECUTE_PRICE: 36,
+    CANCEL: 23, DELETE: 19, REPLACE: 35, STOCK_DIRECTORY: 39,
+}
+
+PRICE_SCALE = 10000
+
+# Decoded messages are columns; fields a message type lacks are 0
+MESSAGE_COLUMNS = (
+    ("kind", np.uint8),
+    ("locate", np.int32),
+    ("ts", np.int64),
+    ("ref", np.int64),
+    ("new_ref", np.int64),
+    ("side", np.int8),      # +1 buy, -1 sell (adds only)
+    ("shares", np.int64),
+    ("price", np.int64),
+    ("stock", np.int64),    # symbol packed by symbol_code()
+)
+
+
+def symbol_code(symbol):
+    """
+    8-character space-padded ITCH symbol as the integer in the stock column.
+    """
+    return int.from_bytes(symbol.encode("ascii").ljust(8)[:8], "big")
+
+
+# -------------------------
+# Decoding
+# -------------------------
+@njit(cache=True)
+def _be(buf, at, n):
+    v = 0
+    for i in range(n):
+        v = (v << 8) | int(buf[at + i])
+    return v
+
+
+@njit(cache=True)
+def _decode(buf, pos, end, kind, locate, ts, ref, new_ref, side, shares, price, stock):
+    """
+    Decode framed messages from buf[pos:end] into the output columns until
+    they are full or the next message is incomplete.
+
+    Returns:
+        (messages decoded, position after the last consumed message)
+    """
+    cap = kind.shape[0]
+    n = 0
+    while n < cap and pos + 2 <= end:
+        length = (int(buf[pos]) << 8) | int(buf[pos + 1])
+        if pos + 2 + length > end:
+            break
+        m = pos + 2
+        t = buf[m]
+        pos += 2 + length
+        if t == ADD or t == ADD_MPID:
+            ref[n] = _be(buf, m + 11, 8)
+            new_ref[n] = 0
+            side[n] = 1 if buf[m + 19] == 66 else -1
+            shares[n] = _be(buf, m + 20, 4)
+            stock[n] = _be(buf, m + 24, 8)
+            price[n] = _be(buf, m + 32, 4)
+        elif t == EXECUTE or t == CANCEL:
+            ref[n] = _be(buf, m + 11, 8)
+            new_ref[n] = 0
+            side[n] = 0
+            shares[n] = _be(buf, m + 19, 4)
+            stock[n] = 0
+            price[n] = 0
+        elif t == EXECUTE_PRICE:
+            ref[n] = _be(buf, m + 11, 8)
+            new_ref[n] = 0
+            side[n] = 0
+            shares[n] = _be(buf, m + 19, 4)
+            stock[n] = 0
+            price[n] = _be(buf, m + 32, 4)
+        elif t == DELETE:
+            ref[n] = _be(buf, m + 11, 8)
+            new_ref[n] = 0
+            side[n] = 0
+            shares[n] = 0
+            stock[n] = 0
+            price[n] = 0
+        elif t == REPLACE:
+            ref[n] = _be(buf, m + 11, 8)
+            new_ref[n] = _be(buf, m + 19, 8)
+            side[n] = 0
+            shares[n] = _be(buf, m + 27, 4)
+            stock[n] = 0
+            price[n] = _be(buf, m + 31, 4)
+        elif t == STOCK_DIRECTORY:
+            ref[n] = 0
+            new_ref[n] = 0
+            side[n] = 0
+            shares[n] = 0
+            stock[n] = _be(buf, m + 11, 8)
+            price[n] = 0
+        else:
+            continue
+        kind[n] = t
+        locate[n] = _be(buf, m + 1, 2)
+        ts[n] = _be(buf, m + 5, 6)
+        n += 1
+    return n, pos
+
+
+def decode(buf, start=0, max_messages=1 << 20):
+    """
+    Decode up to max_messages messages from a byte buffer.
+
+    Parameters:
+        buf          : bytes, bytearray, memoryview or uint8 array (e.g. a
+                       np.memmap of an archive)
+        start        : byte offset of the first message
+        max_messages : output capacity
+
+    Returns:
+        (columns dict (see MESSAGE_COLUMNS), offset after the last decoded
+        message); a truncated trailing message is left unconsumed
+    """
+    if not isinstance(buf, np.ndarray):
+        buf = np.frombuffer(buf, dtype=np.uint8)
+    cols = {name: np.empty(max_messages, dtype=dtype) for name, dtype in MESSAGE_COLUMNS}
+    n, pos = _decode(buf, start, len(buf), *(cols[name] for name, _ in MESSAGE_COLUMNS))
+    return {name: col[:n] for name, col in cols.items()}, pos
+
+
+def iter_messages(path, chunk_messages=1 << 20):
+    """
+    Decode an archive file in chunks of up to chunk_messages messages,
+    reading it through a memory map.
+    """
+    buf = np.memmap(path, dtype=np.uint8, mode="r")
+    pos = 0
+    while pos < len(buf):
+        cols, pos_next = decode(buf, pos, chunk_messages)
+        if pos_next == pos:
+            break
+        pos = pos_next
+        if len(cols["kind"]):
+            yield cols
+
+
+def find_locate(path, symbol):
+    """
+    Stock locate code of symbol from the archive's stock directory
+    messages (None if it has none for that symbol).
+    """
+    code = symbol_code(symbol)
+    for cols in iter_messages(path):
+        hit = np.flatnonzero((cols["kind"] == STOCK_DIRECTORY) & (cols["stock"] == code))
+        if len(hit):
+            return int(cols["locate"][hit[0]])
+    return None
+
+
+# -------------------------
+# Encoding
+# -------------------------
+def _put(buf, at, values, nbytes):
+    """
+    Scatter big-endian nbytes-wide integers into buf at offsets at.
+    """
+    raw = np.asarray(values, dtype=">u8").view(np.uint8).reshape(-1, 8)[:, 8 - nbytes:]
+    buf[at[:, None] + np.arange(nbytes)] = raw
+
+
+def encode_messages(cols):
+    """
+    Encode message columns (as returned by decode()) into framed bytes.
+    Tracking numbers and match numbers are written as 0.
+    """
+    kind = np.asarray(cols["kind"], dtype=np.uint8)
+    n = len(kind)
+    lengths = np.zeros(n, dtype=np.int64)
+    for t, length in MESSAGE_LENGTHS.items():
+        lengths[kind == t] = length
+    if (lengths == 0).any():
+        raise ValueError("unsupported message type in columns")
+    starts = np.zeros(n, dtype=np.int64)
+    np.cumsum(lengths[:-1] + 2, out=starts[1:])
+    buf = np.zeros(int(starts[-1] + lengths[-1] + 2) if n else 0, dtype=np.uint8)
+    if not n:
+        return buf.tobytes()
+
+    m = starts + 2
+    _put(buf, starts, lengths, 2)
+    buf[m] = kind
+    _put(buf, m + 1, cols["locate"], 2)
+    _put(buf, m + 5, cols["ts"], 6)
+
+    def fields(types, *spec):
+        sel = np.isin(kind, types)
+        at = m[sel]
+        for name, offset, nbytes in spec:
+            _put(buf, at + offset, np.asarray(cols[name])[sel], nbytes)
+        return sel, at
+
+    sel, at = fields((ADD, ADD_MPID), ("ref", 11, 8), ("shares", 20, 4),
+                     ("stock", 24, 8), ("price", 32, 4))
+    buf[at + 19] = np.where(np.asarray(cols["side"])[sel] > 0, ord("B"), ord("S"))
+    fields((EXECUTE, EXECUTE_PRICE, CANCEL), ("ref", 11, 8), ("shares", 19, 4))
+    sel, at = fields((EXECUTE_PRICE,), ("price", 32, 4))
+    buf[at + 31] = ord("Y")
+    fields((DELETE,), ("ref", 11, 8))
+    fields((REPLACE,), ("ref", 11, 8), ("new_ref", 19, 8), ("shares", 27, 4), ("price", 31, 4))
+    fields((STOCK_DIRECTORY,), ("stock", 11, 8))
+    return buf.tobytes()
+
+
+def write_itch(path, cols):
+    with open(path, "wb") as fh:
+        fh.write(encode_messages(cols))
+
+
+@njit(cache=True)
+def _first_cross(mid, side, price, first, last):
+    # First order j in [first, last) arriving with the mid at or through
+    # the resting price (below a bid, above an ask), or -1
+    out = np.full(len(price), -1, dtype=np.int64)
+    for i in range(len(price)):
+        for j in range(first[i], last[i]):
+            if (mid[j] - price[i]) * side[i] <= 0:
+                out[i] = j
+                break
+    return out
+
+
+def synthetic_messages(n_orders, seed=None, symbol="RAMME", locate=1, start_price=100.0,
+                       tick=0.01, rate=10_000, mean_life_ms=20.0):
+    """
+    Synthetic order flow for one stock, as message columns.
+
+    Orders arrive at `rate` per second around a random-walk mid, a few
+    ticks from it on their own side, and each ends after an exponential
+    lifetime by delete (55%), full execution (20%), partial cancel then
+    delete (10%) or replace (15%, the replacement is later deleted).
+    An order the mid walks through first is fully executed just before
+    the next arrival, so the book never crosses or locks.
+    Starts with a stock directory message.
+    """
+    rng = np.random.default_rng(seed)
+    scale = PRICE_SCALE
+    tick_units = int(round(tick * scale))
+    start = 34_200 * 10**9  # 09:30
+
+    # Strictly increasing, so an order can end between two arrivals
+    add_ts = start + np.cumsum(np.maximum(rng.exponential(1e9 / rate, n_orders), 1).astype(np.int64))
+    mid = int(round(start_price * scale)) + tick_units * np.cumsum(
+        rng.choice((-1, 0, 0, 0, 1), n_orders))
+    side = np.where(rng.random(n_orders) < 0.5, 1, -1).astype(np.int8)
+    offset = tick_units * rng.geometric(0.3, n_orders)
+    price = np.maximum(mid - side * offset, tick_units)
+    shares = 100 * rng.integers(1, 11, n_orders)
+    life = np.maximum(rng.exponential(mean_life_ms * 1e6, n_orders), 1).astype(np.int64)
+    end_ts = add_ts + life
+    refs = np.arange(1, n_orders + 1, dtype=np.int64)
+
+    u = rng.random(n_orders)
+    deleted = u < 0.55
+    executed = (u >= 0.55) & (u < 0.75)
+    partial = (u >= 0.75) & (u < 0.85)
+    replaced = u >= 0.85
+
+    # Scan each order's arrivals from the next one (refs[i] = i + 1) up to
+    # its end; adds sort first at equal timestamps, so an arrival at the
+    # end still meets the order
+    crossed_by = _first_cross(mid, side, price, refs,
+                              np.searchsorted(add_ts, end_ts, side="right"))
+    crossed = crossed_by >= 0
+    end_ts[crossed] = add_ts[crossed_by[crossed]] - 1
+    executed |= crossed
+    deleted &= ~crossed
+    partial &= ~crossed
+    replaced &= ~crossed
+
+    new_refs = n_orders + 1 + np.arange(replaced.sum(), dtype=np.int64)
+    new_side = side[replaced]
+    new_price = np.maximum(price[replaced] - new_side * tick_units, tick_units)
+    new_end = end_ts[replaced] + np.maximum(
+        rng.exponential(mean_life_ms * 1e6, replaced.sum()), 1).astype(np.int64)
+    new_by = _first_cross(mid, new_side, new_price,
+                          np.searchsorted(add_ts, end_ts[replaced], side="right"),
+                          np.searchsorted(add_ts, new_end, side="right"))
+    new_crossed = new_by >= 0
+    new_end[new_crossed] = add_ts[new_by[new_crossed]] - 1
+
+    parts = [
+        # kind, ts, ref, new_ref, side, shares, price
+        (ADD, add_ts, refs, 0, side, shares, price),
+        (DELETE, end_ts[deleted | partial], refs[deleted | partial], 0, 0, 0, 0),
+        (EXECUTE, end_ts[executed], refs[executed], 0, 0, shares[executed], 0),
+        (CANCEL, add_ts[partial] + life[partial] // 2, refs[partial], 0, 0, shares[partial] // 2, 0),
+        (REPLACE, end_ts[replaced], refs[replaced], new_refs, 0, shares[replaced], new_price),
+        (DELETE, new_end[~new_crossed], new_refs[~new_crossed], 0, 0, 0, 0),
+        (EXECUTE, new_end[new_crossed], new_refs[new_crossed], 0, 0,
+         shares[replaced][new_crossed], 0),
+    ]
+    columns = {name: [] for name, _ in MESSAGE_COLUMNS}
+    for kind, ts, ref, new_ref, sides, qty, px in parts:
+        k = len(ts)
+        columns["kind"].append(np.full(k, kind, dtype=np.uint8))
+        columns["ts"].append(ts)
+        for name, value in (("ref", ref), ("new_ref", new_ref), ("side", sides),
+                            ("shares", qty), ("price", px)):
+            columns[name].append(np.broadcast_to(value, k))
+    out = {name: np.concatenate(columns[name]).astype(dtype)
+           for name, dtype in MESSAGE_COLUMNS if columns[name]}
+    order = np.argsort(out["ts"], kind="stable")
+    out = {name: col[order] for name, col in out.items()}
+
+    n = len(out["ts"]) + 1
+    result = {name: np.zeros(n, dtype=dtype) for name, dtype in MESSAGE_COLUMNS}
+    for name, col in out.items():
+        result[name][1:] = col
+    result["kind"][0] = STOCK_DIRECTORY
+    result["ts"][0] = start
+    result["stock"][0] = symbol_code(symbol)
+    result["stock"][1:][result["kind"][1:] == ADD] = symbol_code(symbol)
+    result["locate"][:] = locate
+    return result
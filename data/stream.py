@@ -0,0 +1,389 @@
+# File: data/stream.py
+import asyncio
+import time
+
+from engine.conflation import TickConflator
+
+# Wire format shared by the replay file and the localhost socket stand-in:
+# one CSV line per top-of-book update, "ts,bid,ask,bid_size,ask_size"
+
+
+def encode_tick(ts, bid, ask, bid_size, ask_size):
+    return f"{ts:.6f},{bid!r},{ask!r},{bid_size},{ask_size}\n".encode()
+
+
+def write_replay(path, ticks):
+    """
+    Write (ts, bid, ask, bid_size, ask_size) tuples as a replay file.
+    """
+    with open(path, "wb") as fh:
+        for tick in ticks:
+            fh.write(encode_tick(*tick))
+
+
+# -------------------------
+# Feed adapters
+# -------------------------
+class FeedAdapter:
+    """
+    Interface between a market data source and StreamingPipeline.
+
+    Subclasses implement read(), returning one raw message (bytes) or None
+    once the feed is exhausted, and may override decode() for their own
+    wire format. connect()/close() are called once around the session.
+    """
+
+    async def connect(self):
+        pass
+
+    async def read(self):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+    def decode(self, raw):
+        """
+        Raw message → (ts, bid, ask, bid_size, ask_size), or None to skip.
+        """
+        fields = raw.split(b",")
+        if len(fields) != 5 or raw.startswith(b"#"):
+            return None
+        return (float(fields[0]), float(fields[1]), float(fields[2]),
+                int(fields[3]), int(fields[4]))
+
+
+class ReplayFeedAdapter(FeedAdapter):
+    """
+    Replays a recorded file.
+
+    Parameters:
+        path  : replay file (see write_replay)
+        speed : None replays as fast as the pipeline accepts; otherwise the
+                recorded timestamps are honoured, scaled by 1/speed
+    """
+
+    def __init__(self, path, speed=None):
+        self.path = path
+        self.speed = speed
+        self._fh = None
+        self._t0 = None
+        self._ts0 = None
+
+    async def connect(self):
+        self._fh = open(self.path, "rb")
+
+    async def read(self):
+        line = self._fh.readline()
+        if not line:
+            return None
+        if self.speed:
+            ts = float(line.split(b",", 1)[0])
+            now = time.perf_counter()
+            if self._t0 is None:
+                self._t0, self._ts0 = now, ts
+            delay = (ts - self._ts0) / self.speed - (now - self._t0)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        return line
+
+    async def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
+class SocketFeedAdapter(FeedAdapter):
+    """
+    Line-oriented TCP feed (e.g. ReplayServer on localhost).
+    """
+
+    def __init__(self, host="127.0.0.1", port=9009):
+        self.host = host
+        self.port = port
+        self._reader = None
+        self._writer = None
+
+    async def connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+
+    async def read(self):
+        line = await self._reader.readline()
+        return line or None
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except ConnectionError:
+                pass
+            self._writer = None
+
+
+class ReplayServer:
+    """
+    Localhost stand-in for a live feed: streams a replay file to every
+    client that connects. Writes await drain(), so a slow client pushes
+    back on the server instead of buffering unboundedly.
+    """
+
+    def __init__(self, path, host="127.0.0.1", port=9009, speed=None):
+        self.path = path
+        self.host = host
+        self.port = port
+        self.speed = speed
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        # Port 0 picks a free port; expose the real one
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _serve(self, reader, writer):
+        replay = ReplayFeedAdapter(self.path, speed=self.speed)
+        await replay.connect()
+        try:
+            while True:
+                line = await replay.read()
+                if line is None:
+                    break
+                writer.write(line)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            await replay.close()
+            writer.close()
+
+
+# -------------------------
+# Pipeline
+# -------------------------
+_END = object()
+
+
+class StreamingPipeline:
+    """
+    Asyncio pipeline: feed adapter → decoder → compute.
+
+    The stages are connected by bounded queues. When compute falls behind
+    the queues fill up and the reader stops pulling from the adapter, so
+    backpressure reaches the socket instead of growing memory. The decoder
+    drains up to batch_size raw messages at a time and hands whole batches
+    to the compute stage, which calls handler(bid, ask, bid_size, ask_size)
+    per tick, typically RAMMEEngine.on_tick_code or BacktestLoop.step.
+
+    With coalesce=True, a batch decoded while the raw queue is at least
+    coalesce_depth deep is collapsed to its newest update: top-of-book
+    updates supersede each other, so under overload the stale ones are
+    dropped (and counted in stats["coalesced"]).
+
+    With conflate_updates and/or conflate_interval, updates are merged by
+    a TickConflator instead: every bucket reaches the handler once as
+    (last bid, last ask, summed sizes), so nothing is dropped
+    (stats["conflated"] counts the merged updates). conflate_interval is
+    in feed timestamp units; a bucket left open for that many wall-clock
+    seconds without a new update is flushed by a timer, and the last one
+    at the end of the feed.
+    """
+
+    def __init__(self,
+                 adapter,
+                 handler,
+                 on_result=None,
+                 queue_size=1024,
+                 batch_size=64,
+                 coalesce=False,
+                 coalesce_depth=None,
+                 conflate_updates=None,
+                 conflate_interval=None,
+                 threaded=False):
+        """
+        Parameters:
+            adapter        : FeedAdapter
+            handler        : callable(bid, ask, bid_size, ask_size)
+            on_result      : optional callable(tick, result); returning
+                             False stops the pipeline (e.g. kill switch)
+            queue_size     : capacity of the raw message queue; the batch
+                             queue holds queue_size // batch_size batches
+            batch_size     : max messages decoded and computed per batch
+            coalesce       : drop stale top-of-book updates under overload
+            coalesce_depth : raw queue depth that counts as overload
+                             (default batch_size)
+            conflate_updates  : merge up to this many updates per handler
+                                call (TickConflator max_updates)
+            conflate_interval : close buckets after this long
+                                (TickConflator max_interval)
+            threaded       : run compute batches in a worker thread so the
+                             event loop keeps servicing feed I/O meanwhile
+        """
+        self.adapter = adapter
+        self.handler = handler
+        self.on_result = on_result
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.coalesce = coalesce
+        self.coalesce_depth = coalesce_depth if coalesce_depth is not None else batch_size
+        self.threaded = threaded
+        self.conflator = None
+        if conflate_updates is not None or conflate_interval is not None:
+            if coalesce:
+                raise ValueError("coalesce and conflation are alternatives; pick one")
+            self.conflator = TickConflator(handler, conflate_updates, conflate_interval)
+        self.conflate_interval = conflate_interval
+        self._bucket_opened = None
+        self._last_tick = None
+        self.stats = {
+            "received": 0,
+            "decoded": 0,
+            "coalesced": 0,
+            "conflated": 0,
+            "processed": 0,
+            "batches": 0,
+            "max_queue_depth": 0,
+        }
+        self._stopped = False
+        self._error = None
+
+    async def _read(self, raw_queue):
+        stats = self.stats
+        try:
+            while not self._stopped:
+                raw = await self.adapter.read()
+                if raw is None:
+                    break
+                stats["received"] += 1
+                await raw_queue.put(raw)
+                depth = raw_queue.qsize()
+                if depth > stats["max_queue_depth"]:
+                    stats["max_queue_depth"] = depth
+        except Exception as exc:
+            # Surface feed errors from run() instead of hanging the stages
+            self._error = exc
+        await raw_queue.put(_END)
+
+    async def _decode(self, raw_queue, batch_queue):
+        decode = self.adapter.decode
+        stats = self.stats
+        done = False
+        while not done:
+            raws = [await raw_queue.get()]
+            while len(raws) < self.batch_size and not raw_queue.empty():
+                raws.append(raw_queue.get_nowait())
+            if raws[-1] is _END:
+                raws.pop()
+                done = True
+
+            try:
+                batch = [tick for tick in map(decode, raws) if tick is not None]
+            except Exception as exc:
+                self._error = exc
+                break
+            stats["decoded"] += len(batch)
+            if self.coalesce and len(batch) > 1 and raw_queue.qsize() >= self.coalesce_depth:
+                stats["coalesced"] += len(batch) - 1
+                batch = batch[-1:]
+            if batch:
+                await batch_queue.put(batch)
+        await batch_queue.put(_END)
+
+    def _emit(self, tick, result):
+        self.stats["processed"] += 1
+        if self.on_result is not None and self.on_result(tick, result) is False:
+            self._stopped = True
+            return False
+        return True
+
+    def _conflate_batch(self, batch):
+        conflator = self.conflator
+        for tick in batch:
+            self._last_tick = tick
+            for result in conflator.update(tick[1], tick[2], tick[3], tick[4], ts=tick[0]):
+                if not self._emit(tick, result[:-1]):
+                    return False
+            if conflator.pending == 1:
+                self._bucket_opened = time.monotonic()
+        self.stats["conflated"] = conflator.conflated
+        return True
+
+    def _flush_conflator(self):
+        result = self.conflator.flush()
+        self.stats["conflated"] = self.conflator.conflated
+        if result is None:
+            return True
+        return self._emit(self._last_tick, result[:-1])
+
+    def _flush_timeout(self):
+        # Wall-clock seconds until the open bucket is due, None if no timer
+        if self.conflator is None or self.conflate_interval is None or not self.conflator.pending:
+            return None
+        return max(0.0, self.conflate_interval - (time.monotonic() - self._bucket_opened))
+
+    def _compute_batch(self, batch):
+        if self.conflator is not None:
+            return self._conflate_batch(batch)
+        handler = self.handler
+        on_result = self.on_result
+        for tick in batch:
+            result = handler(tick[1], tick[2], tick[3], tick[4])
+            self.stats["processed"] += 1
+            if on_result is not None and on_result(tick, result) is False:
+                self._stopped = True
+                return False
+        return True
+
+    async def _compute(self, batch_queue):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                batch = await asyncio.wait_for(batch_queue.get(), self._flush_timeout())
+            except asyncio.TimeoutError:
+                # Quiet feed: process the open bucket instead of holding it
+                if not self._flush_conflator():
+                    break
+                continue
+            if batch is _END:
+                if self.conflator is not None:
+                    self._flush_conflator()
+                break
+            if self.threaded:
+                keep_going = await loop.run_in_executor(None, self._compute_batch, batch)
+            else:
+                keep_going = self._compute_batch(batch)
+                # Let the reader/decoder run between batches
+                await asyncio.sleep(0)
+            self.stats["batches"] += 1
+            if not keep_going:
+                break
+
+    async def run(self):
+        """
+        Run until the feed ends or on_result asks to stop.
+
+        Returns:
+            stats dict
+        """
+        raw_queue = asyncio.Queue(self.queue_size)
+        batch_queue = asyncio.Queue(max(1, self.queue_size // self.batch_size))
+        await self.adapter.connect()
+        reader = asyncio.create_task(self._read(raw_queue))
+        decoder = asyncio.create_task(self._decode(raw_queue, batch_queue))
+        try:
+            await self._compute(batch_queue)
+        finally:
+            self._stopped = True
+            for task in (reader, decoder):
+                task.cancel()
+            await asyncio.gather(reader, decoder, return_exceptions=True)
+            await self.adapter.close()
+        if self._error is not None:
+            raise self._error
+        return self.stats
@@ -0,0 +1,116 @@
+# File: engine/checkpoint.py
+import os
+import pickle
+import random
+import zlib
+
+import numpy as np
+
+MAGIC = b"RAMMECK1"
+
+
+def snapshot(state, compress=True):
+    """
+    Serialize simulation state to bytes.
+
+    Parameters:
+        state    : any picklable object graph, typically a dict such as
+                   {"loop": BacktestLoop, "shock": ShockGenerator,
+                    "price": float, "tick": int}
+        compress : zlib-compress the payload
+
+    The global `random` and legacy `np.random` states are captured as well,
+    since PartialFillModel, LatencyModel, ShockGenerator and the engine's
+    tick simulator draw from them. Generators held by components (e.g.
+    np.random.default_rng) are pickled with their bit-generator state.
+
+    Returns:
+        bytes
+    """
+    payload = pickle.dumps(
+        {
+            "state": state,
+            "py_random": random.getstate(),
+            "np_random": np.random.get_state(),
+        },
+        protocol=pickle.HIGHEST_PROTOCOL,
+    )
+    flag = b"Z" if compress else b"P"
+    if compress:
+        payload = zlib.compress(payload, 1)
+    return MAGIC + flag + payload
+
+
+def restore(blob, restore_rng=True):
+    """
+    Rebuild state from snapshot() bytes.
+
+    Parameters:
+        blob        : bytes from snapshot()
+        restore_rng : also reset the global RNGs to their snapshot state
+
+    Each call returns an independent copy, so one burn-in snapshot can
+    warm-start any number of runs.
+
+    Returns:
+        the state object passed to snapshot()
+    """
+    if blob[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not a RAMME checkpoint")
+    flag = blob[len(MAGIC):len(MAGIC) + 1]
+    payload = blob[len(MAGIC) + 1:]
+    if flag == b"Z":
+        payload = zlib.decompress(payload)
+    data = pickle.loads(payload)
+
+    if restore_rng:
+        random.setstate(data["py_random"])
+        np.random.set_state(data["np_random"])
+    return data["state"]
+
+
+def save_checkpoint(path, state, compress=True):
+    """
+    Write a snapshot to path atomically (temp file + rename), so a crash
+    mid-write never leaves a truncated checkpoint behind.
+    """
+    blob = snapshot(state, compress=compress)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(blob)
+    os.replace(tmp, path)
+    return len(blob)
+
+
+def load_checkpoint(path, restore_rng=True):
+    """
+    Read a checkpoint written by save_checkpoint().
+    """
+    with open(path, "rb") as fh:
+        return restore(fh.read(), restore_rng=restore_rng)
+
+
+class Checkpointer:
+    """
+    Saves a checkpoint every `every` ticks.
+    """
+
+    def __init__(self, path, every=10_000, compress=True):
+        self.path = path
+        self.every = every
+        self.compress = compress
+        self.saved = 0
+
+    def maybe_save(self, tick, state):
+        """
+        Save state if tick is a checkpoint tick. Call after the tick has
+        been fully processed, with state including the next tick index.
+
+        Returns:
+            True if a checkpoint was written
+        """
+        if self.every <= 0 or (tick + 1) % self.every:
+            return False
+        save_checkpoint(self.path, state, compress=self.compress)
+        self.saved += 1
+        return True
@@ -0,0 +1,179 @@
+# File: engine/conflation.py
+import time
+
+
+class TickConflator:
+    """
+    Conflation layer in front of RAMMEEngine.on_tick_code (or any tick
+    handler, e.g. BacktestLoop.step).
+
+    Top-of-book updates are merged into buckets closed by count
+    (max_updates) and/or time (max_interval). Each closed bucket is
+    processed once by the engine as
+        (last bid, last ask, summed bid_size, summed ask_size)
+    so the price return seen by the estimators is the exact net move over
+    the bucket and sizes are not lost. Running aggregates (first/last
+    timestamp, bid/ask/mid high and low, summed sizes, update count) are
+    returned alongside the engine result, and self.conflated counts the
+    updates that did not get their own engine call.
+
+    Buckets closed by max_interval only close when the next update
+    arrives; call flush() on a timer and at the end of the feed so the
+    last bucket of a quiet feed is still processed.
+    """
+
+    def __init__(self, engine, max_updates=None, max_interval=None, clock=None):
+        """
+        Parameters:
+            engine       : RAMMEEngine (anything with on_tick_code), or a
+                           callable(bid, ask, bid_size, ask_size)
+            max_updates  : close a bucket after this many updates
+            max_interval : close a bucket once an update arrives this many
+                           seconds after the bucket's first update
+            clock        : timestamp source when update() gets no ts
+                           (default time.perf_counter)
+
+        With neither limit set every update is processed on its own.
+        """
+        if max_updates is not None and max_updates < 1:
+            raise ValueError("max_updates must be >= 1")
+        if max_interval is not None and max_interval < 0:
+            raise ValueError("max_interval must be >= 0")
+        self.engine = engine
+        self.max_updates = max_updates if max_updates is not None else (
+            1 if max_interval is None else None
+        )
+        self.max_interval = max_interval
+        self.clock = clock or time.perf_counter
+
+        self.updates = 0
+        self.flushes = 0
+        self._bucket = None
+
+    @property
+    def conflated(self):
+        """
+        Updates merged into another update's engine call so far.
+        """
+        pending = self._bucket["count"] if self._bucket is not None else 0
+        return self.updates - pending - self.flushes
+
+    @property
+    def pending(self):
+        return self._bucket["count"] if self._bucket is not None else 0
+
+    def _open(self, ts, bid, ask, bid_size, ask_size):
+        mid = (bid + ask) / 2
+        self._bucket = {
+            "count": 1,
+            "first_ts": ts,
+            "last_ts": ts,
+            "bid": bid,
+            "ask": ask,
+            "bid_high": bid,
+            "bid_low": bid,
+            "ask_high": ask,
+            "ask_low": ask,
+            "mid_high": mid,
+            "mid_low": mid,
+            "bid_size": bid_size,
+            "ask_size": ask_size,
+        }
+
+    def update(self, bid, ask, bid_size, ask_size, ts=None):
+        """
+        Add one top-of-book update.
+
+        Returns:
+            list of flush() results for every bucket closed by this
+            update (usually zero or one)
+        """
+        if ts is None:
+            ts = self.clock()
+        self.updates += 1
+        out = []
+
+        b = self._bucket
+        if b is not None and self.max_interval is not None and ts - b["first_ts"] >= self.max_interval:
+            out.append(self.flush())
+            b = None
+
+        if b is None:
+            self._open(ts, bid, ask, bid_size, ask_size)
+            b = self._bucket
+        else:
+            mid = (bid + ask) / 2
+            b["count"] += 1
+            b["last_ts"] = ts
+            b["bid"] = bid
+            b["ask"] = ask
+            b["bid_size"] += bid_size
+            b["ask_size"] += ask_size
+            if bid > b["bid_high"]:
+                b["bid_high"] = bid
+            elif bid < b["bid_low"]:
+                b["bid_low"] = bid
+            if ask > b["ask_high"]:
+                b["ask_high"] = ask
+            elif ask < b["ask_low"]:
+                b["ask_low"] = ask
+            if mid > b["mid_high"]:
+                b["mid_high"] = mid
+            elif mid < b["mid_low"]:
+                b["mid_low"] = mid
+
+        if self.max_updates is not None and b["count"] >= self.max_updates:
+            out.append(self.flush())
+        return out
+
+    def flush(self):
+        """
+        Process the open bucket now (e.g. on a timer or at end of feed).
+
+        Returns:
+            the handler's result with the bucket appended, i.e.
+            (mid, regime_code, features, bucket) for an engine, or None if
+            nothing is pending
+        """
+        b = self._bucket
+        if b is None:
+            return None
+        self._bucket = None
+        self.flushes += 1
+        handler = self.engine if callable(self.engine) else self.engine.on_tick_code
+        result = handler(b["bid"], b["ask"], b["bid_size"], b["ask_size"])
+        return tuple(result) + (b,)
+
+    def stats(self):
+        return {
+            "updates": self.updates,
+            "processed": self.flushes,
+            "conflated": self.conflated,
+            "pending": self.pending,
+        }
+
+
+def _quote(bid, ask, bid_size, ask_size):
+    return bid, ask, bid_size, ask_size
+
+
+def conflate_ticks(ticks, max_updates=None, max_interval=None):
+    """
+    Conflate a finite tick stream ahead of the engine.
+
+    Parameters:
+        ticks        : iterable of (ts, bid, ask, bid_size, ask_size)
+        max_updates  : see TickConflator
+        max_interval : see TickConflator, in the ticks' timestamp units
+
+    Yields:
+        (bid, ask, bid_size, ask_size) per bucket, the last bucket
+        flushed at the end of the stream
+    """
+    conflator = TickConflator(_quote, max_updates, max_interval)
+    for ts, bid, ask, bid_size, ask_size in ticks:
+        for out in conflator.update(bid, ask, bid_size, ask_size, ts=ts):
+            yield out[:4]
+    last = conflator.flush()
+    if last is not None:
+        yield last[:4]
@@ -3,8 +3,13 @@ import numpy as np
 from microstructure.features import MicrostructureFeatures
 from microstructure.liquidity import LiquidityEstimator
 from regime.detector import RegimeDetector
+from regime.states import REGIME_LABELS
 from microstructure.orderbook import OrderBook
 from microstructure.toxicity import ToxicityEstimator
+from microstructure.registry import FeaturePipeline
+
+# Feature set returned by on_tick unless the caller asks for another one
+DEFAULT_FEATURES = ("return", "spread", "liquidity", "toxicity")
 
 
 class RAMMEEngine:
@@ -13,17 +18,75 @@ class RAMMEEngine:
     Computes microstructure features, liquidity, toxicity, and regime.
     """
 
-    def __init__(self, initial_price=100.0, volatility=0.01):
+    def __init__(self, initial_price=100.0, volatility=0.01, regime_detector=None,
+                 feature_set=None, feature_windows=None, profiler=None,
+                 rolling_store=None):
+        """
+        regime_detector : object with update(ret, features) and detect()
+                          returning a MarketRegime (default RegimeDetector,
+                          or e.g. regime.hmm.HMMRegimeDetector)
+        feature_set     : feature names returned per tick (default
+                          DEFAULT_FEATURES); for a BacktestLoop use
+                          backtest.loop.required_features(), the active
+                          strategy's required_features plus those of the
+                          execution stage; see microstructure.registry
+        feature_windows : optional {feature: window} overrides
+        profiler        : optional engine.profiling.StageProfiler
+        rolling_store   : optional microstructure.rolling.RollingStore;
+                          spread and return histories are then held once
+                          in the store and shared by the liquidity and
+                          toxicity estimators, the default regime detector
+                          and any "<series>:<stat>:<window>" features
+        """
+        windows = feature_windows or {}
+        store = rolling_store
+        self.rolling_store = store
         self.features = MicrostructureFeatures()
-        self.liquidity = LiquidityEstimator()
-        self.regime_detector = RegimeDetector()
+        self.liquidity = LiquidityEstimator(window=windows.get("liquidity", 50), store=store)
+        self.regime_detector = regime_detector if regime_detector is not None else RegimeDetector(store=store)
         self.orderbook = OrderBook()
-        self.toxicity = ToxicityEstimator()
+        self.toxicity = ToxicityEstimator(window=windows.get("toxicity", 20), store=store)
+
+        # Only the requested features, plus whatever the regime detector
+        # observes, are computed each tick
+        self.feature_set = tuple(feature_set or DEFAULT_FEATURES)
+        detector_features = getattr(self.regime_detector, "feature_names", ("return",))
+        # Shared series are fed before any estimator reads them
+        feeds = ("spread:window", "return:window") if store is not None else ()
+        requested = ("mid", "return") + feeds + self.feature_set + tuple(detector_features)
+        self.pipeline = FeaturePipeline(
+            dict.fromkeys(requested),
+            context={
+                "features": self.features,
+                "liquidity": self.liquidity,
+                "toxicity": self.toxicity,
+                "orderbook": self.orderbook,
+                "rolling": store,
+            },
+            windows=windows,
+        )
+
+        self.profiler = None
+        if profiler is not None:
+            self.enable_profiling(profiler)
 
         # Simulation state
         self.last_price = initial_price
         self.volatility = volatility
 
+    def enable_profiling(self, profiler):
+        """
+        Route on_tick through the instrumented path, recording the
+        "features" and "regime" stages into profiler. The plain path is
+        left untouched, so profiling costs nothing while disabled.
+        """
+        self.profiler = profiler
+        self.on_tick_code = self._on_tick_code_profiled
+
+    def disable_profiling(self):
+        self.profiler = None
+        self.__dict__.pop("on_tick_code", None)
+
     def _simulate_tick(self, regime):
         """
         Simulate a single price tick based on market regime.
@@ -71,29 +134,51 @@ class RAMMEEngine:
             regime: str, detected market regime
             features: dict, microstructure features
         """
+        mid, code, features = self.on_tick_code(bid, ask, bid_size, ask_size)
+        return mid, REGIME_LABELS[code], features
+
+    def on_tick_code(self, bid, ask, bid_size, ask_size):
+        """
+        Same as on_tick, but returns the regime as an integer code
+        (MarketRegime value) for downstream array lookups.
+        Returns:
+            mid: float, mid price
+            regime: int, detected market regime code
+            features: dict, microstructure features
+        """
         # --- Price & microstructure features ---
-        mid = self.features.compute_mid_price(bid, ask)
-        spread = self.features.bid_ask_spread(bid, ask)
-        ret = self.features.price_return(mid)
+        values = self.pipeline.evaluate(bid, ask, bid_size, ask_size)
+        ret = values["return"]
 
-        # Sanity checks
-        mid = max(mid, 0.01)
-        spread = max(spread, 0.0)
+        # Sanity checks (spread is floored at 0 by its feature)
+        mid = max(values["mid"], 0.01)
 
-        # --- Update estimators ---
-        self.liquidity.update(spread, bid_size, ask_size)
-        self.regime_detector.update(ret)
-        self.toxicity.update(ret)
+        # --- Collect features ---
+        features = {name: values[name] for name in self.feature_set}
 
         # --- Detect current regime ---
-        regime = self.regime_detector.detect().name
+        self.regime_detector.update(ret, values)
+        regime = self.regime_detector.detect().value
 
-        # --- Collect features ---
-        features = {
-            "return": ret,
-            "spread": spread,
-            "liquidity": max(0.0, self.liquidity.liquidity_score()),
-            "toxicity": self.toxicity.toxicity_score(),
-        }
+        return mid, regime, features
+
+    def _on_tick_code_profiled(self, bid, ask, bid_size, ask_size):
+        """
+        on_tick_code with per-stage timings.
+        """
+        prof = self.profiler
+        now = prof.now
+
+        t0 = now()
+        values = self.pipeline.evaluate(bid, ask, bid_size, ask_size)
+        ret = values["return"]
+        mid = max(values["mid"], 0.01)
+        features = {name: values[name] for name in self.feature_set}
+        t1 = now()
+        prof.record("features", t0, t1)
+
+        self.regime_detector.update(ret, values)
+        regime = self.regime_detector.detect().value
+        prof.record("regime", t1, now())
 
         return mid, regime, features
@@ -0,0 +1,14 @@
+# File: engine/jit.py
+
+# Numba is optional: without it @njit functions run as plain Python (same
+# results, interpreter speed). Modules with kernels import njit from here.
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda fn: fn
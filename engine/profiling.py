@@ -0,0 +1,184 @@
+# File: engine/profiling.py
+import json
+import math
+import time
+
+
+class LogHistogram:
+    """
+    HDR-style latency histogram over integer nanoseconds.
+
+    Values are bucketed by power of two, and each power of two is split
+    into 2**(precision-1) linear sub-buckets, so every bucket spans at most
+    1/2**(precision-1) of its value (~3% at the default precision=6).
+    Recording is a handful of integer ops and one list increment.
+    """
+
+    def __init__(self, precision=6):
+        self.precision = precision
+        self._half = 1 << (precision - 1)
+        self.counts = [0] * ((64 - precision + 2) * self._half)
+        self.total = 0
+        self.sum = 0
+        self.min = None
+        self.max = 0
+
+    def _index(self, value):
+        shift = value.bit_length() - self.precision
+        if shift <= 0:
+            return value
+        return shift * self._half + (value >> shift)
+
+    def _lower_bound(self, index):
+        if index < 2 * self._half:
+            return index
+        shift = index // self._half - 1
+        return (index - shift * self._half) << shift
+
+    def record(self, value):
+        """
+        Record one value (nanoseconds).
+        """
+        value = int(value) if value > 0 else 0
+        self.counts[self._index(value)] += 1
+        self.total += 1
+        self.sum += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q):
+        """
+        Value at percentile q in [0, 100] (bucket midpoint).
+        """
+        if not self.total:
+            return 0.0
+        target = min(self.total, max(1, math.ceil(q / 100.0 * self.total)))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if not count:
+                continue
+            seen += count
+            if seen >= target:
+                low = self._lower_bound(index)
+                high = self._lower_bound(index + 1)
+                return min((low + high - 1) / 2.0, self.max)
+        return float(self.max)
+
+    def mean(self):
+        return self.sum / self.total if self.total else 0.0
+
+
+class StageProfiler:
+    """
+    Per-stage timings for the tick pipeline.
+
+    Components call record(stage, start_ns, end_ns) around each stage and
+    the driving loop brackets every tick with begin_tick()/end_tick().
+    Ticks inside trace_ticks are also kept as Chrome trace events.
+    """
+
+    def __init__(self, trace_ticks=None, precision=6):
+        """
+        Parameters:
+            trace_ticks : optional (start, end) tick range to keep as trace
+                          events for export_chrome_trace()
+            precision   : LogHistogram precision
+        """
+        self.precision = precision
+        self.histograms = {}
+        self.trace_ticks = trace_ticks
+        self.trace_events = []
+        self.tick = -1
+        self.ticks = 0
+        self._tracing = False
+        self._run_start = None
+        self._run_end = None
+        self._tick_start = 0
+
+    now = staticmethod(time.perf_counter_ns)
+
+    def begin_tick(self):
+        now = time.perf_counter_ns()
+        if self._run_start is None:
+            self._run_start = now
+        self.tick += 1
+        self._tick_start = now
+        if self.trace_ticks is not None:
+            start, end = self.trace_ticks
+            self._tracing = start <= self.tick < end
+
+    def end_tick(self):
+        now = time.perf_counter_ns()
+        self.record("tick", self._tick_start, now)
+        self.ticks += 1
+        self._run_end = now
+
+    def record(self, stage, start_ns, end_ns):
+        """
+        Record one stage execution.
+        """
+        hist = self.histograms.get(stage)
+        if hist is None:
+            hist = self.histograms[stage] = LogHistogram(self.precision)
+        hist.record(end_ns - start_ns)
+        if self._tracing:
+            self.trace_events.append({
+                "name": stage,
+                "cat": "tick" if stage == "tick" else "stage",
+                "ph": "X",
+                "ts": start_ns / 1000.0,
+                "dur": (end_ns - start_ns) / 1000.0,
+                "pid": 0,
+                "tid": 0,
+                "args": {"tick": self.tick},
+            })
+
+    def throughput(self):
+        """
+        Ticks per second over the profiled run.
+        """
+        if not self.ticks or self._run_end is None:
+            return 0.0
+        elapsed = (self._run_end - self._run_start) / 1e9
+        return self.ticks / elapsed if elapsed > 0 else 0.0
+
+    def report(self):
+        """
+        Per-stage latency summary in microseconds plus tick throughput.
+        """
+        stages = {}
+        for stage, hist in self.histograms.items():
+            stages[stage] = {
+                "count": hist.total,
+                "mean_us": hist.mean() / 1000.0,
+                "p50_us": hist.percentile(50) / 1000.0,
+                "p99_us": hist.percentile(99) / 1000.0,
+                "p999_us": hist.percentile(99.9) / 1000.0,
+                "max_us": hist.max / 1000.0,
+            }
+        return {"ticks": self.ticks, "ticks_per_sec": self.throughput(), "stages": stages}
+
+    def format_report(self):
+        """
+        report() as a printable table.
+        """
+        rep = self.report()
+        lines = [
+            f"{'stage':<12} {'count':>9} {'mean':>10} {'p50':>10} {'p99':>10} {'p999':>10} {'max':>10}  (us)"
+        ]
+        for stage, s in rep["stages"].items():
+            lines.append(
+                f"{stage:<12} {s['count']:>9} {s['mean_us']:>10.2f} {s['p50_us']:>10.2f} "
+                f"{s['p99_us']:>10.2f} {s['p999_us']:>10.2f} {s['max_us']:>10.2f}"
+            )
+        lines.append(f"throughput: {rep['ticks_per_sec']:,.0f} ticks/s over {rep['ticks']} ticks")
+        return "\n".join(lines)
+
+    def export_chrome_trace(self, path):
+        """
+        Write the traced tick range as Chrome trace / Perfetto JSON.
+        """
+        with open(path, "w") as fh:
+            json.dump({"traceEvents": self.trace_events, "displayTimeUnit": "ns"}, fh)
@@ -0,0 +1,267 @@
+# File: engine/shm.py
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from engine.engine import DEFAULT_FEATURES
+from regime.states import REGIME_LABELS
+
+# Segment layout (all little-endian, 64-byte aligned sections):
+#   header   : 8 x uint64 = magic, version, capacity, n_columns, seq, 0, 0, 0
+#   names    : n_columns x NAME_BYTES ASCII column names
+#   ring     : capacity x n_columns float64 rows
+#
+# seq is the seqlock word: odd while the publisher is writing a row, even
+# otherwise, so seq // 2 is the number of rows published and row k lives
+# in slot k % capacity.
+MAGIC = 0x52414D4D45534E50  # "RAMMESNP"
+VERSION = 1
+NAME_BYTES = 32
+HEADER_WORDS = 8
+_SEQ = 4
+
+# Columns written by every snapshot, followed by the engine features
+BASE_COLUMNS = ("tick", "ts", "bid", "ask", "mid", "regime", "equity", "position")
+
+
+def _align(n, to=64):
+    return (n + to - 1) // to * to
+
+
+def _layout(capacity, n_columns):
+    names_at = HEADER_WORDS * 8
+    ring_at = _align(names_at + n_columns * NAME_BYTES)
+    return names_at, ring_at, ring_at + capacity * n_columns * 8
+
+
+def _attach(name):
+    """
+    Open an existing segment without registering it with this process's
+    resource tracker, which would otherwise unlink it when a reader exits.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 has no track argument: skip the registration instead
+        # (unregistering afterwards would drop the publisher's own entry
+        # when both share a tracker, as forked processes do)
+        from multiprocessing import resource_tracker
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class SnapshotPublisher:
+    """
+    Publishes engine snapshots into a shared-memory ring buffer.
+
+    One process writes; any number of processes attach a SnapshotReader
+    by name. A publish is one row store bracketed by two increments of a
+    seqlock word; the publisher never waits for readers and readers never
+    block it.
+    """
+
+    def __init__(self, name=None, capacity=4096, features=DEFAULT_FEATURES):
+        """
+        Parameters:
+            name     : shared-memory segment name (None picks a unique one;
+                       see .name)
+            capacity : rows of history kept
+            features : engine feature names stored per snapshot
+        """
+        self.columns = BASE_COLUMNS + tuple(features)
+        self.features = tuple(features)
+        self.capacity = capacity
+        n = len(self.columns)
+        names_at, ring_at, size = _layout(capacity, n)
+
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.name = self.shm.name
+        buf = self.shm.buf
+
+        names = np.ndarray((n,), dtype=f"S{NAME_BYTES}", buffer=buf, offset=names_at)
+        names[:] = [c.encode() for c in self.columns]
+        self._rows = np.ndarray((capacity, n), dtype="<f8", buffer=buf, offset=ring_at)
+        self._rows.fill(np.nan)
+
+        self._header = np.ndarray((HEADER_WORDS,), dtype="<u8", buffer=buf, offset=0)
+        self._header[:] = (MAGIC, VERSION, capacity, n, 0, 0, 0, 0)
+        self._count = 0
+        self._row = [0.0] * n
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        self.unlink()
+
+    def publish(self, tick, mid, regime, features, equity=np.nan, position=np.nan,
+                bid=np.nan, ask=np.nan, ts=None):
+        """
+        Write one snapshot.
+
+        Parameters:
+            tick     : tick number
+            mid      : mid price
+            regime   : integer regime code
+            features : engine features dict (missing names are stored as NaN)
+        """
+        row = self._row
+        row[0] = tick
+        row[1] = time.time() if ts is None else ts
+        row[2] = bid
+        row[3] = ask
+        row[4] = mid
+        row[5] = regime
+        row[6] = equity
+        row[7] = position
+        i = 8
+        for name in self.features:
+            row[i] = features.get(name, np.nan)
+            i += 1
+
+        header = self._header
+        header[_SEQ] += 1          # odd: row in progress
+        self._rows[self._count % self.capacity] = row
+        header[_SEQ] += 1          # even: row complete
+        self._count += 1
+
+    @property
+    def count(self):
+        return self._count
+
+    def close(self):
+        # Views must go before the mapping can be closed
+        self._rows = self._header = None
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+
+class SnapshotReader:
+    """
+    Read-only view of a SnapshotPublisher segment from another process.
+
+    latest() and history() copy rows out and validate them against the
+    seqlock word afterwards, retrying if the publisher lapped the rows
+    while they were being read. rows() is the raw zero-copy view for
+    consumers that tolerate a torn row (e.g. a live plot).
+    """
+
+    def __init__(self, name, retries=10000):
+        """
+        Parameters:
+            name    : segment name published by SnapshotPublisher
+            retries : attempts before a read gives up with RuntimeError
+        """
+        self.shm = _attach(name)
+        self.name = name
+        self.retries = retries
+        buf = self.shm.buf
+
+        self._header = np.ndarray((HEADER_WORDS,), dtype="<u8", buffer=buf, offset=0)
+        magic, version, capacity, n = (int(x) for x in self._header[:4])
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{name} is not a RAMME snapshot segment")
+        self.capacity = capacity
+        names_at, ring_at, _ = _layout(capacity, n)
+        names = np.ndarray((n,), dtype=f"S{NAME_BYTES}", buffer=buf, offset=names_at)
+        self.columns = tuple(c.decode() for c in names)
+        self.features = self.columns[len(BASE_COLUMNS):]
+        self._index = {c: i for i, c in enumerate(self.columns)}
+        self._rows = np.ndarray((capacity, n), dtype="<f8", buffer=buf, offset=ring_at)
+        self._rows.flags.writeable = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def seq(self):
+        return int(self._header[_SEQ])
+
+    @property
+    def count(self):
+        """
+        Rows published so far.
+        """
+        return self.seq // 2
+
+    def rows(self):
+        """
+        Zero-copy (capacity, n_columns) view of the ring; unsynchronized.
+        """
+        return self._rows
+
+    def _valid_from(self, seq):
+        # Rows with index below this were (or are being) overwritten
+        return (seq + 1) // 2 - self.capacity
+
+    def latest(self):
+        """
+        Most recent snapshot as a dict (None before the first publish).
+        """
+        for _ in range(self.retries):
+            seq = self.seq
+            if seq & 1:
+                # Publisher is mid-write (possibly descheduled): yield
+                time.sleep(0)
+                continue
+            k = seq // 2 - 1
+            if k < 0:
+                return None
+            row = self._rows[k % self.capacity].copy()
+            if k >= self._valid_from(self.seq):
+                return self._as_dict(row)
+        raise RuntimeError("snapshot kept changing while being read")
+
+    def history(self, n=None):
+        """
+        Last n rows (default: the whole ring) as a dict of column arrays,
+        oldest first. Rows overwritten during the copy are dropped.
+        """
+        for _ in range(self.retries):
+            seq = self.seq
+            end = seq // 2
+            start = max(end - (self.capacity if n is None else min(n, self.capacity)), 0)
+            idx = np.arange(start, end)
+            block = self._rows[idx % self.capacity]
+            valid = idx >= self._valid_from(self.seq)
+            if valid.any() or not len(idx):
+                block = block[valid]
+                return {c: block[:, i] for c, i in self._index.items()}
+            time.sleep(0)
+        raise RuntimeError("history kept changing while being read")
+
+    def wait(self, after, timeout=None, poll=0.001):
+        """
+        Block until more than `after` rows are published; returns the new
+        count (or the current one on timeout).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.count <= after:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            time.sleep(poll)
+        return self.count
+
+    def _as_dict(self, row):
+        out = {c: float(row[i]) for c, i in self._index.items() if c not in self.features}
+        out["tick"] = int(out["tick"])
+        out["regime"] = int(out["regime"])
+        out["label"] = REGIME_LABELS[out["regime"]]
+        out["features"] = {f: float(row[self._index[f]]) for f in self.features}
+        return out
+
+    def close(self):
+        self._rows = self._header = None
+        self.shm.close()
@@ -0,0 +1,306 @@
+# File: execution/adaptive.py
+import numpy as np
+
+from config.loader import RegimeParams, load_config
+from regime.states import regime_code
+
+
+def ac_fraction(kappa, n):
+    """
+    Share of the remaining quantity to trade now under an Almgren-Chriss
+    schedule with n ticks left.
+
+    Holdings follow x_j = X sinh(kappa (n - j)) / sinh(kappa n), so the
+    first slice is 1 - sinh(kappa (n - 1)) / sinh(kappa n). Written with
+    expm1 to stay exact for kappa -> 0 (where it tends to TWAP's 1/n) and
+    finite for large kappa * n.
+
+    Parameters:
+        kappa : urgency per tick (scalar or array, >= 0)
+        n     : ticks left including this one (scalar or array, >= 1)
+    """
+    a = np.maximum(np.asarray(kappa, dtype=float), 1e-12)
+    n = np.maximum(np.asarray(n, dtype=float), 1.0)
+    return 1.0 - np.exp(-a) * np.expm1(-2 * a * (n - 1)) / np.expm1(-2 * a * n)
+
+
+def ac_trajectory(qty, n, kappa):
+    """
+    Planned holdings x_0..x_n (x_0 = qty, x_n = 0) for one parent order.
+    """
+    j = np.arange(n + 1)
+    a = max(float(kappa), 1e-12)
+    return qty * np.exp(-a * j) * np.expm1(-2 * a * (n - j)) / np.expm1(-2 * a * n)
+
+
+class AdaptiveExecutor:
+    """
+    Almgren-Chriss execution of many parent orders, re-planned every tick.
+
+    Parent orders live in parallel arrays. Each step() recomputes every
+    order's next slice from its remaining quantity and ticks left, with an
+    urgency kappa looked up per regime and scaled by the engine's current
+    liquidity and toxicity, so the schedule bends as soon as the regime
+    changes. Child orders are priced at the touch plus SlippageModel
+    impact and partially filled as in PartialFillModel; unfilled quantity
+    is re-planned on the next tick until the horizon, when the order
+    expires with its remainder unfilled.
+
+    step() returns fills as columns accepted by execution.tca. Retired
+    orders (filled, expired or cancelled) are appended to `completed`
+    with their target and the price their remainder is marked at, the
+    target_qty and close_price of tca.implementation_shortfall().
+    """
+
+    # Parallel order arrays (kept with spare capacity) and their dtypes
+    _ARRAYS = (
+        ("ids", np.int64), ("side", np.int8), ("target", float), ("remaining", float),
+        ("ticks_left", np.int64), ("arrival", float), ("notional", float), ("mark", float),
+    )
+
+    def __init__(self, params=None, base_slippage=0.0001, min_latency_ms=1, max_latency_ms=10,
+                 toxicity_scale=1.0, liquidity_ref=50.0, liquidity_floor=0.05,
+                 max_participation=0.2, seed=None):
+        """
+        Parameters:
+            params            : RegimeParams (defaults to config/*.yaml)
+            base_slippage     : SlippageModel impact per unit at unit liquidity
+            min/max_latency_ms: LatencyModel base range
+            toxicity_scale    : kappa *= 1 + toxicity_scale * toxicity
+            liquidity_ref     : liquidity score the regime kappas apply at
+            liquidity_floor   : kappa *= sqrt(max(liquidity / liquidity_ref,
+                                liquidity_floor)); impact scales with
+                                1 / liquidity, so thin books trade slower
+            max_participation : child order cap as a fraction of the size
+                                displayed on the side being taken
+            seed              : fill/latency noise seed
+        """
+        self.params = params if params is not None else RegimeParams.from_config()
+        self.base_slippage = base_slippage
+        self.min_latency_ms = min_latency_ms
+        self.max_latency_ms = max_latency_ms
+        self.toxicity_scale = toxicity_scale
+        self.liquidity_ref = liquidity_ref
+        self.liquidity_floor = liquidity_floor
+        self.max_participation = max_participation
+        self.rng = np.random.default_rng(seed)
+
+        self._next_id = 0
+        self._store = {name: np.zeros(64, dtype=dtype) for name, dtype in self._ARRAYS}
+        self._resize(0)
+        self.completed = []
+
+    @classmethod
+    def from_config(cls, config_dir=None, seed=None):
+        """
+        Executor configured from execution.yaml (slippage, latency and
+        adaptive sections).
+        """
+        execution = load_config("execution", config_dir)
+        adaptive = execution.get("adaptive") or {}
+        latency = execution.get("latency") or {}
+        return cls(
+            params=RegimeParams.from_config(config_dir),
+            base_slippage=(execution.get("slippage") or {}).get("base_slippage", 0.0001),
+            min_latency_ms=latency.get("min_ms", 1),
+            max_latency_ms=latency.get("max_ms", 10),
+            toxicity_scale=adaptive.get("toxicity_scale", 1.0),
+            liquidity_ref=adaptive.get("liquidity_ref", 50.0),
+            liquidity_floor=adaptive.get("liquidity_floor", 0.05),
+            max_participation=adaptive.get("max_participation", 0.2),
+            seed=seed,
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    # -------------------------
+    # Orders
+    # -------------------------
+    def submit(self, qty, side, horizon, arrival):
+        """
+        Add a parent order.
+
+        Parameters:
+            qty     : quantity to trade (unsigned)
+            side    : +1 buy, -1 sell
+            horizon : ticks to complete it in; the order expires after
+                      its last tick with any remainder unfilled
+            arrival : decision mid price (implementation shortfall benchmark)
+
+        Returns:
+            parent order id
+        """
+        return int(self.submit_many([qty], [side], [horizon], [arrival])[0])
+
+    def submit_many(self, qty, side, horizon, arrival):
+        """
+        Add a batch of parent orders (arrays or scalars, broadcast as in
+        submit()).
+
+        Returns:
+            array of parent order ids
+        """
+        qty, side, horizon, arrival = np.broadcast_arrays(
+            np.asarray(qty, dtype=float), side, np.asarray(horizon), np.asarray(arrival, dtype=float))
+        if np.any(qty <= 0) or np.any(horizon < 1):
+            raise ValueError("qty must be positive and horizon at least one tick")
+        k = qty.size
+        n = len(self.ids)
+        if n + k > len(self._store["ids"]):
+            size = max(2 * len(self._store["ids"]), n + k)
+            for name, dtype in self._ARRAYS:
+                grown = np.zeros(size, dtype=dtype)
+                grown[:n] = self._store[name][:n]
+                self._store[name] = grown
+        ids = self._next_id + np.arange(k, dtype=np.int64)
+        self._next_id += k
+        new = {
+            "ids": ids, "side": np.where(side.ravel() > 0, 1, -1), "target": qty.ravel(),
+            "remaining": qty.ravel(), "ticks_left": horizon.ravel(), "arrival": arrival.ravel(),
+            "notional": 0.0, "mark": arrival.ravel(),
+        }
+        for name, values in new.items():
+            self._store[name][n:n + k] = values
+        self._resize(n + k)
+        return ids
+
+    def cancel(self, order_id):
+        self._retire(self.ids == order_id, "cancelled")
+
+    def _resize(self, n):
+        # The public order arrays are views of the first n stored rows
+        for name, _ in self._ARRAYS:
+            setattr(self, name, self._store[name][:n])
+
+    def _retire(self, done, status):
+        if not done.any():
+            return
+        for i in np.flatnonzero(done):
+            filled = self.target[i] - self.remaining[i]
+            self.completed.append({
+                "parent": int(self.ids[i]),
+                "side": int(self.side[i]),
+                "target": float(self.target[i]),
+                "filled": float(filled),
+                "unfilled": float(self.remaining[i]),
+                "avg_price": float(self.notional[i] / filled) if filled > 0 else float("nan"),
+                "arrival": float(self.arrival[i]),
+                "close": float(self.mark[i]),
+                "status": status,
+            })
+        keep = ~done
+        k = int(keep.sum())
+        for name, _ in self._ARRAYS:
+            column = self._store[name]
+            column[:k] = column[:len(keep)][keep]
+        self._resize(k)
+
+    # -------------------------
+    # Planning
+    # -------------------------
+    def urgency(self, regime, liquidity, toxicity=0.0):
+        """
+        Effective kappa for the current market state.
+        """
+        kappa = self.params.execution_kappa[regime_code(regime)]
+        kappa *= np.sqrt(max(liquidity / self.liquidity_ref, self.liquidity_floor))
+        return kappa * (1.0 + self.toxicity_scale * toxicity)
+
+    def plan(self, regime, liquidity, toxicity=0.0):
+        """
+        Next slice for every open order (before participation caps).
+        """
+        kappa = self.urgency(regime, liquidity, toxicity)
+        return self.remaining * ac_fraction(kappa, self.ticks_left)
+
+    def schedule(self, order_id, regime, liquidity, toxicity=0.0):
+        """
+        Remaining planned holdings of one order if the market state held.
+        """
+        i = int(np.flatnonzero(self.ids == order_id)[0])
+        kappa = self.urgency(regime, liquidity, toxicity)
+        return ac_trajectory(self.remaining[i], int(self.ticks_left[i]), kappa)
+
+    # -------------------------
+    # Execution
+    # -------------------------
+    def step(self, bid, ask, bid_size, ask_size, regime, features):
+        """
+        Re-plan and work one tick.
+
+        Parameters:
+            bid, ask, bid_size, ask_size : top of book
+            regime                       : regime code or label
+            features                     : engine features (liquidity,
+                                           optional toxicity)
+
+        Returns:
+            dict of fill columns (see execution.tca.FILL_COLUMNS)
+        """
+        n = len(self.ids)
+        if n == 0:
+            return _empty_fills()
+
+        code = regime_code(regime)
+        liquidity = features["liquidity"]
+        slices = self.plan(code, liquidity, features.get("toxicity", 0.0))
+
+        buy = self.side > 0
+        displayed = np.where(buy, float(ask_size), float(bid_size))
+        slices = np.minimum(slices, self.max_participation * displayed)
+        touch = np.where(buy, ask, bid)
+
+        # PartialFillModel with the slice's share of displayed size
+        relative = np.divide(slices, displayed, out=np.ones(n), where=displayed > 0)
+        fill = (min(max(liquidity, 0.0), 1.0)
+                * np.maximum(0.1, 1.0 - relative)
+                * self.rng.uniform(0.6, 1.0, n))
+        filled = slices * np.clip(fill, 0.0, 1.0)
+
+        # SlippageModel priced on the slice that was sent
+        impact = (self.base_slippage * slices / max(liquidity, 1e-6)
+                  * self.params.slippage_multiplier[code])
+        price = touch * (1 + self.side * impact)
+        latency = (self.rng.integers(self.min_latency_ms, self.max_latency_ms + 1, n)
+                   * self.params.latency_multiplier[code])
+
+        self.remaining -= filled
+        self.notional += filled * price
+        self.ticks_left -= 1
+        self.mark[:] = touch
+
+        sent = slices > 0
+        fills = {
+            "parent": self.ids[sent],
+            "side": self.side[sent],
+            "qty": filled[sent],
+            "order_qty": slices[sent],
+            "price": price[sent],
+            "arrival": self.arrival[sent],
+            "reference": touch[sent],
+            "liquidity": np.full(sent.sum(), float(liquidity)),
+            "latency_ms": latency[sent].astype(float),
+            "regime": np.full(sent.sum(), code, dtype=np.uint8),
+            "volume": displayed[sent],
+        }
+        done = self.remaining <= 1e-9 * self.target
+        self._retire(done, "filled")
+        self._retire(self.ticks_left <= 0, "expired")
+        return fills
+
+
+def _empty_fills():
+    return {
+        "parent": np.zeros(0, dtype=np.int64),
+        "side": np.zeros(0, dtype=np.int8),
+        "qty": np.zeros(0),
+        "order_qty": np.zeros(0),
+        "price": np.zeros(0),
+        "arrival": np.zeros(0),
+        "reference": np.zeros(0),
+        "liquidity": np.zeros(0),
+        "latency_ms": np.zeros(0),
+        "regime": np.zeros(0, dtype=np.uint8),
+        "volume": np.zeros(0),
+    }
@@ -1,14 +1,19 @@
 import random
 
+from config.loader import RegimeParams
+from regime.states import regime_code
+
 
 class LatencyModel:
     """
     Models execution latency and its impact on price.
     """
 
-    def __init__(self, min_ms=1, max_ms=10, seed=42):
+    def __init__(self, min_ms=1, max_ms=10, seed=42, params=None):
         self.min_ms = min_ms
         self.max_ms = max_ms
+        params = params if params is not None else RegimeParams.from_config()
+        self.regime_multiplier = params.latency_multiplier.tolist()
         random.seed(seed)
 
     def sample_latency(self, regime=None):
@@ -17,8 +22,7 @@ class LatencyModel:
         """
         latency = random.randint(self.min_ms, self.max_ms)
 
-        if regime == "VOLATILE":
-            latency *= 2
+        latency *= self.regime_multiplier[regime_code(regime)]
 
         return latency
 
@@ -1,10 +1,21 @@
+from config.loader import RegimeParams
+from regime.states import regime_code
+
+
 class SlippageModel:
     """
     Models execution price impact based on order size and liquidity.
     """
 
-    def __init__(self, base_slippage=0.0001):
+    def __init__(self, base_slippage=0.0001, params=None):
+        """
+        Parameters:
+            base_slippage : impact per unit of quantity at unit liquidity
+            params        : RegimeParams (defaults to config/*.yaml)
+        """
         self.base_slippage = base_slippage
+        params = params if params is not None else RegimeParams.from_config()
+        self.regime_multiplier = params.slippage_multiplier.tolist()
 
     def apply(self, price, qty, liquidity_score, side=1, regime=None):
         """
@@ -13,7 +24,7 @@ class SlippageModel:
             qty             : absolute order quantity
             liquidity_score : [0.0 – 1.0]
             side            : +1 buy, -1 sell
-            regime          : optional regime label
+            regime          : optional regime code or label
 
         Returns:
             executed price
@@ -25,10 +36,7 @@ class SlippageModel:
         impact = self.base_slippage * qty / liquidity
 
         # Regime amplification
-        if regime == "VOLATILE":
-            impact *= 2.0
-        elif regime == "QUIET":
-            impact *= 0.5
+        impact *= self.regime_multiplier[regime_code(regime)]
 
         # Buy pays more, sell receives less
         executed_price = price * (1 + side * impact)
@@ -0,0 +1,342 @@
+# File: execution/tca.py
+import numpy as np
+
+from config.loader import RegimeParams
+from execution.slippage import SlippageModel
+from execution.latency import LatencyModel
+from regime.states import NUM_REGIME_CODES, REGIME_LABELS, regime_codes
+
+# Fill columns. Every column is a 1-D array with one entry per child fill.
+#   parent     : parent order id
+#   side       : +1 buy, -1 sell
+#   qty        : filled quantity (unsigned)
+#   order_qty  : quantity the child order asked for (defaults to qty); the
+#                slippage model prices the order, not the fill
+#   price      : executed price
+#   arrival    : mid price when the parent order was decided
+#   reference  : pre-impact price the fill was worked from, e.g. the touch
+#                (defaults to arrival); used by calibrate_slippage()
+#   liquidity  : liquidity score at the fill
+#   latency_ms : order latency
+#   regime     : regime code at the fill
+#   volume     : market volume over the fill's interval (participation)
+FILL_COLUMNS = (
+    "parent", "side", "qty", "order_qty", "price", "arrival", "reference",
+    "liquidity", "latency_ms", "regime", "volume",
+)
+
+
+def fill_columns(orders, parent=0, side=1, arrival=None, reference=None,
+                 liquidity=None, regime=None, volume=None):
+    """
+    Columnar fills from TWAPExecutor.generate_orders() output.
+
+    Order dicts carry qty, order_qty, price and latency_ms; the remaining columns are
+    per-parent constants (or arrays of the same length as orders).
+    """
+    n = len(orders)
+    fills = {
+        "qty": np.fromiter((o["qty"] for o in orders), float, n),
+        "price": np.fromiter((o["price"] for o in orders), float, n),
+        "latency_ms": np.fromiter((o["latency_ms"] for o in orders), float, n),
+        "order_qty": np.fromiter((o.get("order_qty", o["qty"]) for o in orders), float, n),
+        "parent": np.broadcast_to(np.asarray(parent, dtype=np.int64), n).copy(),
+        "side": np.broadcast_to(np.asarray(side, dtype=np.int8), n).copy(),
+    }
+    optional = {"arrival": arrival, "reference": reference, "liquidity": liquidity, "volume": volume}
+    for name, value in optional.items():
+        if value is not None:
+            fills[name] = np.broadcast_to(np.asarray(value, dtype=float), n).copy()
+    if regime is not None:
+        codes = regime_codes(np.atleast_1d(regime)).astype(np.uint8)
+        fills["regime"] = np.broadcast_to(codes, n).copy()
+    return fills
+
+
+def concat_fills(parts):
+    """
+    Concatenate fill column dicts (columns missing from any part are dropped).
+    """
+    names = set.intersection(*(set(p) for p in parts))
+    return {name: np.concatenate([p[name] for p in parts]) for name in FILL_COLUMNS if name in names}
+
+
+def _regimes(fills):
+    if "regime" not in fills:
+        return np.zeros(len(fills["qty"]), dtype=np.intp)
+    return np.asarray(fills["regime"]).astype(np.intp, copy=False)
+
+
+# -------------------------
+# Cost metrics
+# -------------------------
+def slippage_bps(fills, against="arrival"):
+    """
+    Signed per-fill slippage in basis points (positive = cost).
+
+    Parameters:
+        against : "arrival" (decision mid) or "reference" (pre-impact price)
+    """
+    price = np.asarray(fills["price"], dtype=float)
+    base = np.asarray(fills.get(against, fills["arrival"]), dtype=float)
+    return np.asarray(fills["side"]) * (price - base) / base * 1e4
+
+
+def implementation_shortfall(fills, target_qty=None, close_price=None):
+    """
+    Per-parent implementation shortfall against the arrival price.
+
+    Parameters:
+        target_qty  : intended quantity per parent, in order of the sorted
+                      parent ids (default: the filled quantity, i.e. no
+                      opportunity cost)
+        close_price : price the unfilled remainder is marked at, per parent
+                      (required with target_qty)
+
+    Returns:
+        dict of per-parent arrays: parent, side, filled, avg_price,
+        arrival, execution_cost, opportunity_cost, shortfall,
+        shortfall_bps, fill_rate, participation (if fills have volume)
+    """
+    parent_ids, first, inverse = np.unique(fills["parent"], return_index=True, return_inverse=True)
+    k = len(parent_ids)
+    qty = np.asarray(fills["qty"], dtype=float)
+    price = np.asarray(fills["price"], dtype=float)
+    side = np.asarray(fills["side"], dtype=float)[first]
+    arrival = np.asarray(fills["arrival"], dtype=float)[first]
+
+    filled = np.bincount(inverse, weights=qty, minlength=k)
+    notional = np.bincount(inverse, weights=qty * price, minlength=k)
+    avg_price = np.divide(notional, filled, out=np.full(k, np.nan), where=filled > 0)
+    execution_cost = side * (notional - filled * arrival)
+
+    if target_qty is None:
+        target = filled
+        opportunity_cost = np.zeros(k)
+    else:
+        if close_price is None:
+            raise ValueError("close_price is required with target_qty")
+        target = np.broadcast_to(np.asarray(target_qty, dtype=float), k)
+        close = np.broadcast_to(np.asarray(close_price, dtype=float), k)
+        opportunity_cost = side * (target - filled) * (close - arrival)
+
+    shortfall = execution_cost + opportunity_cost
+    paper = target * arrival
+    out = {
+        "parent": parent_ids,
+        "side": side,
+        "filled": filled,
+        "avg_price": avg_price,
+        "arrival": arrival,
+        "execution_cost": execution_cost,
+        "opportunity_cost": opportunity_cost,
+        "shortfall": shortfall,
+        "shortfall_bps": np.divide(shortfall, paper, out=np.zeros(k), where=paper > 0) * 1e4,
+        "fill_rate": np.divide(filled, target, out=np.zeros(k), where=target > 0),
+    }
+    if "volume" in fills:
+        volume = np.bincount(inverse, weights=np.asarray(fills["volume"], dtype=float), minlength=k)
+        out["participation"] = np.divide(filled, volume, out=np.zeros(k), where=volume > 0)
+    return out
+
+
+def participation_rate(fills):
+    """
+    Overall participation: filled quantity / market volume.
+    """
+    volume = np.sum(fills["volume"])
+    return float(np.sum(fills["qty"]) / volume) if volume > 0 else 0.0
+
+
+def regime_breakdown(fills):
+    """
+    Per-regime cost totals in one grouped pass.
+
+    Returns:
+        dict of arrays indexed by regime code: fills, qty, notional, cost,
+        cost_bps, mean_latency_ms, participation (if fills have volume)
+    """
+    codes = _regimes(fills)
+    k = NUM_REGIME_CODES
+    qty = np.asarray(fills["qty"], dtype=float)
+    price = np.asarray(fills["price"], dtype=float)
+    arrival = np.asarray(fills["arrival"], dtype=float)
+    side = np.asarray(fills["side"], dtype=float)
+
+    count = np.bincount(codes, minlength=k)
+    total_qty = np.bincount(codes, weights=qty, minlength=k)
+    notional = np.bincount(codes, weights=qty * price, minlength=k)
+    paper = np.bincount(codes, weights=qty * arrival, minlength=k)
+    cost = np.bincount(codes, weights=side * qty * (price - arrival), minlength=k)
+    out = {
+        "fills": count,
+        "qty": total_qty,
+        "notional": notional,
+        "cost": cost,
+        "cost_bps": np.divide(cost, paper, out=np.zeros(k), where=paper > 0) * 1e4,
+    }
+    if "latency_ms" in fills:
+        latency = np.bincount(codes, weights=np.asarray(fills["latency_ms"], dtype=float), minlength=k)
+        out["mean_latency_ms"] = np.divide(latency, count, out=np.zeros(k), where=count > 0)
+    if "volume" in fills:
+        volume = np.bincount(codes, weights=np.asarray(fills["volume"], dtype=float), minlength=k)
+        out["participation"] = np.divide(total_qty, volume, out=np.zeros(k), where=volume > 0)
+    return out
+
+
+def report(fills):
+    """
+    Headline TCA numbers with the regime breakdown keyed by label.
+    """
+    shortfall = implementation_shortfall(fills)
+    breakdown = regime_breakdown(fills)
+    paper = np.sum(shortfall["filled"] * shortfall["arrival"])
+    bps = slippage_bps(fills)
+    out = {
+        "fills": int(len(fills["qty"])),
+        "parents": int(len(shortfall["parent"])),
+        "shortfall": float(shortfall["shortfall"].sum()),
+        "shortfall_bps": float(shortfall["shortfall"].sum() / paper * 1e4) if paper > 0 else 0.0,
+        "mean_slippage_bps": float(bps.mean()) if len(bps) else 0.0,
+    }
+    if "volume" in fills:
+        out["participation"] = participation_rate(fills)
+    codes = np.flatnonzero(breakdown["fills"])
+    out["by_regime"] = {
+        name: {REGIME_LABELS[c]: float(values[c]) for c in codes}
+        for name, values in breakdown.items()
+    }
+    return out
+
+
+# -------------------------
+# Calibration
+# -------------------------
+def calibrate_slippage(fills, params=None):
+    """
+    Fit SlippageModel parameters to observed fills.
+
+    The model is impact = base_slippage * order_qty / liquidity * multiplier[regime]
+    with impact = side * (price / reference - 1). Per-regime slopes are
+    least-squares fits through the origin; base_slippage is the cheapest
+    regime's slope and multipliers are slopes relative to it, matching
+    calibrate_latency(). Regimes without fills keep their current
+    multiplier.
+
+    Returns:
+        dict: base_slippage, regime_multiplier (array by code), fills (by
+        code), r2
+    """
+    params = params if params is not None else RegimeParams.from_config()
+    codes = _regimes(fills)
+    k = NUM_REGIME_CODES
+    price = np.asarray(fills["price"], dtype=float)
+    reference = np.asarray(fills.get("reference", fills["arrival"]), dtype=float)
+    y = np.asarray(fills["side"]) * (price / reference - 1.0)
+    x = np.asarray(fills.get("order_qty", fills["qty"]), dtype=float) / np.maximum(np.asarray(fills["liquidity"], dtype=float), 1e-6)
+
+    sxy = np.bincount(codes, weights=x * y, minlength=k)
+    sxx = np.bincount(codes, weights=x * x, minlength=k)
+    count = np.bincount(codes, minlength=k)
+    fitted = sxx > 0
+    slope = np.divide(sxy, sxx, out=np.zeros(k), where=fitted)
+    multiplier = params.slippage_multiplier.astype(float)
+    base = float(slope[fitted].min()) if fitted.any() else 0.0
+    if base > 0:
+        multiplier[fitted] = slope[fitted] / base
+
+    resid = y - base * x * multiplier[codes]
+    ss_tot = np.sum((y - y.mean()) ** 2) if len(y) else 0.0
+    return {
+        "base_slippage": base,
+        "regime_multiplier": multiplier,
+        "fills": count,
+        "r2": float(1.0 - np.sum(resid ** 2) / ss_tot) if ss_tot > 0 else 1.0,
+    }
+
+
+def calibrate_latency(fills, params=None):
+    """
+    Fit LatencyModel parameters to observed fill latencies.
+
+    LatencyModel draws a base latency uniformly from [min_ms, max_ms] and
+    scales it by an integer per-regime multiplier, so each regime's mean
+    latency is its multiplier times the mean base draw. Multipliers are
+    mean latencies relative to the fastest regime, rounded; the base
+    range is the span of latencies divided by their regime's multiplier.
+    Regimes without fills keep their current multiplier.
+
+    Returns:
+        dict: min_ms, max_ms, regime_multiplier (int array by code), fills
+    """
+    params = params if params is not None else RegimeParams.from_config()
+    codes = _regimes(fills)
+    k = NUM_REGIME_CODES
+    latency = np.asarray(fills["latency_ms"], dtype=float)
+    count = np.bincount(codes, minlength=k)
+    multiplier = params.latency_multiplier.copy()
+    fitted = count > 0
+    if not fitted.any():
+        return {"min_ms": 0, "max_ms": 0, "regime_multiplier": multiplier, "fills": count}
+
+    mean_latency = np.divide(np.bincount(codes, weights=latency, minlength=k), count,
+                             out=np.zeros(k), where=fitted)
+    fastest = mean_latency[fitted].min()
+    if fastest > 0:
+        multiplier[fitted] = np.maximum(1, np.rint(mean_latency[fitted] / fastest))
+    else:
+        multiplier[fitted] = 1
+
+    base = latency / multiplier[codes]
+    return {
+        "min_ms": int(np.floor(base.min())),
+        "max_ms": int(np.ceil(base.max())),
+        "regime_multiplier": multiplier,
+        "fills": count,
+    }
+
+
+def calibrate(fills, params=None):
+    """
+    Slippage and latency fits as an execution.yaml-shaped dict, ready for
+    RegimeParams(execution=...) or writing back to config/execution.yaml.
+    """
+    params = params if params is not None else RegimeParams.from_config()
+    slip = calibrate_slippage(fills, params)
+    lat = calibrate_latency(fills, params) if "latency_ms" in fills else None
+
+    def table(values, cast):
+        return {REGIME_LABELS[c] if c else "default": cast(values[c]) for c in range(NUM_REGIME_CODES)}
+
+    out = {
+        "slippage": {
+            "base_slippage": slip["base_slippage"],
+            "regime_multiplier": table(slip["regime_multiplier"], float),
+        }
+    }
+    if lat is not None:
+        out["latency"] = {
+            "min_ms": lat["min_ms"],
+            "max_ms": lat["max_ms"],
+            "regime_multiplier": table(lat["regime_multiplier"], int),
+        }
+    return out
+
+
+def calibrated_models(execution, params=None):
+    """
+    SlippageModel and LatencyModel built from a calibrate() result.
+
+    Returns:
+        (SlippageModel, LatencyModel, RegimeParams)
+    """
+    base = params if params is not None else RegimeParams.from_config()
+    calibrated = RegimeParams(execution=execution)
+    params = base.copy()
+    params.slippage_multiplier = calibrated.slippage_multiplier
+    if "latency" in execution:
+        params.latency_multiplier = calibrated.latency_multiplier
+    latency = execution.get("latency", {})
+    slippage_model = SlippageModel(execution["slippage"]["base_slippage"], params=params)
+    latency_model = LatencyModel(latency.get("min_ms", 1), latency.get("max_ms", 10), params=params)
+    return slippage_model, latency_model, params
@@ -9,17 +9,17 @@ class TWAPExecutor:
         self.latency = LatencyModel()
         self.filler = PartialFillModel()
 
-    def generate_orders(self, total_qty, mid_price, liquidity_score, spread):
+    def generate_orders(self, total_qty, mid_price, liquidity_score, spread, regime=None):
         adj_slices = max(1, int(self.slices * liquidity_score))
         slice_qty = total_qty / adj_slices
 
         orders = []
         for _ in range(adj_slices):
-            latency_ms = self.latency.sample_latency()
+            latency_ms = self.latency.sample_latency(regime)
 
             fill_price = mid_price + spread / 2
             fill_price = self.slippage.apply(
-                fill_price, slice_qty, liquidity_score
+                fill_price, slice_qty, liquidity_score, regime=regime
             )
 
             fill_ratio = self.filler.fill_ratio(liquidity_score)
@@ -27,6 +27,7 @@ class TWAPExecutor:
 
             orders.append({
                 "qty": filled_qty,
+                "order_qty": slice_qty,
                 "price": fill_price,
                 "latency_ms": latency_ms
             })
@@ -27,8 +27,10 @@ class LabeledSlider(QWidget):
 
 # ---------- Tick Table ----------
 class TickTable(QWidget):
-    def __init__(self):
+    """Scrolling table of the latest max_rows ticks (None = unbounded)."""
+    def __init__(self, max_rows=None):
         super().__init__()
+        self.max_rows = max_rows
         layout = QVBoxLayout()
         self.table = QTableWidget()
         self.table.setColumnCount(5)
@@ -39,6 +41,8 @@ class TickTable(QWidget):
         self.setLayout(layout)
 
     def add_tick(self, tick, regime, equity, traded, ret):
+        if self.max_rows is not None and self.table.rowCount() >= self.max_rows:
+            self.table.removeRow(0)
         row = self.table.rowCount()
         self.table.insertRow(row)
         self.table.setItem(row, 0, QTableWidgetItem(str(tick)))
@@ -1,4 +1,9 @@
+import argparse
+
 from engine.engine import RAMMEEngine
+from engine.profiling import StageProfiler
+from engine.checkpoint import Checkpointer, load_checkpoint
+from engine.shm import SnapshotPublisher
 
 from strategy.signal import DirectionalSignal
 from strategy.position import PositionManager
@@ -10,9 +15,34 @@ from execution.latency import LatencyModel
 from backtest.simulator import BacktestSimulator
 from backtest.pnl_attribution import RegimePnLTracker
 from backtest.shock import ShockGenerator
+from backtest.loop import BacktestLoop
+from backtest.eventlog import EventLogWriter
 
 from risk.governor import RiskGovernor
 
+from regime.states import REGIME_LABELS
+
+
+parser = argparse.ArgumentParser(description="RAMME demo backtest")
+parser.add_argument("--ticks", type=int, default=30)
+parser.add_argument("--profile", action="store_true",
+                    help="record per-stage latencies and print a summary")
+parser.add_argument("--trace", default=None,
+                    help="write a Chrome/Perfetto trace JSON (implies --profile)")
+parser.add_argument("--trace-ticks", default="0:100",
+                    help="tick range START:END to include in the trace")
+parser.add_argument("--checkpoint", default=None,
+                    help="path to write checkpoints to")
+parser.add_argument("--checkpoint-every", type=int, default=1000,
+                    help="ticks between checkpoints")
+parser.add_argument("--resume", default=None,
+                    help="resume from a checkpoint file")
+parser.add_argument("--publish", default=None, metavar="NAME",
+                    help="publish snapshots to shared memory NAME (see simulation/monitor.py)")
+parser.add_argument("--event-log", default=None, metavar="PATH",
+                    help="append every tick's inputs and stage outputs to PATH (see simulation/replay_log.py)")
+args = parser.parse_args()
+
 
 # -------------------------
 # Initialization
@@ -36,13 +66,46 @@ risk = RiskGovernor(
 pnl_tracker = RegimePnLTracker()
 shock = ShockGenerator()
 
+profiler = None
+if args.profile or args.trace:
+    start, end = (int(x) for x in args.trace_ticks.split(":"))
+    profiler = StageProfiler(trace_ticks=(start, end) if args.trace else None)
+
+loop = BacktestLoop(
+    engine=engine,
+    signal_engine=signal_engine,
+    position_mgr=position_mgr,
+    fill_model=fill_model,
+    slippage_model=slippage_model,
+    latency_model=latency_model,
+    sim=sim,
+    risk=risk,
+    pnl_tracker=pnl_tracker,
+    profiler=profiler,
+)
+
 price = 100.0
+start_tick = 0
+
+if args.resume:
+    state = load_checkpoint(args.resume)
+    loop, shock, price, start_tick = state["loop"], state["shock"], state["price"], state["tick"]
+    engine, pnl_tracker = loop.engine, loop.pnl_tracker
+    if profiler is not None:
+        loop.enable_profiling(profiler)
+    profiler = loop.profiler
+
+checkpointer = Checkpointer(args.checkpoint, every=args.checkpoint_every) if args.checkpoint else None
+publisher = SnapshotPublisher(args.publish) if args.publish else None
+# A resumed loop keeps the log it was checkpointed with
+if args.event_log and loop.event_log is None:
+    loop.enable_logging(EventLogWriter(args.event_log, features=engine.feature_set))
 
 
 # -------------------------
 # Main simulation loop
 # -------------------------
-for tick in range(30):
+for tick in range(start_tick, args.ticks):
     price = shock.apply(price)
 
     bid = price - 0.1
@@ -53,63 +116,38 @@ for tick in range(30):
 
     engine.orderbook.update(bids, asks)
 
-    mid_price, regime, features = engine.on_tick(bid, ask, 10, 10)
-
-    # -------------------------
-    # Strategy
-    # -------------------------
-    ret = features.get("return", 0.0)
-    volatility = features.get("volatility", 0.01)
-
-    signal, strength = signal_engine.generate(ret, regime, volatility)
-
-    target_pos = position_mgr.target_position(signal, strength)
-    delta = position_mgr.delta(target_pos)
-
-    traded = False
+    # Strategy, risk checks, execution and accounting
+    mid_price, regime, features, equity, traded, alive = loop.step(bid, ask, 10, 10)
 
-    # -------------------------
-    # Risk checks
-    # -------------------------
-    if delta != 0 and risk.allow_trade(regime, position_mgr.exposure()):
-        liquidity = features.get("liquidity", 0.5)
+    if publisher is not None:
+        publisher.publish(tick, mid_price, regime, features, equity, loop.sim.position, bid, ask)
 
-        fill_ratio = fill_model.fill_ratio(liquidity, abs(delta))
+    print(f"Tick {tick:02d} | Regime: {REGIME_LABELS[regime]} | Equity: {equity:.2f}")
 
-        latency_ms = latency_model.sample_latency(regime)
-        drifted_price = latency_model.apply_price_drift(mid_price, latency_ms, volatility)
-
-        executed_price = slippage_model.apply(
-            drifted_price,
-            abs(delta),
-            liquidity,
-            side=1 if delta > 0 else -1,
-            regime=regime
-        )
-
-        equity = sim.step(
-            target_delta=delta,
-            mid_price=mid_price,
-            fill_ratio=fill_ratio,
-            executed_price=executed_price
-        )
-
-        position_mgr.update(delta * fill_ratio)
-        traded = True
-    else:
-        equity = sim.mark_to_market(mid_price)
-
-    pnl_tracker.update(regime, equity, traded=traded)
-
-    print(f"Tick {tick:02d} | Regime: {regime} | Equity: {equity:.2f}")
-
-    if not risk.update(equity):
+    if not alive:
         print("KILL SWITCH TRIGGERED")
         break
 
+    if checkpointer is not None:
+        checkpointer.maybe_save(tick, {"loop": loop, "shock": shock, "price": price, "tick": tick + 1})
+
 
 # -------------------------
 # Final Report
 # -------------------------
 print("\nPnL Attribution by Regime:")
 print(pnl_tracker.report())
+
+if profiler is not None:
+    print("\nStage latencies:")
+    print(profiler.format_report())
+    if args.trace:
+        profiler.export_chrome_trace(args.trace)
+        print(f"Trace written to {args.trace}")
+
+if publisher is not None:
+    publisher.close()
+    publisher.unlink()
+
+if loop.event_log is not None:
+    loop.event_log.close()
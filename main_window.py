@@ -2,6 +2,7 @@
 
 import sys
 import random
+from collections import deque
 import pandas as pd
 from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFileDialog, QPushButton
 
@@ -35,6 +36,11 @@ QProgressBar { background-color: #2e2e4d; color: #fff; border-radius: 5px; }
 QProgressBar::chunk { background-color: #4b4b7d; }
 """
 
+# Ticks kept for the plots and CSV export; summary stats come from the
+# PnL tracker, so memory stays flat however long the clock runs
+PLOT_WINDOW = 5000
+TABLE_ROWS = 500
+
 class RAMMEWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -71,7 +77,7 @@ class RAMMEWindow(QMainWindow):
         self.stats_panel = SummaryStatsPanel()
         self.control_panel.addWidget(self.stats_panel)
 
-        self.tick_table = TickTable()
+        self.tick_table = TickTable(max_rows=TABLE_ROWS)
         self.control_panel.addWidget(self.tick_table)
 
 
@@ -96,7 +102,7 @@ class RAMMEWindow(QMainWindow):
         # -----------------------
         # Simulation Variables
         # -----------------------
-        self.tick_data = []
+        self.tick_data = deque(maxlen=PLOT_WINDOW)
         self.clock = None  # will hold SimulationClock
 
         # -----------------------
@@ -129,7 +135,7 @@ class RAMMEWindow(QMainWindow):
     def reset_simulation(self):
         if self.clock:
             self.clock.stop()
-        self.tick_data = []
+        self.tick_data = deque(maxlen=PLOT_WINDOW)
         self.equity_plot.update_plot([])
         self.pnl_plot.update_plot([])
         self.tick_table.table.setRowCount(0)
@@ -144,7 +150,7 @@ class RAMMEWindow(QMainWindow):
     # -----------------------
     def init_simulation(self):
         self.tick = 0
-        self.tick_data = []
+        self.tick_data = deque(maxlen=PLOT_WINDOW)
         self.max_ticks = self.tick_input.get_value()
         initial_cash = self.equity_input.get_value()
         self.vol_base = self.vol_slider.get_value() / 1000
@@ -157,7 +163,7 @@ class RAMMEWindow(QMainWindow):
         self.fill_model = PartialFillModel()
         self.slippage_model = SlippageModel()
         self.latency_model = LatencyModel()
-        self.sim = BacktestSimulator(initial_cash=initial_cash)
+        self.sim = BacktestSimulator(initial_cash=initial_cash, max_history=PLOT_WINDOW)
         self.risk = RiskGovernor(max_drawdown=max_dd)
         self.pnl_tracker = RegimePnLTracker()
         self.shock = ShockGenerator()
@@ -224,12 +230,13 @@ class RAMMEWindow(QMainWindow):
         self.tick_table.add_tick(self.tick, regime, equity, traded, ret)
 
         # --- Update summary stats ---
+        report = self.pnl_tracker.report()
         stats = {}
         for r in ["VOLATILE", "TREND", "MEAN_REVERT"]:
-            pnl = sum(d["equity"] - self.tick_data[0]["equity"] if d["regime"] == r else 0 for d in self.tick_data)
-            trades = sum(1 for d in self.tick_data if d["regime"] == r and d["traded"])
-            max_dd = min([d["equity"] for d in self.tick_data if d["regime"] == r] + [equity]) - self.tick_data[0]["equity"]
-            stats[r] = {"PnL": round(pnl,2), "Trades": trades, "Max Drawdown": round(abs(max_dd),2)}
+            pnl = report["pnl"].get(r, 0.0)
+            trades = report["trades"].get(r, 0)
+            max_dd = report["max_drawdown"].get(r, 0.0)
+            stats[r] = {"PnL": round(pnl,2), "Trades": trades, "Max Drawdown": f"{max_dd:.2%}"}
         self.stats_panel.update_stats(stats)
 
         self.tick += 1
@@ -240,7 +247,7 @@ class RAMMEWindow(QMainWindow):
     def save_csv(self):
         if not self.tick_data:
             return
-        df = pd.DataFrame(self.tick_data)
+        df = pd.DataFrame(list(self.tick_data))
         path, _ = QFileDialog.getSaveFileName(self, "Save CSV", "", "CSV Files (*.csv)")
         if path:
             df.to_csv(path, index=False)
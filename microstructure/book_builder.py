@@ -0,0 +1,466 @@
+# File: microstructure/book_builder.py
+import numpy as np
+
+from data.itch import (
+    ADD, ADD_MPID, CANCEL, DELETE, EXECUTE, EXECUTE_PRICE, MESSAGE_COLUMNS,
+    PRICE_SCALE, REPLACE, iter_messages,
+)
+from engine.jit import njit
+
+
+# Open-addressing order index: linear probing over a power-of-two table,
+# Fibonacci-style multiplicative hash (the top bits of ref * HASH_MULT),
+# backward-shift deletion so lookups never walk over tombstones.
+EMPTY = -1
+HASH_MULT = 0x5851F42D4C957F2D
+MAX_LOAD = 0.7
+
+# Kernel status codes
+OK = 0
+INDEX_FULL = 1
+SNAPSHOTS_FULL = 2
+PRICE_RANGE = 3
+
+# Persistent scalars, kept in one int64 array between kernel calls
+_BEST_BID, _BEST_ASK, _ORDERS, _BID_LEVELS, _ASK_LEVELS = 0, 1, 2, 3, 4
+_SINCE, _NEXT_TS, _VOLUME, _UNKNOWN, _BAD_PRICE = 5, 6, 7, 8, 9
+_STATE_SIZE = 10
+
+
+@njit(cache=True)
+def _home(key, shift, mask):
+    return ((int(key) * HASH_MULT) >> shift) & mask
+
+
+@njit(cache=True)
+def _slot(keys, key, shift, mask):
+    """
+    Slot holding key, or the empty slot where it would be inserted.
+    """
+    i = _home(key, shift, mask)
+    while True:
+        k = keys[i]
+        if k == key or k == EMPTY:
+            return i
+        i = (i + 1) & mask
+
+
+@njit(cache=True)
+def _remove(keys, o_side, o_level, o_shares, i, shift, mask):
+    """
+    Empty slot i, shifting later entries of the probe run back into it.
+    """
+    j = i
+    while True:
+        j = (j + 1) & mask
+        k = keys[j]
+        if k == EMPTY:
+            break
+        h = _home(k, shift, mask)
+        # The entry at j may move to i unless its home lies in (i, j]
+        if (j > i and (h <= i or h > j)) or (j < i and h <= i and h > j):
+            keys[i] = k
+            o_side[i] = o_side[j]
+            o_level[i] = o_level[j]
+            o_shares[i] = o_shares[j]
+            i = j
+    keys[i] = EMPTY
+
+
+@njit(cache=True)
+def _reduce(side, level, qty, bid_qty, ask_qty, state):
+    if qty == 0:
+        return
+    # Counting non-empty levels bounds every scan: an emptied side resets
+    # its best price instead of walking the whole ladder
+    if side > 0:
+        bid_qty[level] -= qty
+        if bid_qty[level] == 0:
+            state[_BID_LEVELS] -= 1
+            if level == state[_BEST_BID]:
+                b = -1
+                if state[_BID_LEVELS] > 0:
+                    b = level - 1
+                    while bid_qty[b] == 0:
+                        b -= 1
+                state[_BEST_BID] = b
+    else:
+        ask_qty[level] -= qty
+        if ask_qty[level] == 0:
+            state[_ASK_LEVELS] -= 1
+            if level == state[_BEST_ASK]:
+                a = ask_qty.shape[0]
+                if state[_ASK_LEVELS] > 0:
+                    a = level + 1
+                    while ask_qty[a] == 0:
+                        a += 1
+                state[_BEST_ASK] = a
+
+
+@njit(cache=True)
+def _add(side, level, qty, bid_qty, ask_qty, state):
+    state[_ORDERS] += 1
+    if qty == 0:
+        return
+    if side > 0:
+        if bid_qty[level] == 0:
+            state[_BID_LEVELS] += 1
+        bid_qty[level] += qty
+        if level > state[_BEST_BID]:
+            state[_BEST_BID] = level
+    else:
+        if ask_qty[level] == 0:
+            state[_ASK_LEVELS] += 1
+        ask_qty[level] += qty
+        if level < state[_BEST_ASK]:
+            state[_BEST_ASK] = level
+
+
+@njit(cache=True)
+def _snapshot(k, stamp, tick, bid_qty, ask_qty, state,
+              s_ts, s_bid_px, s_bid_sz, s_ask_px, s_ask_sz, s_volume, s_orders):
+    depth = s_bid_px.shape[1]
+    s_ts[k] = stamp
+    b = state[_BEST_BID]
+    filled = min(depth, state[_BID_LEVELS])
+    for d in range(filled):
+        while bid_qty[b] == 0:
+            b -= 1
+        s_bid_px[k, d] = b * tick
+        s_bid_sz[k, d] = bid_qty[b]
+        b -= 1
+    for d in range(filled, depth):
+        s_bid_px[k, d] = 0
+        s_bid_sz[k, d] = 0
+    a = state[_BEST_ASK]
+    filled = min(depth, state[_ASK_LEVELS])
+    for d in range(filled):
+        while ask_qty[a] == 0:
+            a += 1
+        s_ask_px[k, d] = a * tick
+        s_ask_sz[k, d] = ask_qty[a]
+        a += 1
+    for d in range(filled, depth):
+        s_ask_px[k, d] = 0
+        s_ask_sz[k, d] = 0
+    s_volume[k] = state[_VOLUME]
+    s_orders[k] = state[_ORDERS]
+    state[_VOLUME] = 0
+
+
+@njit(cache=True)
+def apply_messages(kind, locate, ts, ref, new_ref, side, shares, price, start,
+                   only_locate, interval_messages, interval_ns, tick, max_orders,
+                   keys, o_side, o_level, o_shares, bid_qty, ask_qty, state,
+                   s_ts, s_bid_px, s_bid_sz, s_ask_px, s_ask_sz, s_volume, s_orders, n_snap):
+    """
+    Apply decoded messages from index start to the book, emitting top-N
+    snapshots into the s_* arrays from row n_snap on.
+
+    Returns:
+        (next message index, snapshots written so far, status); a status
+        other than OK means the message at the returned index was not
+        applied and the caller must make room (or give up) first
+    """
+    mask = keys.shape[0] - 1
+    shift = 64
+    size = keys.shape[0]
+    while size > 1:
+        size >>= 1
+        shift -= 1
+    n_levels = bid_qty.shape[0]
+    cap = s_ts.shape[0]
+
+    for i in range(start, kind.shape[0]):
+        if only_locate > 0 and locate[i] != only_locate:
+            continue
+        if n_snap >= cap:
+            return i, n_snap, SNAPSHOTS_FULL
+        t = kind[i]
+
+        # Clock snapshots show the book as of the interval boundary, i.e.
+        # before the first message at or after it
+        if interval_ns > 0:
+            if state[_NEXT_TS] == 0:
+                state[_NEXT_TS] = (ts[i] // interval_ns + 1) * interval_ns
+            elif ts[i] >= state[_NEXT_TS]:
+                _snapshot(n_snap, state[_NEXT_TS], tick, bid_qty, ask_qty, state,
+                          s_ts, s_bid_px, s_bid_sz, s_ask_px, s_ask_sz, s_volume, s_orders)
+                n_snap += 1
+                state[_NEXT_TS] = (ts[i] // interval_ns + 1) * interval_ns
+                if n_snap >= cap:
+                    return i, n_snap, SNAPSHOTS_FULL
+
+        if t == ADD or t == ADD_MPID:
+            if state[_ORDERS] >= max_orders:
+                return i, n_snap, INDEX_FULL
+            level = price[i] // tick
+            if level < 0 or level >= n_levels:
+                state[_BAD_PRICE] = price[i]
+                return i, n_snap, PRICE_RANGE
+            j = _slot(keys, ref[i], shift, mask)
+            if keys[j] == ref[i]:
+                state[_UNKNOWN] += 1
+                continue
+            keys[j] = ref[i]
+            o_side[j] = side[i]
+            o_level[j] = level
+            o_shares[j] = shares[i]
+            _add(side[i], level, shares[i], bid_qty, ask_qty, state)
+        elif t == EXECUTE or t == EXECUTE_PRICE or t == CANCEL or t == DELETE:
+            j = _slot(keys, ref[i], shift, mask)
+            if keys[j] != ref[i]:
+                state[_UNKNOWN] += 1
+                continue
+            qty = o_shares[j] if t == DELETE else min(shares[i], o_shares[j])
+            if t == EXECUTE or t == EXECUTE_PRICE:
+                state[_VOLUME] += qty
+            o_shares[j] -= qty
+            s = o_side[j]
+            if o_shares[j] == 0:
+                state[_ORDERS] -= 1
+                level = o_level[j]
+                _remove(keys, o_side, o_level, o_shares, j, shift, mask)
+                _reduce(s, level, qty, bid_qty, ask_qty, state)
+            else:
+                _reduce(s, o_level[j], qty, bid_qty, ask_qty, state)
+        elif t == REPLACE:
+            j = _slot(keys, ref[i], shift, mask)
+            if keys[j] != ref[i]:
+                state[_UNKNOWN] += 1
+                continue
+            level = price[i] // tick
+            if level < 0 or level >= n_levels:
+                state[_BAD_PRICE] = price[i]
+                return i, n_snap, PRICE_RANGE
+            s = o_side[j]
+            old_level = o_level[j]
+            old_qty = o_shares[j]
+            state[_ORDERS] -= 1
+            _remove(keys, o_side, o_level, o_shares, j, shift, mask)
+            _reduce(s, old_level, old_qty, bid_qty, ask_qty, state)
+            j = _slot(keys, new_ref[i], shift, mask)
+            if keys[j] == new_ref[i]:
+                state[_UNKNOWN] += 1
+                continue
+            keys[j] = new_ref[i]
+            o_side[j] = s
+            o_level[j] = level
+            o_shares[j] = shares[i]
+            _add(s, level, shares[i], bid_qty, ask_qty, state)
+        else:
+            continue
+
+        if interval_messages > 0:
+            state[_SINCE] += 1
+            if state[_SINCE] >= interval_messages:
+                _snapshot(n_snap, ts[i], tick, bid_qty, ask_qty, state,
+                          s_ts, s_bid_px, s_bid_sz, s_ask_px, s_ask_sz, s_volume, s_orders)
+                n_snap += 1
+                state[_SINCE] = 0
+
+    return kind.shape[0], n_snap, OK
+
+
+class BookBuilder:
+    """
+    Full-depth limit order book rebuilt from ITCH-style order messages
+    (data/itch.py), emitting top-N snapshots for the engine.
+
+    Live orders are kept in an open-addressing hash index (ref -> side,
+    price level, shares) that grows by rehashing; depth per price level
+    lives in two dense price ladders, so adds, executions, cancels,
+    deletes and replaces are O(1) and the best bid/ask only moves by a
+    scan when its level empties. Messages are applied in bulk by a Numba
+    kernel when Numba is installed.
+    """
+
+    def __init__(self, depth=10, tick=100, ladder_size=1 << 20, locate=0,
+                 interval_messages=0, interval_ns=0, capacity=1 << 16,
+                 snapshot_buffer=1 << 14):
+        """
+        Parameters:
+            depth             : levels per side in each snapshot
+            tick              : price level width in ITCH price units
+                                (1/10000; 100 = one cent); sub-tick prices
+                                are grouped into the level below
+            ladder_size       : price levels per side (prices up to
+                                ladder_size * tick)
+            locate            : stock locate code to build (0 = all messages,
+                                for single-stock files)
+            interval_messages : snapshot after every this many applied messages
+            interval_ns       : snapshot at every multiple of this many ns
+                                (book as of the boundary); set one of the two
+            capacity          : initial order index size (grows as needed)
+            snapshot_buffer   : snapshot rows allocated per kernel call
+        """
+        if interval_messages and interval_ns:
+            raise ValueError("set interval_messages or interval_ns, not both")
+        if depth < 1 or tick < 1 or ladder_size < 1:
+            raise ValueError("depth, tick and ladder_size must be positive")
+        self.depth = depth
+        self.tick = tick
+        self.locate = locate
+        self.interval_messages = interval_messages
+        self.interval_ns = interval_ns
+        self.snapshot_buffer = snapshot_buffer
+
+        self.bid_qty = np.zeros(ladder_size, dtype=np.int64)
+        self.ask_qty = np.zeros(ladder_size, dtype=np.int64)
+        self.state = np.zeros(_STATE_SIZE, dtype=np.int64)
+        self.state[_BEST_BID] = -1
+        self.state[_BEST_ASK] = ladder_size
+        self._allocate(1 << max(int(capacity - 1).bit_length(), 4))
+
+    def _allocate(self, size):
+        self.keys = np.full(size, EMPTY, dtype=np.int64)
+        self.o_side = np.zeros(size, dtype=np.int8)
+        self.o_level = np.zeros(size, dtype=np.int64)
+        self.o_shares = np.zeros(size, dtype=np.int64)
+
+    def _grow(self):
+        """
+        Double the order index and reinsert every live order.
+        """
+        live = self.keys != EMPTY
+        keys, side = self.keys[live], self.o_side[live]
+        level, shares = self.o_level[live], self.o_shares[live]
+        self._allocate(2 * len(self.keys))
+        _rehash(keys, side, level, shares, self.keys, self.o_side, self.o_level, self.o_shares)
+
+    def __len__(self):
+        """
+        Live orders.
+        """
+        return int(self.state[_ORDERS])
+
+    @property
+    def unknown(self):
+        """
+        Messages skipped because they referenced an order not in the book
+        (e.g. added before the archive starts) or re-used a live ref.
+        """
+        return int(self.state[_UNKNOWN])
+
+    def apply(self, cols):
+        """
+        Apply one chunk of decoded messages.
+
+        Returns:
+            snapshots emitted during the chunk (see snapshots())
+        """
+        args = [np.ascontiguousarray(cols[name]) for name, _ in MESSAGE_COLUMNS
+                if name != "stock"]
+        parts = []
+        start = 0
+        n = len(args[0])
+        while True:
+            snaps = _snapshot_arrays(self.snapshot_buffer, self.depth)
+            max_orders = int(MAX_LOAD * len(self.keys))
+            start, count, status = apply_messages(
+                *args, start, self.locate, self.interval_messages, self.interval_ns,
+                self.tick, max_orders,
+                self.keys, self.o_side, self.o_level, self.o_shares,
+                self.bid_qty, self.ask_qty, self.state,
+                *snaps, 0,
+            )
+            parts.append(tuple(a[:count] for a in snaps))
+            if status == INDEX_FULL:
+                self._grow()
+            elif status == PRICE_RANGE:
+                raise ValueError(
+                    f"price {self.state[_BAD_PRICE] / PRICE_SCALE} outside the ladder "
+                    f"(0 to {len(self.bid_qty) * self.tick / PRICE_SCALE}); raise ladder_size or tick"
+                )
+            elif status == OK or start >= n:
+                break
+        return _snapshot_dict(parts, self.depth)
+
+    def build(self, path, chunk_messages=1 << 20):
+        """
+        Rebuild the book over a whole archive file; returns all snapshots.
+        """
+        parts = [self.apply(cols) for cols in iter_messages(path, chunk_messages)]
+        if not parts:
+            return _snapshot_dict([], self.depth)
+        return {name: np.concatenate([p[name] for p in parts]) for name in parts[0]}
+
+    def top(self, depth=None):
+        """
+        Current book as (bids, asks) lists of (price, size), best first.
+        """
+        snaps = _snapshot_arrays(1, depth or self.depth)
+        volume = self.state[_VOLUME]
+        _snapshot(0, 0, self.tick, self.bid_qty, self.ask_qty, self.state, *snaps)
+        self.state[_VOLUME] = volume
+        out = _snapshot_dict([snaps], depth or self.depth)
+        return _levels(out, "bid", 0), _levels(out, "ask", 0)
+
+
+@njit(cache=True)
+def _rehash(keys, side, level, shares, t_keys, t_side, t_level, t_shares):
+    mask = t_keys.shape[0] - 1
+    shift = 64
+    size = t_keys.shape[0]
+    while size > 1:
+        size >>= 1
+        shift -= 1
+    for k in range(keys.shape[0]):
+        j = _slot(t_keys, keys[k], shift, mask)
+        t_keys[j] = keys[k]
+        t_side[j] = side[k]
+        t_level[j] = level[k]
+        t_shares[j] = shares[k]
+
+
+def _snapshot_arrays(n, depth):
+    return (
+        np.zeros(n, dtype=np.int64),
+        np.zeros((n, depth), dtype=np.int64), np.zeros((n, depth), dtype=np.int64),
+        np.zeros((n, depth), dtype=np.int64), np.zeros((n, depth), dtype=np.int64),
+        np.zeros(n, dtype=np.int64), np.zeros(n, dtype=np.int64),
+    )
+
+
+def _snapshot_dict(parts, depth):
+    """
+    Snapshot columns: ts (ns), bid_price / ask_price (n, depth) floats
+    with 0 for missing levels, bid_size / ask_size (n, depth), volume
+    executed since the previous snapshot and live order count.
+    """
+    if not parts:
+        parts = [_snapshot_arrays(0, depth)]
+    ts, bid_px, bid_sz, ask_px, ask_sz, volume, orders = (
+        np.concatenate(col) for col in zip(*parts))
+    return {
+        "ts": ts,
+        "bid_price": bid_px / PRICE_SCALE,
+        "bid_size": bid_sz,
+        "ask_price": ask_px / PRICE_SCALE,
+        "ask_size": ask_sz,
+        "volume": volume,
+        "orders": orders,
+    }
+
+
+def _levels(snaps, side, k):
+    prices, sizes = snaps[f"{side}_price"][k], snaps[f"{side}_size"][k]
+    return [(float(p), int(s)) for p, s in zip(prices, sizes) if s > 0]
+
+
+def book_ticks(snaps, orderbook=None):
+    """
+    Snapshots as engine ticks (bid, ask, bid_size, ask_size), skipping
+    snapshots with an empty side. If orderbook (e.g. RAMMEEngine.orderbook,
+    built with levels=depth) is given it is updated with the full depth
+    before each tick is yielded.
+    """
+    bid_px, ask_px = snaps["bid_price"], snaps["ask_price"]
+    bid_sz, ask_sz = snaps["bid_size"], snaps["ask_size"]
+    ok = np.flatnonzero((bid_sz[:, 0] > 0) & (ask_sz[:, 0] > 0))
+    best = (bid_px[ok, 0].tolist(), ask_px[ok, 0].tolist(),
+            bid_sz[ok, 0].tolist(), ask_sz[ok, 0].tolist())
+    for i, k in enumerate(ok.tolist()):
+        if orderbook is not None:
+            orderbook.update(_levels(snaps, "bid", k), _levels(snaps, "ask", k))
+        yield best[0][i], best[1][i], best[2][i], best[3][i]
@@ -1,16 +1,30 @@
 import numpy as np
 
 class LiquidityEstimator:
-    def __init__(self, window=50):
+    def __init__(self, window=50, store=None):
+        """
+        store : optional microstructure.rolling.RollingStore; the spread
+                series is then read from the shared store (fed by the
+                feature pipeline's "spread:window" step) instead of being
+                kept here
+        """
         self.history = []  # store tuples of (spread, bid_size, ask_size)
         self.window = window
+        self.store = store
+        self._spreads = store.require("spread", window) if store is not None else None
 
     def update(self, spread, bid_size=None, ask_size=None):
+        if self._spreads is not None:
+            return
         self.history.append((spread, bid_size, ask_size))
         if len(self.history) > self.window:
             self.history.pop(0)
 
     def liquidity_score(self):
+        if self._spreads is not None:
+            if not self._spreads.count:
+                return 0.0
+            return 1.0 / (self._spreads.mean(self.window) + 1e-6)
         if not self.history:
             return 0.0
         avg_spread = np.mean([h[0] for h in self.history])
@@ -0,0 +1,308 @@
+# File: microstructure/registry.py
+from collections import deque
+import math
+
+from microstructure.features import MicrostructureFeatures
+from microstructure.liquidity import LiquidityEstimator
+from microstructure.orderbook import OrderBook
+from microstructure.rolling import RollingStore
+from microstructure.toxicity import ToxicityEstimator
+
+# Raw per-tick inputs every pipeline receives
+INPUTS = ("bid", "ask", "bid_size", "ask_size")
+
+
+class FeatureSpec:
+    """
+    Declaration of one feature: its dependencies, default window and a
+    factory building the per-run compute function.
+
+    factory(context, window) must return a callable taking the dict of
+    values computed so far this tick and returning the feature value.
+    context is a dict of shared components (e.g. the engine's estimators);
+    a factory may reuse them or build its own.
+    """
+
+    def __init__(self, name, deps, window, factory):
+        self.name = name
+        self.deps = tuple(deps)
+        self.window = window
+        self.factory = factory
+
+
+FEATURE_REGISTRY = {}
+
+
+def register_feature(name, deps=(), window=None, registry=None):
+    """
+    Decorator registering a feature factory under name.
+
+    Parameters:
+        name     : feature name
+        deps     : names of inputs/features this feature reads
+        window   : default window size (None for stateless features)
+        registry : target registry (defaults to FEATURE_REGISTRY)
+    """
+    target = FEATURE_REGISTRY if registry is None else registry
+
+    def wrap(factory):
+        target[name] = FeatureSpec(name, deps, window, factory)
+        return factory
+
+    return wrap
+
+
+# -------------------------
+# Multi-horizon rolling features
+# -------------------------
+# Any registered feature can be requested as a rolling statistic without
+# registering it first:
+#     "<series>:window"              feeds the series into the shared store
+#     "<series>:<stat>:<window>"     e.g. "return:std:200", "spread:mean:10"
+# All windows of a series share one RollingWindow in context["rolling"].
+ROLLING_STATS = ("mean", "var", "std", "mean_abs", "agree", "entropy")
+
+
+def lookup(name, registry=None):
+    """
+    FeatureSpec for name, including the rolling-statistic names above.
+    """
+    registry = FEATURE_REGISTRY if registry is None else registry
+    spec = registry.get(name)
+    if spec is not None:
+        return spec
+
+    parts = name.split(":")
+    if len(parts) == 2 and parts[1] == "window":
+        return FeatureSpec(name, (parts[0],), None, _rolling_feed(parts[0]))
+    if len(parts) == 3 and parts[1] in ROLLING_STATS and parts[2].isdigit():
+        series, stat, window = parts[0], parts[1], int(parts[2])
+        return FeatureSpec(name, (series + ":window",), window, _rolling_stat(series, stat))
+    raise KeyError(f"Unknown feature: {name}")
+
+
+def _rolling_store(context):
+    store = context.get("rolling")
+    if store is None:
+        store = context["rolling"] = RollingStore()
+    return store
+
+
+class _Feed:
+    """
+    Appends a series' value to its shared RollingWindow.
+    """
+
+    def __init__(self, window, key):
+        self.window = window
+        self.key = key
+
+    def __call__(self, v):
+        self.window.append(v[self.key])
+        return self.window
+
+
+class _Stat:
+    """
+    Reads one statistic of a RollingWindow.
+    """
+
+    def __init__(self, feed, stat, window):
+        self.feed = feed
+        self.stat = stat
+        self.window = window
+
+    def __call__(self, v):
+        return getattr(v[self.feed], self.stat)(self.window)
+
+
+def _rolling_feed(series):
+    def factory(context, window):
+        return _Feed(_rolling_store(context).require(series, 1), series)
+    return factory
+
+
+def _rolling_stat(series, stat):
+    def factory(context, window):
+        # Grows the shared window before the first tick if needed
+        _rolling_store(context).require(series, window)
+        return _Stat(series + ":window", stat, window)
+    return factory
+
+
+def resolve(requested, registry=None):
+    """
+    Dependency closure of the requested features in evaluation order.
+
+    Returns:
+        list of feature names, dependencies before dependants
+    """
+    registry = FEATURE_REGISTRY if registry is None else registry
+    order = []
+    state = {}  # name -> "visiting" | "done"
+
+    def visit(name, path):
+        if name in INPUTS or state.get(name) == "done":
+            return
+        if state.get(name) == "visiting":
+            raise ValueError(f"Feature dependency cycle: {' -> '.join(path + [name])}")
+        spec = lookup(name, registry)
+        state[name] = "visiting"
+        for dep in spec.deps:
+            visit(dep, path + [name])
+        state[name] = "done"
+        order.append(name)
+
+    for name in requested:
+        visit(name, [])
+    return order
+
+
+class FeaturePipeline:
+    """
+    Evaluates the requested features (and only their dependencies) once
+    per tick in topological order, sharing intermediates such as mid and
+    returns between features.
+    """
+
+    def __init__(self, requested, context=None, windows=None, registry=None):
+        """
+        Parameters:
+            requested : feature names to compute
+            context   : dict of shared components passed to the factories
+            windows   : optional {feature: window} overrides
+            registry  : feature registry (defaults to FEATURE_REGISTRY)
+        """
+        registry = FEATURE_REGISTRY if registry is None else registry
+        context = context or {}
+        windows = windows or {}
+
+        self.requested = tuple(requested)
+        self.order = resolve(self.requested, registry)
+        specs = [lookup(name, registry) for name in self.order]
+        self._steps = [
+            (spec.name, spec.factory(context, windows.get(spec.name, spec.window)))
+            for spec in specs
+        ]
+
+    def evaluate(self, bid, ask, bid_size, ask_size):
+        """
+        Compute all features for one tick.
+
+        Returns:
+            dict of inputs, intermediates and requested features
+        """
+        values = {"bid": bid, "ask": ask, "bid_size": bid_size, "ask_size": ask_size}
+        for name, compute in self._steps:
+            values[name] = compute(values)
+        return values
+
+
+# -------------------------
+# Built-in features
+# -------------------------
+# Compute steps are small callable objects rather than closures so that a
+# pipeline (and the engine holding it) can be pickled for checkpoints.
+class _Apply:
+    """
+    Calls fn with the listed values, optionally floored.
+    """
+
+    def __init__(self, fn, keys, floor=None):
+        self.fn = fn
+        self.keys = tuple(keys)
+        self.floor = floor
+
+    def __call__(self, v):
+        out = self.fn(*[v[k] for k in self.keys])
+        return out if self.floor is None else max(out, self.floor)
+
+
+class _Estimate:
+    """
+    Feeds the listed values to est.update() and returns score(), floored.
+    """
+
+    def __init__(self, est, keys, score, floor=None):
+        self.est = est
+        self.keys = tuple(keys)
+        self.score = score
+        self.floor = floor
+
+    def __call__(self, v):
+        self.est.update(*[v[k] for k in self.keys])
+        out = getattr(self.est, self.score)()
+        return out if self.floor is None else max(self.floor, out)
+
+
+class _RollingStd:
+    """
+    Rolling standard deviation from running sums.
+    """
+
+    def __init__(self, key, window):
+        self.key = key
+        self.window = window
+        self.buf = deque()
+        self.sum = 0.0
+        self.sum_sq = 0.0
+
+    def __call__(self, v):
+        r = v[self.key]
+        self.buf.append(r)
+        self.sum += r
+        self.sum_sq += r * r
+        if len(self.buf) > self.window:
+            old = self.buf.popleft()
+            self.sum -= old
+            self.sum_sq -= old * old
+        n = len(self.buf)
+        mean = self.sum / n
+        return math.sqrt(max(self.sum_sq / n - mean * mean, 0.0))
+
+
+def _features(context):
+    return context.get("features") or MicrostructureFeatures()
+
+
+@register_feature("mid", deps=("bid", "ask"))
+def _mid(context, window):
+    return _Apply(_features(context).compute_mid_price, ("bid", "ask"))
+
+
+@register_feature("spread", deps=("bid", "ask"))
+def _spread(context, window):
+    return _Apply(_features(context).bid_ask_spread, ("bid", "ask"), floor=0.0)
+
+
+@register_feature("return", deps=("mid",))
+def _return(context, window):
+    return _Apply(_features(context).price_return, ("mid",))
+
+
+@register_feature("order_imbalance", deps=("bid_size", "ask_size"))
+def _order_imbalance(context, window):
+    return _Apply(_features(context).order_imbalance, ("bid_size", "ask_size"))
+
+
+@register_feature("book_imbalance")
+def _book_imbalance(context, window):
+    book = context.get("orderbook") or OrderBook()
+    return _Apply(book.imbalance, ())
+
+
+@register_feature("liquidity", deps=("spread", "bid_size", "ask_size"), window=50)
+def _liquidity(context, window):
+    est = context.get("liquidity") or LiquidityEstimator(window=window)
+    return _Estimate(est, ("spread", "bid_size", "ask_size"), "liquidity_score", floor=0.0)
+
+
+@register_feature("toxicity", deps=("return",), window=20)
+def _toxicity(context, window):
+    est = context.get("toxicity") or ToxicityEstimator(window=window)
+    return _Estimate(est, ("return",), "toxicity_score")
+
+
+@register_feature("volatility", deps=("return",), window=20)
+def _volatility(context, window):
+    return _RollingStd("return", window)
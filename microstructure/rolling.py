@@ -0,0 +1,206 @@
+# File: microstructure/rolling.py
+import numpy as np
+
+# A window difference this small relative to the prefix values it came
+# from has lost most of its digits to cancellation (e.g. a large jump still
+# inside the prefix); such queries are recomputed from the raw values
+CANCELLATION_TOL = 1e-9
+
+
+class RollingWindow:
+    """
+    One raw series held once in a ring buffer, with prefix sums of x, x^2,
+    |x| and consecutive sign agreement. Mean, variance, mean |x| and sign
+    agreement over any window up to capacity are O(1) differences of two
+    prefix values, so several horizons (e.g. 10/50/200) cost one append.
+
+    Prefix sums are rebuilt from the ring every capacity appends, so they
+    only ever span the last 2 x capacity values.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = 0
+        self.resize(capacity)
+
+    def resize(self, capacity):
+        """
+        Set the capacity. Only allowed before the first append.
+        """
+        if getattr(self, "count", 0):
+            raise ValueError("Cannot resize a RollingWindow that already holds data")
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self.capacity = capacity
+        self.count = 0
+        self._buf = [0.0] * capacity
+        m = capacity + 1
+        self._sum = [0.0] * m
+        self._sq = [0.0] * m
+        self._abs = [0.0] * m
+        self._agree = [0] * m
+        self._last = None
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, x):
+        count = self.count
+        cap = self.capacity
+        m = cap + 1
+        i = count % m
+        j = (count + 1) % m
+
+        self._buf[count % cap] = x
+        self._sum[j] = self._sum[i] + x
+        self._sq[j] = self._sq[i] + x * x
+        self._abs[j] = self._abs[i] + abs(x)
+        last = self._last
+        self._agree[j] = self._agree[i] + (1 if last is not None and last * x > 0 else 0)
+        self._last = x
+
+        self.count = count + 1
+        if self.count % cap == 0:
+            self._rebuild()
+
+    def _rebuild(self):
+        m = self.capacity + 1
+        start = self.count - len(self)
+        k = start % m
+        self._sum[k] = self._sq[k] = self._abs[k] = 0.0
+        s = sq = a = 0.0
+        for x in self.values(self.capacity):
+            s += x
+            sq += x * x
+            a += abs(x)
+            start += 1
+            k = start % m
+            self._sum[k] = s
+            self._sq[k] = sq
+            self._abs[k] = a
+
+    def _diff(self, prefix, n, fn):
+        m = self.capacity + 1
+        hi = prefix[self.count % m]
+        lo = prefix[(self.count - n) % m]
+        d = hi - lo
+        if abs(d) < CANCELLATION_TOL * (abs(hi) + abs(lo)):
+            return sum(fn(x) for x in self.values(n))
+        return d
+
+    def _n(self, window):
+        if window > self.capacity:
+            raise ValueError(f"window {window} exceeds capacity {self.capacity}")
+        return min(window, self.count)
+
+    # -------------------------
+    # Window statistics
+    # -------------------------
+    def mean(self, window):
+        n = self._n(window)
+        return self._diff(self._sum, n, float) / n if n else 0.0
+
+    def var(self, window):
+        n = self._n(window)
+        if not n:
+            return 0.0
+        mean = self._diff(self._sum, n, float) / n
+        mean_sq = self._diff(self._sq, n, _square) / n
+        var = mean_sq - mean * mean
+        if var < CANCELLATION_TOL ** 0.5 * mean_sq:
+            # Variance small against the mean: two-pass over the raw values
+            values = self.values(n)
+            mean = sum(values) / n
+            return sum((x - mean) ** 2 for x in values) / n
+        return var
+
+    def std(self, window):
+        return self.var(window) ** 0.5
+
+    def mean_abs(self, window):
+        n = self._n(window)
+        return self._diff(self._abs, n, abs) / n if n else 0.0
+
+    def agree(self, window):
+        """
+        Fraction of consecutive pairs in the window with the same sign
+        (as in ToxicityEstimator).
+        """
+        n = self._n(window)
+        if n < 2:
+            return 0.0
+        m = self.capacity + 1
+        same = self._agree[self.count % m] - self._agree[(self.count - n + 1) % m]
+        return same / (n - 1)
+
+    def values(self, window):
+        """
+        The last min(window, len) values, oldest first.
+        """
+        n = self._n(window)
+        cap = self.capacity
+        end = self.count % cap
+        start = end - n
+        if start >= 0:
+            return self._buf[start:end]
+        return self._buf[start:] + self._buf[:end]
+
+    def entropy(self, window, bins=10):
+        """
+        Normalized Shannon entropy of the window's histogram (as in
+        EntropyCalculator.normalized_entropy); 0 until the window is full.
+        """
+        if self._n(window) < window:
+            return 0.0
+        hist, _ = np.histogram(self.values(window), bins=bins, density=True)
+        hist = hist[hist > 0]
+        max_entropy = np.log(bins)
+        return -np.sum(hist * np.log(hist)) / max_entropy if max_entropy > 0 else 0
+
+    def stats(self, stat, windows):
+        """
+        Multi-horizon query, e.g. stats("mean", (10, 50, 200)).
+
+        Returns:
+            dict {window: value}
+        """
+        fn = getattr(self, stat)
+        return {w: fn(w) for w in windows}
+
+
+def _square(x):
+    return x * x
+
+
+class RollingStore:
+    """
+    Named RollingWindows shared by every consumer of a symbol's series
+    (estimators, regime detector, multi-horizon features), so each raw
+    series is stored once at the largest window anyone asked for.
+    """
+
+    def __init__(self):
+        self.windows = {}
+
+    def require(self, series, window):
+        """
+        Declare that a consumer needs `window` values of series. Growing a
+        series is only possible before data arrives.
+
+        Returns:
+            the series' RollingWindow
+        """
+        w = self.windows.get(series)
+        if w is None:
+            w = self.windows[series] = RollingWindow(window)
+        elif window > w.capacity:
+            w.resize(window)
+        return w
+
+    def __getitem__(self, series):
+        return self.windows[series]
+
+    def __contains__(self, series):
+        return series in self.windows
+
+    def append(self, series, x):
+        self.windows[series].append(x)
@@ -1,13 +1,27 @@
 class ToxicityEstimator:
-    def __init__(self):
+    def __init__(self, window=20, store=None):
+        """
+        store : optional microstructure.rolling.RollingStore; price moves
+                are then read from its shared "return" series (fed by the
+                feature pipeline) instead of being kept here
+        """
         self.recent_trades = []
+        self.window = window
+        self.store = store
+        self._moves = store.require("return", window) if store is not None else None
 
     def update(self, price_move):
+        if self._moves is not None:
+            return
         self.recent_trades.append(price_move)
-        if len(self.recent_trades) > 20:
+        if len(self.recent_trades) > self.window:
             self.recent_trades.pop(0)
 
     def toxicity_score(self):
+        if self._moves is not None:
+            if min(len(self._moves), self.window) < 5:
+                return 0.0
+            return self._moves.agree(self.window)
         if len(self.recent_trades) < 5:
             return 0.0
 
@@ -0,0 +1,663 @@
+"""
+RAMME command-line runner
+----------------------------------
+Headless entry point for scheduled jobs. Loads config/*.yaml, picks a
+data source and runs the backtest per tick, batched over paths, or as a
+parameter sweep. Progress goes to stderr at most once per
+progress_interval; results are printed as JSON and, with --out, written
+as summary.json plus CSV files.
+
+    python ramme.py --mode tick --ticks 100000 --out runs/demo
+    python ramme.py --mode tick --ticks 100000 --bootstrap 2000    # regime CIs
+    python ramme.py --source montecarlo --mode batch --paths 10000 --ticks 2000
+    python ramme.py --source replay --replay ticks.csv --mode sweep --train 50000 --test 10000
+    python ramme.py --mode stream --ticks 0 --spill-dir runs/ticks    # until killed
+    python ramme.py --source itch --itch archive.itch --mode stream --ticks 0
+    python ramme.py --source replay --replay ticks.csv --bars volume --bar-size 5000
+    python ramme.py --source replay --replay ticks.csv --conflate 10    # merge bursts
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import random
+import sys
+
+import numpy as np
+
+from config.loader import RegimeParams, load_config
+from engine.engine import RAMMEEngine
+from engine.conflation import conflate_ticks
+from strategy.signal import DirectionalSignal
+from strategy.position import PositionManager
+from execution.fill import PartialFillModel
+from execution.slippage import SlippageModel
+from execution.latency import LatencyModel
+from backtest.simulator import BacktestSimulator
+from backtest.pnl_attribution import RegimePnLTracker
+from backtest.shock import ShockGenerator
+from backtest.history import TickHistory
+from backtest.loop import BacktestLoop
+from backtest.scenario import ScenarioGenerator
+from backtest.batch import BatchBacktest, run_stress, pnl_distribution
+from backtest.features import compute_features, classify_regimes
+from backtest.feature_cache import FeatureCache, cached_features
+from backtest.walkforward import WalkForward, evaluate, param_grid, score
+from backtest.streaming import StreamingBacktest
+from backtest.bootstrap import bootstrap_attribution
+from data.bars import BAR_KINDS, BarAggregator, bar_ticks
+from data.itch import find_locate, iter_messages
+from microstructure.book_builder import BookBuilder, book_ticks
+from backtest.progress import ProgressReporter
+from risk.governor import RiskGovernor
+
+SOURCES = ("synthetic", "replay", "montecarlo", "itch")
+MODES = ("tick", "batch", "sweep", "stream")
+
+
+# -------------------------
+# Configuration
+# -------------------------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="RAMME headless backtest runner")
+    parser.add_argument("--config-dir", default=None,
+                        help="directory with regimes/execution/risk/run.yaml (default config/)")
+    parser.add_argument("--source", choices=SOURCES, default=None)
+    parser.add_argument("--replay", default=None,
+                        help="replay file (ts,bid,ask,bid_size,ask_size lines) for --source replay")
+    parser.add_argument("--itch", default=None,
+                        help="ITCH-style message archive for --source itch (see data/itch.py)")
+    parser.add_argument("--bars", choices=BAR_KINDS, default=None,
+                        help="aggregate replay/itch ticks into bars before the engine")
+    parser.add_argument("--bar-size", type=float, default=None,
+                        help="bar size (seconds for replay, ns for itch, ticks, shares or value)")
+    parser.add_argument("--conflate", type=int, default=None, metavar="N",
+                        help="merge up to N replay/itch updates per engine tick (TickConflator)")
+    parser.add_argument("--conflate-interval", type=float, default=None,
+                        help="close conflated buckets after this much feed time")
+    parser.add_argument("--mode", choices=MODES, default=None)
+    parser.add_argument("--ticks", type=int, default=None)
+    parser.add_argument("--paths", type=int, default=None, help="Monte Carlo paths (batch mode)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--param", action="append", default=[], metavar="NAME=V1,V2",
+                        help="sweep grid entry, replaces the run.yaml grid (repeatable)")
+    parser.add_argument("--train", type=int, default=None, help="walk-forward train fold length")
+    parser.add_argument("--test", type=int, default=None, help="walk-forward test fold length")
+    parser.add_argument("--workers", type=int, default=None, help="walk-forward worker processes")
+    parser.add_argument("--cache-dir", default=None, help="feature cache directory (sweep mode)")
+    parser.add_argument("--bootstrap", type=int, default=None, metavar="N",
+                        help="block-bootstrap resamples for per-regime intervals (tick mode, 0 = off)")
+    parser.add_argument("--spill-dir", default=None, help="directory for tick chunks (stream mode)")
+    parser.add_argument("--out", default=None, help="directory for summary.json and CSV output")
+    parser.add_argument("--progress-interval", type=float, default=None,
+                        help="seconds between progress lines (0 = silent)")
+    return parser.parse_args(argv)
+
+
+def load_run_config(args):
+    """
+    run.yaml merged with command-line overrides.
+    """
+    cfg = load_config("run", args.config_dir)
+    for key in ("source", "mode", "ticks", "paths", "seed"):
+        if getattr(args, key) is not None:
+            cfg[key] = getattr(args, key)
+    if args.progress_interval is not None:
+        cfg["progress_interval"] = args.progress_interval
+
+    cfg.setdefault("source", "synthetic")
+    cfg.setdefault("mode", "tick")
+    cfg.setdefault("ticks", 10000)
+    cfg.setdefault("paths", 1000)
+    cfg.setdefault("chunk_paths", 1000)
+    cfg.setdefault("seed", 42)
+    cfg.setdefault("initial_cash", 100000)
+    cfg.setdefault("max_position", 1.0)
+    cfg.setdefault("progress_interval", 1.0)
+
+    sweep = cfg.setdefault("sweep", {}) or {}
+    cfg["sweep"] = sweep
+    if args.param:
+        sweep["grid"] = dict(_parse_param(p) for p in args.param)
+    if args.train is not None:
+        sweep["train"] = args.train
+    if args.test is not None:
+        sweep["test"] = args.test
+
+    itch = cfg.setdefault("itch", {}) or {}
+    cfg["itch"] = itch
+    if args.itch is not None:
+        itch["path"] = args.itch
+
+    bars = cfg.setdefault("bars", {}) or {}
+    cfg["bars"] = bars
+    if args.bars is not None:
+        bars["kind"] = args.bars
+    if args.bar_size is not None:
+        bars["size"] = args.bar_size
+
+    conflate = cfg.setdefault("conflate", {}) or {}
+    cfg["conflate"] = conflate
+    if args.conflate is not None:
+        conflate["max_updates"] = args.conflate
+    if args.conflate_interval is not None:
+        conflate["max_interval"] = args.conflate_interval
+    if bars.get("kind") and _conflating(cfg):
+        raise ValueError("bars and conflation are alternatives; pick one")
+
+    bootstrap = cfg.setdefault("bootstrap", {}) or {}
+    cfg["bootstrap"] = bootstrap
+    if args.bootstrap is not None:
+        bootstrap["resamples"] = args.bootstrap
+
+    stream = cfg.setdefault("stream", {}) or {}
+    cfg["stream"] = stream
+    if args.spill_dir is not None:
+        stream["spill_dir"] = args.spill_dir
+    return cfg
+
+
+def _conflating(cfg):
+    conflate = cfg["conflate"]
+    return conflate.get("max_updates") is not None or conflate.get("max_interval") is not None
+
+
+def _parse_param(text):
+    name, _, values = text.partition("=")
+    if not values:
+        raise ValueError(f"--param expects NAME=V1,V2,..., got {text!r}")
+    return name, [_number(v) for v in values.split(",")]
+
+
+def _number(text):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def build_loop(params, run_cfg, config_dir=None):
+    """
+    BacktestLoop wired from config/*.yaml.
+    """
+    execution = load_config("execution", config_dir)
+    risk_cfg = load_config("risk", config_dir)
+    slippage = execution.get("slippage", {})
+    latency = execution.get("latency", {})
+    return BacktestLoop(
+        engine=RAMMEEngine(),
+        signal_engine=DirectionalSignal(params),
+        position_mgr=PositionManager(max_position=run_cfg["max_position"]),
+        fill_model=PartialFillModel(),
+        slippage_model=SlippageModel(slippage.get("base_slippage", 0.0001), params=params),
+        latency_model=LatencyModel(latency.get("min_ms", 1), latency.get("max_ms", 10),
+                                   seed=run_cfg["seed"], params=params),
+        sim=BacktestSimulator(initial_cash=run_cfg["initial_cash"]),
+        risk=RiskGovernor(
+            max_drawdown=risk_cfg.get("max_drawdown", 0.05),
+            max_exposure=risk_cfg.get("max_exposure", 1.0),
+            regime_limits=risk_cfg.get("regime_limits"),
+        ),
+        pnl_tracker=RegimePnLTracker(),
+    )
+
+
+def batch_kwargs(run_cfg, config_dir=None):
+    """
+    BatchBacktest settings with the same limits as build_loop(), shared by
+    batch, Monte Carlo and sweep runs.
+    """
+    execution = load_config("execution", config_dir)
+    risk_cfg = load_config("risk", config_dir)
+    latency = execution.get("latency", {})
+    return dict(
+        initial_cash=run_cfg["initial_cash"],
+        max_position=run_cfg["max_position"],
+        max_drawdown=risk_cfg.get("max_drawdown", 0.05),
+        max_exposure=risk_cfg.get("max_exposure", 1.0),
+        base_slippage=execution.get("slippage", {}).get("base_slippage", 0.0001),
+        min_latency_ms=latency.get("min_ms", 1),
+        max_latency_ms=latency.get("max_ms", 10),
+    )
+
+
+def build_batch(params, run_cfg, config_dir=None):
+    """
+    BatchBacktest with the same limits as build_loop().
+    """
+    return BatchBacktest(params, seed=run_cfg["seed"], **batch_kwargs(run_cfg, config_dir))
+
+
+# -------------------------
+# Data sources
+# -------------------------
+def synthetic_ticks(n_ticks, cfg):
+    """
+    main.py's market: ShockGenerator random walk with a fixed spread.
+    """
+    shock = ShockGenerator(cfg.get("shock_prob", 0.2), cfg.get("shock_size", 3.0))
+    half_spread = cfg.get("half_spread", 0.1)
+    size = cfg.get("size", 10)
+    price = cfg.get("start_price", 100.0)
+    mids = np.empty(n_ticks)
+    for t in range(n_ticks):
+        price = shock.apply(price)
+        mids[t] = price
+    sizes = np.full(n_ticks, size, dtype=np.int64)
+    return mids - half_spread, mids + half_spread, sizes, sizes.copy()
+
+
+def replay_ticks(path):
+    data = np.loadtxt(path, delimiter=",", comments="#", ndmin=2)
+    return data[:, 1], data[:, 2], data[:, 3].astype(np.int64), data[:, 4].astype(np.int64)
+
+
+def itch_builder(cfg):
+    """
+    BookBuilder for run.yaml's itch section; the symbol is looked up in the
+    archive's stock directory.
+    """
+    path = cfg.get("path")
+    if not path:
+        raise ValueError("--source itch needs --itch PATH")
+    locate = 0
+    if cfg.get("symbol"):
+        locate = find_locate(path, cfg["symbol"])
+        if locate is None:
+            raise ValueError(f"{cfg['symbol']} is not in {path}'s stock directory")
+    return BookBuilder(depth=cfg.get("depth", 10), tick=cfg.get("tick", 100), locate=locate,
+                       interval_ns=int(cfg.get("interval_ms", 100) * 1e6))
+
+
+def itch_ticks(cfg):
+    """
+    Engine ticks from an archive, rebuilt and snapshotted chunk by chunk.
+    """
+    builder = itch_builder(cfg)
+    for cols in iter_messages(cfg["path"]):
+        yield from book_ticks(builder.apply(cols))
+
+
+def itch_chunks(cfg):
+    """
+    Timestamps, best quotes and traded volume of the archive's book
+    snapshots, one message chunk at a time.
+    """
+    builder = itch_builder(cfg)
+    for cols in iter_messages(cfg["path"]):
+        snaps = builder.apply(cols)
+        ok = (snaps["bid_size"][:, 0] > 0) & (snaps["ask_size"][:, 0] > 0)
+        yield (snaps["ts"][ok], snaps["bid_price"][ok, 0], snaps["ask_price"][ok, 0],
+               snaps["bid_size"][ok, 0], snaps["ask_size"][ok, 0], snaps["volume"][ok])
+
+
+def _replay_chunks(path, chunk):
+    with open(path) as fh:
+        lines = (line.split("#", 1)[0].strip() for line in fh)
+        lines = (line for line in lines if line)
+        while True:
+            batch = list(itertools.islice(lines, chunk))
+            if not batch:
+                return
+            data = np.array([line.split(",") for line in batch], dtype=float)
+            yield (data[:, 0], data[:, 1], data[:, 2],
+                   data[:, 3].astype(np.int64), data[:, 4].astype(np.int64), None)
+
+
+def timestamped_chunks(run_cfg, replay=None, chunk=65536):
+    """
+    (ts, bid, ask, bid_size, ask_size, volume) chunks from the replay or
+    itch source; volume is None for replay files.
+    """
+    source = run_cfg["source"]
+    if source == "replay":
+        if not replay:
+            raise ValueError("--source replay needs --replay PATH")
+        return _replay_chunks(replay, chunk)
+    if source == "itch":
+        return itch_chunks(run_cfg["itch"])
+    raise ValueError("bars and conflation need timestamped ticks: use --source replay or itch")
+
+
+def bar_stream(run_cfg, replay=None, chunk=65536):
+    """
+    Engine ticks built from bars (data/bars.py) over a timestamped source,
+    aggregated one chunk of ticks at a time.
+    """
+    cfg = run_cfg["bars"]
+    bars = BarAggregator(cfg["kind"], cfg.get("size", 1.0))
+    for ts, bid, ask, bid_size, ask_size, volume in timestamped_chunks(run_cfg, replay, chunk):
+        yield from bar_ticks(bars.update(ts, bid, ask, bid_size, ask_size, volume))
+    yield from bar_ticks(bars.flush())
+
+
+def conflated_stream(run_cfg, replay=None, chunk=65536):
+    """
+    Engine ticks from a timestamped source with bursts merged by
+    TickConflator (run.yaml conflate: max_updates, max_interval in feed
+    timestamp units); the last bucket is flushed at the end of the feed.
+    """
+    cfg = run_cfg["conflate"]
+    chunks = timestamped_chunks(run_cfg, replay, chunk)
+    ticks = (tick for ts, bid, ask, bid_size, ask_size, _ in chunks
+             for tick in zip(ts.tolist(), bid.tolist(), ask.tolist(),
+                             bid_size.tolist(), ask_size.tolist()))
+    return conflate_ticks(ticks, cfg.get("max_updates"), cfg.get("max_interval"))
+
+
+def _tick_arrays(ticks):
+    if not ticks:
+        return np.zeros(0), np.zeros(0), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    bid, ask, bid_size, ask_size = zip(*ticks)
+    return np.array(bid), np.array(ask), np.array(bid_size), np.array(ask_size)
+
+
+def load_ticks(run_cfg, params, replay=None):
+    """
+    One tick path (bid, ask, bid_size, ask_size) from the configured source.
+    """
+    source = run_cfg["source"]
+    n = run_cfg["ticks"]
+    if run_cfg["bars"].get("kind"):
+        return _tick_arrays(list(itertools.islice(bar_stream(run_cfg, replay), n)))
+    if _conflating(run_cfg):
+        return _tick_arrays(list(itertools.islice(conflated_stream(run_cfg, replay), n)))
+    if source == "synthetic":
+        return synthetic_ticks(n, run_cfg.get("synthetic") or {})
+    if source == "replay":
+        if not replay:
+            raise ValueError("--source replay needs --replay PATH")
+        bid, ask, bid_size, ask_size = replay_ticks(replay)
+        return bid[:n], ask[:n], bid_size[:n], ask_size[:n]
+    if source == "itch":
+        return _tick_arrays(list(itertools.islice(itch_ticks(run_cfg["itch"]), n)))
+    scenario = ScenarioGenerator(params, seed=run_cfg["seed"]).generate(1, n)
+    return scenario["bid"][0], scenario["ask"][0], scenario["bid_size"][0], scenario["ask_size"][0]
+
+
+def stream_ticks(run_cfg, params, replay=None, chunk=65536):
+    """
+    Ticks (bid, ask, bid_size, ask_size) from the configured source,
+    generated or read one chunk at a time so memory does not depend on
+    the run length. ticks = 0 streams until the source ends (never, for
+    the generated sources).
+    """
+    source = run_cfg["source"]
+    n = run_cfg["ticks"] or None
+    if run_cfg["bars"].get("kind"):
+        yield from itertools.islice(bar_stream(run_cfg, replay, chunk), n)
+        return
+    if _conflating(run_cfg):
+        yield from itertools.islice(conflated_stream(run_cfg, replay, chunk), n)
+        return
+    if source == "replay":
+        if not replay:
+            raise ValueError("--source replay needs --replay PATH")
+        yield from _replay_lines(replay, n)
+        return
+    if source == "itch":
+        yield from itertools.islice(itch_ticks(run_cfg["itch"]), n)
+        return
+
+    if source == "synthetic":
+        cfg = dict(run_cfg.get("synthetic") or {})
+    else:
+        generator = ScenarioGenerator(params, seed=run_cfg["seed"])
+        s0, regime = 100.0, None
+    done = 0
+    while n is None or done < n:
+        size = chunk if n is None else min(chunk, n - done)
+        if source == "synthetic":
+            bid, ask, bid_size, ask_size = synthetic_ticks(size, cfg)
+            cfg["start_price"] = (bid[-1] + ask[-1]) / 2
+        else:
+            # Chunks continue from the previous chunk's last mid and regime
+            scenario = generator.generate(1, size, s0=s0, initial_regime=regime)
+            s0, regime = scenario["mid"][0, -1], int(scenario["regime"][0, -1])
+            bid, ask = scenario["bid"][0], scenario["ask"][0]
+            bid_size, ask_size = scenario["bid_size"][0], scenario["ask_size"][0]
+        yield from zip(bid.tolist(), ask.tolist(), bid_size.tolist(), ask_size.tolist())
+        done += size
+
+
+def _replay_lines(path, n=None):
+    with open(path) as fh:
+        count = 0
+        for line in fh:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            if n is not None and count >= n:
+                break
+            _, bid, ask, bid_size, ask_size = line.split(",")
+            yield float(bid), float(ask), int(float(bid_size)), int(float(ask_size))
+            count += 1
+
+
+# -------------------------
+# Modes
+# -------------------------
+def run_tick(run_cfg, params, ticks, config_dir=None):
+    loop = build_loop(params, run_cfg, config_dir)
+    random.seed(run_cfg["seed"])
+    np.random.seed(run_cfg["seed"])
+
+    bid, ask, bid_size, ask_size = (np.asarray(x).tolist() for x in ticks)
+    n = len(bid)
+    history = TickHistory(capacity=max(n, 1))
+    progress = ProgressReporter(total=n, interval=run_cfg["progress_interval"])
+    step = loop.step
+
+    killed = False
+    equity = run_cfg["initial_cash"]
+    for t in range(n):
+        mid, regime, features, equity, traded, alive = step(bid[t], ask[t], bid_size[t], ask_size[t])
+        history.append(t, regime, mid, equity, traded, features.get("return", 0.0))
+        progress.update(t + 1, equity=equity)
+        if not alive:
+            killed = True
+            break
+    elapsed = progress.finish(equity=equity)
+
+    summary = {
+        "ticks": len(history),
+        "killed": killed,
+        "final_equity": equity,
+        "elapsed_s": elapsed,
+        "ticks_per_sec": len(history) / elapsed if elapsed > 0 else 0.0,
+        "attribution": loop.pnl_tracker.report(),
+    }
+    boot = run_cfg["bootstrap"]
+    if boot.get("resamples") and len(history):
+        summary["bootstrap"] = bootstrap_attribution(
+            history.column("regime"), history.column("equity"),
+            n_resamples=boot["resamples"], block=boot.get("block"),
+            alpha=boot.get("alpha", 0.05), periods=boot.get("periods", 1.0),
+            seed=run_cfg["seed"], workers=boot.get("workers", 1),
+            last_equity=run_cfg["initial_cash"],
+        )
+    return summary, {"ticks.csv": history.to_columns()}
+
+
+def run_batch(run_cfg, params, ticks=None, config_dir=None):
+    backtest_kwargs = batch_kwargs(run_cfg, config_dir)
+    if run_cfg["source"] == "montecarlo":
+        n_paths = run_cfg["paths"]
+        chunk = run_cfg["chunk_paths"]
+        progress = ProgressReporter(total=n_paths, interval=run_cfg["progress_interval"],
+                                    unit="paths", check_every=1)
+        parts = []
+        for start in range(0, n_paths, chunk):
+            size = min(chunk, n_paths - start)
+            parts.append(run_stress(size, run_cfg["ticks"], chunk_paths=size, params=params,
+                                    seed=run_cfg["seed"] + start, **backtest_kwargs))
+            progress.update(start + size)
+        results = {key: np.concatenate([p[key] for p in parts]) for key in parts[0]}
+        elapsed = progress.finish()
+    else:
+        # A single recorded path: regimes come from the detector statistics
+        bid, ask = ticks[0], ticks[1]
+        features = compute_features(bid, ask)
+        backtest = build_batch(params, run_cfg, config_dir)
+        regimes = classify_regimes(features)
+        progress = ProgressReporter(interval=run_cfg["progress_interval"])
+        results = backtest.simulate(
+            features["mid"], features["liquidity"], regimes,
+            backtest.targets(features["return"], regimes),
+        )
+        elapsed = progress.finish()
+
+    summary = dict(pnl_distribution(results), paths=len(results["pnl"]), elapsed_s=elapsed)
+    columns = {k: v for k, v in results.items() if k != "pnl_by_regime"}
+    return summary, {"paths.csv": columns}
+
+
+def run_sweep(run_cfg, params, ticks, args):
+    sweep = run_cfg["sweep"]
+    grid = sweep.get("grid") or {}
+    if not grid:
+        raise ValueError("sweep mode needs a grid (run.yaml sweep.grid or --param)")
+    cache = FeatureCache(args.cache_dir) if args.cache_dir else None
+    bid, ask = ticks[0], ticks[1]
+    objective = sweep.get("objective", "pnl")
+    backtest_kwargs = batch_kwargs(run_cfg, args.config_dir)
+    progress = ProgressReporter(interval=run_cfg["progress_interval"], unit="folds", check_every=1)
+
+    if sweep.get("train") and sweep.get("test"):
+        wf = WalkForward(bid, ask, grid, sweep["train"], sweep["test"], step=sweep.get("step"),
+                         anchored=sweep.get("anchored", False), objective=objective,
+                         params=params, workers=args.workers, seed=run_cfg["seed"],
+                         feature_cache=cache, **backtest_kwargs)
+        folds = wf.run()
+        progress.update(len(folds))
+        elapsed = progress.finish()
+        rows = {
+            "fold": [f["fold"] for f in folds],
+            "train_start": [f["train"][0] for f in folds],
+            "test_start": [f["test"][0] for f in folds],
+            "params": [json.dumps(f["params"], sort_keys=True) for f in folds],
+            "train_score": [f["train_score"] for f in folds],
+            "test_pnl": [f["test_pnl"] for f in folds],
+            "test_max_drawdown": [f["test_max_drawdown"] for f in folds],
+            "test_trades": [f["test_trades"] for f in folds],
+        }
+        summary = dict(WalkForward.summary(folds), elapsed_s=elapsed)
+        return summary, {"folds.csv": rows}
+
+    combos = param_grid(grid)
+    windows = {c.get("detector_window", 100) for c in combos}
+    features = {w: cached_features(cache, bid, ask, detector_window=w) for w in windows}
+    results = evaluate(features, combos, 0, len(bid), params, run_cfg["seed"], **backtest_kwargs)
+    scores = score(results, objective)
+    best = int(np.argmax(scores))
+    progress.update(1)
+    elapsed = progress.finish()
+
+    rows = {name: [c.get(name) for c in combos] for name in grid}
+    rows.update(score=scores, pnl=results["pnl"], max_drawdown=results["max_drawdown"],
+                trades=results["trades"], killed=results["killed"])
+    summary = {
+        "combos": len(combos),
+        "best_params": combos[best],
+        "best_score": float(scores[best]),
+        "best_pnl": float(results["pnl"][best]),
+        "elapsed_s": elapsed,
+    }
+    return summary, {"sweep.csv": rows}
+
+
+def run_stream(run_cfg, params, ticks, config_dir=None):
+    """
+    Per-tick run in constant memory (backtest.streaming): only the last
+    ring_capacity ticks are kept, optionally spilled to disk in chunks.
+    """
+    stream = run_cfg["stream"]
+    loop = build_loop(params, run_cfg, config_dir)
+    random.seed(run_cfg["seed"])
+    np.random.seed(run_cfg["seed"])
+
+    backtest = StreamingBacktest(loop, ring_capacity=stream.get("ring_capacity", 65536),
+                                 spill_dir=stream.get("spill_dir"))
+    progress = ProgressReporter(total=run_cfg["ticks"] or None, interval=run_cfg["progress_interval"])
+    try:
+        report = backtest.run(ticks, stop_on_kill=stream.get("stop_on_kill", True), progress=progress)
+    finally:
+        backtest.close()
+    elapsed = progress.finish(equity=report["final_equity"])
+
+    summary = dict(report, elapsed_s=elapsed,
+                   ticks_per_sec=report["ticks"] / elapsed if elapsed > 0 else 0.0)
+    if backtest.ring.spill_dir is not None:
+        summary["spill_dir"] = backtest.ring.spill_dir
+        summary["spill_chunks"] = backtest.ring.chunks
+    return summary, {"ticks.csv": backtest.ring.to_columns()}
+
+
+# -------------------------
+# Output
+# -------------------------
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+def write_csv(path, columns):
+    names = list(columns)
+    with open(path, "w", newline="") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(names)
+        for row in zip(*(np.asarray(columns[n]).tolist() for n in names)):
+            writer.writerow(row)
+
+
+def write_outputs(out_dir, summary, tables):
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "summary.json"), "w") as fh:
+        json.dump(summary, fh, indent=2, default=_json_default)
+    for name, columns in tables.items():
+        write_csv(os.path.join(out_dir, name), columns)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    run_cfg = load_run_config(args)
+    if run_cfg["source"] not in SOURCES:
+        raise ValueError(f"Unknown source: {run_cfg['source']}")
+    if run_cfg["mode"] not in MODES:
+        raise ValueError(f"Unknown mode: {run_cfg['mode']}")
+
+    params = RegimeParams.from_config(args.config_dir)
+    random.seed(run_cfg["seed"])
+    np.random.seed(run_cfg["seed"])
+
+    mode = run_cfg["mode"]
+    ticks = None
+    if mode == "stream":
+        ticks = stream_ticks(run_cfg, params, args.replay)
+    elif not (mode == "batch" and run_cfg["source"] == "montecarlo"):
+        ticks = load_ticks(run_cfg, params, args.replay)
+
+    if mode == "tick":
+        summary, tables = run_tick(run_cfg, params, ticks, args.config_dir)
+    elif mode == "batch":
+        summary, tables = run_batch(run_cfg, params, ticks, args.config_dir)
+    elif mode == "stream":
+        summary, tables = run_stream(run_cfg, params, ticks, args.config_dir)
+    else:
+        summary, tables = run_sweep(run_cfg, params, ticks, args)
+
+    summary = dict(source=run_cfg["source"], mode=mode, seed=run_cfg["seed"], **summary)
+    if args.out:
+        write_outputs(args.out, summary, tables)
+    json.dump(summary, sys.stdout, indent=2, default=_json_default)
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
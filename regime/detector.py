@@ -8,38 +8,141 @@ class RegimeDetector:
     Detects market regimes using return statistics and entropy.
     """
 
-    def __init__(self, window=100, entropy_threshold=0.5, trend_factor=2.0):
+    def __init__(self, window=100, entropy_threshold=0.5, trend_factor=2.0,
+                 recompute_every=None, hysteresis=None, store=None):
+        """
+        Parameters:
+            window            : number of returns the statistics cover
+            entropy_threshold : normalized entropy threshold
+            trend_factor      : mean vs std ratio for trend
+            recompute_every   : lazy mode; re-evaluate at most every N ticks
+                                and return the cached regime in between
+            hysteresis        : lazy mode; also re-evaluate early once the
+                                running mean moves more than hysteresis
+                                standard deviations, or the running variance
+                                more than this fraction, from their values
+                                at the last evaluation
+            store             : optional microstructure.rolling.RollingStore;
+                                returns are then read from its shared
+                                "return" series instead of kept here
+
+        With both lazy options left at None every detect() call evaluates
+        the regime, and the timeline is identical to evaluating everything
+        on every tick (the entropy histogram is only skipped when neither
+        the trend nor the volatility test can use it).
+        """
         self.returns = []
         self.window = window
         self.entropy_calc = EntropyCalculator(window=min(window, 20))
         self.entropy_threshold = entropy_threshold  # normalized entropy threshold
         self.trend_factor = trend_factor  # mean vs std ratio for trend
+        self.store = store
+        self._shared = store.require("return", window) if store is not None else None
+
+        self.recompute_every = recompute_every
+        self.hysteresis = hysteresis
+        self.lazy = recompute_every is not None or hysteresis is not None
 
-    def update(self, ret):
+        # Running sums for the lazy-mode change test
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._ref_mean = 0.0
+        self._ref_var = 0.0
+        self._since = 0
+        self._cached = None
+
+        # Per-run counters
+        self.recomputations = 0
+        self.entropy_evaluations = 0
+
+    def reset_counters(self):
+        self.recomputations = 0
+        self.entropy_evaluations = 0
+
+    def update(self, ret, features=None):
         """
         Append new return and keep sliding window
+        (features is accepted for interface parity with HMMRegimeDetector
+        and ignored)
         """
+        if self._shared is not None:
+            return
         self.returns.append(ret)
+        if self.lazy:
+            self._sum += ret
+            self._sum_sq += ret * ret
         if len(self.returns) > self.window:
-            self.returns.pop(0)
+            old = self.returns.pop(0)
+            if self.lazy:
+                self._sum -= old
+                self._sum_sq -= old * old
 
     def detect(self):
         """
         Returns one of MarketRegime enums: VOLATILE, TREND, MEAN_REVERT
         """
-        if len(self.returns) < self.window:
+        if self._shared is not None:
+            if len(self._shared) < self.window:
+                return MarketRegime.VOLATILE
+        elif len(self.returns) < self.window:
             return MarketRegime.VOLATILE
 
-        mean = np.mean(self.returns)
-        var = np.var(self.returns)
-        entropy = self.entropy_calc.normalized_entropy(self.returns)
+        if self.lazy and self._cached is not None and not self._changed():
+            return self._cached
+
+        if self._shared is not None:
+            regime = self._evaluate(self._shared.values(self.window))
+        else:
+            regime = self._evaluate(self.returns)
+        if self.lazy:
+            self._cached = regime
+            self._since = 0
+            self._ref_mean, self._ref_var = self._running_stats()
+        return regime
+
+    def _running_stats(self):
+        if self._shared is not None:
+            return self._shared.mean(self.window), self._shared.var(self.window)
+        n = len(self.returns)
+        mean = self._sum / n
+        return mean, max(self._sum_sq / n - mean * mean, 0.0)
+
+    def _changed(self):
+        """
+        Cheap lazy-mode test: is a full re-evaluation due?
+        """
+        self._since += 1
+        if self.recompute_every is not None and self._since >= self.recompute_every:
+            return True
+        if self.hysteresis is None:
+            return False
+        mean, var = self._running_stats()
+        band = self.hysteresis
+        if abs(mean - self._ref_mean) > band * np.sqrt(self._ref_var):
+            return True
+        return abs(var - self._ref_var) > band * self._ref_var
+
+    def _evaluate(self, returns):
+        self.recomputations += 1
+        mean = np.mean(returns)
+        var = np.var(returns)
+
+        # The entropy histogram only matters if one of the variance tests
+        # passes; otherwise the answer is MEAN_REVERT regardless
+        trending = abs(mean) > self.trend_factor * np.sqrt(var)
+        volatile = var > 5 * np.mean(np.abs(returns))
+        if not (trending or volatile):
+            return MarketRegime.MEAN_REVERT
+
+        self.entropy_evaluations += 1
+        entropy = self.entropy_calc.normalized_entropy(returns)
 
         # TREND: strong directional movement + low entropy
-        if abs(mean) > self.trend_factor * np.sqrt(var) and entropy < self.entropy_threshold:
+        if trending and entropy < self.entropy_threshold:
             return MarketRegime.TREND
 
         # VOLATILE: high variance + high entropy
-        if var > 5 * np.mean(np.abs(self.returns)) and entropy >= self.entropy_threshold:
+        if volatile and entropy >= self.entropy_threshold:
             return MarketRegime.VOLATILE
 
         # Default: mean-reverting
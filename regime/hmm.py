@@ -0,0 +1,327 @@
+# File: regime/hmm.py
+import numpy as np
+from regime.states import MarketRegime
+
+
+class HMMRegimeDetector:
+    """
+    Probabilistic regime detector built on a K-state Gaussian HMM with
+    diagonal covariances over the engine's microstructure features.
+
+    Online, each tick runs one step of the forward filter (O(K²)); the
+    filtered state posterior is mapped to a MarketRegime. Offline, fit()
+    runs Baum-Welch over historical feature arrays.
+    """
+
+    FEATURES = ("return", "spread", "liquidity", "toxicity")
+
+    def __init__(self,
+                 n_states=5,
+                 features=FEATURES,
+                 state_regimes=None,
+                 stay_prob=0.95,
+                 min_var=1e-10):
+        """
+        Parameters:
+            n_states      : number of hidden states K
+            features      : feature names used as observations
+            state_regimes : MarketRegime per state (default: label_states()
+                            after fit, else MarketRegime order)
+            stay_prob     : initial self-transition probability
+            min_var       : variance floor for the emissions
+        """
+        self.n_states = n_states
+        self.feature_names = tuple(features)
+        self.min_var = min_var
+
+        k, d = n_states, len(self.feature_names)
+        self.start_prob = np.full(k, 1.0 / k)
+        off_diag = (1.0 - stay_prob) / max(k - 1, 1)
+        self.transmat = np.full((k, k), off_diag)
+        np.fill_diagonal(self.transmat, stay_prob if k > 1 else 1.0)
+        self.means = np.zeros((k, d))
+        self.vars = np.ones((k, d))
+        self.fitted = False  # set by fit() and load()
+
+        regimes = list(MarketRegime)
+        self.state_regimes = list(state_regimes) if state_regimes else [
+            regimes[i % len(regimes)] for i in range(k)
+        ]
+
+        self.reset()
+
+    # -------------------------
+    # Online filtering
+    # -------------------------
+    def reset(self):
+        """
+        Forget the filtered posterior (model parameters are kept).
+        """
+        self.posterior = self.start_prob.copy()
+        self._started = False
+
+    def update(self, ret, features=None):
+        """
+        One forward-filter step.
+
+        Parameters:
+            ret      : latest return
+            features : optional dict of the other features; any feature
+                       missing from it is marginalized out for this tick
+        """
+        x = np.empty(len(self.feature_names))
+        mask = np.ones(len(self.feature_names), dtype=bool)
+        for i, name in enumerate(self.feature_names):
+            if name == "return":
+                x[i] = ret
+            elif features is not None and name in features:
+                x[i] = features[name]
+            else:
+                x[i] = 0.0
+                mask[i] = False
+
+        log_b = self._log_emission(x[mask], self.means[:, mask], self.vars[:, mask])
+        b = np.exp(log_b - log_b.max())
+
+        prior = self.posterior @ self.transmat if self._started else self.start_prob
+        alpha = prior * b
+        total = alpha.sum()
+        self.posterior = alpha / total if total > 0 and np.isfinite(total) else prior
+        self._started = True
+
+    def detect(self):
+        """
+        Returns the MarketRegime of the most probable state.
+        """
+        self._check_fitted()
+        return self.state_regimes[int(np.argmax(self.posterior))]
+
+    # -------------------------
+    # Offline fitting (Baum-Welch)
+    # -------------------------
+    def fit(self, X, lengths=None, n_iter=50, tol=1e-4, init=True):
+        """
+        Fit the model to historical observations with Baum-Welch.
+
+        Parameters:
+            X       : (T, d) array in feature_names order, or a dict of
+                      feature arrays keyed by name
+            lengths : optional lengths of independent sequences in X
+            n_iter  : maximum EM iterations
+            tol     : stop when the log-likelihood gain falls below tol
+            init    : initialize parameters from X before EM
+
+        Returns:
+            list of log-likelihoods per iteration
+        """
+        X = self._as_matrix(X)
+        lengths = [len(X)] if lengths is None else list(lengths)
+        bounds = np.cumsum([0] + lengths)
+
+        if init:
+            self._init_from_data(X)
+
+        history = []
+        for _ in range(n_iter):
+            k = self.n_states
+            start_acc = np.zeros(k)
+            trans_acc = np.zeros((k, k))
+            gammas = []
+            loglik = 0.0
+
+            for s, e in zip(bounds[:-1], bounds[1:]):
+                gamma, xi_sum, ll = self._expectations(X[s:e])
+                start_acc += gamma[0]
+                trans_acc += xi_sum
+                gammas.append(gamma)
+                loglik += ll
+
+            # M-step
+            gamma = np.concatenate(gammas)
+            weight = gamma.sum(axis=0) + 1e-12
+            self.start_prob = start_acc / start_acc.sum()
+            self.transmat = trans_acc / np.maximum(trans_acc.sum(axis=1, keepdims=True), 1e-12)
+            self.means = (gamma.T @ X) / weight[:, None]
+            self.vars = np.maximum(
+                (gamma.T @ (X * X)) / weight[:, None] - self.means ** 2, self.min_var
+            )
+
+            history.append(loglik)
+            if len(history) > 1 and abs(history[-1] - history[-2]) < tol:
+                break
+
+        self.state_regimes = self.label_states()
+        self.fitted = True
+        self.reset()
+        return history
+
+    def predict(self, X):
+        """
+        Filtered regime per row of X (same as feeding the rows online).
+
+        Returns:
+            array of MarketRegime values (integer regime codes)
+        """
+        self._check_fitted()
+        X = self._as_matrix(X)
+        alpha, _ = self._forward(self._emissions(X)[0])
+        codes = np.array([r.value for r in self.state_regimes], dtype=np.uint8)
+        return codes[np.argmax(alpha, axis=1)]
+
+    def label_states(self):
+        """
+        Map fitted states to MarketRegime with simple rules on the state
+        means/variances: thinnest book -> ILLIQUID, strongest drift ->
+        TREND, largest return variance -> SHOCK, next largest variance ->
+        VOLATILE, everything else -> MEAN_REVERT. One state is always left
+        for MEAN_REVERT.
+        """
+        names = self.feature_names
+        free = list(range(self.n_states))
+        labels = [MarketRegime.MEAN_REVERT] * self.n_states
+
+        def _take(regime, scores):
+            if len(free) <= 1:
+                return
+            best = max(free, key=lambda s: scores[s])
+            labels[best] = regime
+            free.remove(best)
+
+        if "liquidity" in names:
+            _take(MarketRegime.ILLIQUID, -self.means[:, names.index("liquidity")])
+        elif "spread" in names:
+            _take(MarketRegime.ILLIQUID, self.means[:, names.index("spread")])
+
+        if "return" in names:
+            r = names.index("return")
+            ret_var = self.vars[:, r]
+            _take(MarketRegime.TREND, np.abs(self.means[:, r]) / np.sqrt(ret_var))
+            _take(MarketRegime.SHOCK, ret_var)
+            _take(MarketRegime.VOLATILE, ret_var)
+
+        return labels
+
+    # -------------------------
+    # Persistence
+    # -------------------------
+    def save(self, path):
+        """
+        Save fitted parameters to an .npz file.
+        """
+        np.savez(
+            path,
+            feature_names=np.array(self.feature_names),
+            start_prob=self.start_prob,
+            transmat=self.transmat,
+            means=self.means,
+            vars=self.vars,
+            state_regimes=np.array([r.value for r in self.state_regimes]),
+            min_var=self.min_var,
+        )
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a detector saved with save().
+        """
+        data = np.load(path)
+        det = cls(
+            n_states=len(data["start_prob"]),
+            features=[str(f) for f in data["feature_names"]],
+            state_regimes=[MarketRegime(int(v)) for v in data["state_regimes"]],
+            min_var=float(data["min_var"]),
+        )
+        det.start_prob = data["start_prob"]
+        det.transmat = data["transmat"]
+        det.means = data["means"]
+        det.vars = data["vars"]
+        det.fitted = True
+        det.reset()
+        return det
+
+    # -------------------------
+    # Internals
+    # -------------------------
+    def _check_fitted(self):
+        # Untrained parameters are identical across states, so every
+        # posterior would argmax to state 0 (TREND)
+        if not self.fitted:
+            raise RuntimeError("HMMRegimeDetector is not fitted: call fit() or load() first")
+
+    def _as_matrix(self, X):
+        if isinstance(X, dict):
+            X = np.column_stack([np.asarray(X[name], dtype=float) for name in self.feature_names])
+        return np.asarray(X, dtype=float)
+
+    def _init_from_data(self, X):
+        """
+        Seed states from quantile bands of |return| (a volatility proxy),
+        so the states start ordered from calm to turbulent.
+        """
+        k = self.n_states
+        r = self.feature_names.index("return") if "return" in self.feature_names else 0
+        bands = np.array_split(np.argsort(np.abs(X[:, r]), kind="stable"), k)
+        global_var = np.maximum(X.var(axis=0), self.min_var)
+        for s, idx in enumerate(bands):
+            rows = X[idx] if len(idx) else X
+            self.means[s] = rows.mean(axis=0)
+            self.vars[s] = np.maximum(rows.var(axis=0), 0.1 * global_var)
+
+    @staticmethod
+    def _log_emission(x, means, vars_):
+        return -0.5 * np.sum(np.log(2 * np.pi * vars_) + (x - means) ** 2 / vars_, axis=-1)
+
+    def _emissions(self, X):
+        """
+        Scaled emission likelihoods B (T, K) and the per-row log scale.
+        """
+        log_b = -0.5 * (
+            np.sum(np.log(2 * np.pi * self.vars), axis=1)[None, :]
+            + (X ** 2) @ (1.0 / self.vars).T
+            - 2.0 * X @ (self.means / self.vars).T
+            + np.sum(self.means ** 2 / self.vars, axis=1)[None, :]
+        )
+        offset = log_b.max(axis=1, keepdims=True)
+        return np.exp(log_b - offset), offset[:, 0]
+
+    def _forward(self, B):
+        T, k = B.shape
+        alpha = np.empty((T, k))
+        scale = np.empty(T)
+        a = self.start_prob * B[0]
+        A = self.transmat
+        for t in range(T):
+            if t:
+                a = (alpha[t - 1] @ A) * B[t]
+            c = a.sum()
+            if c <= 0:
+                a = np.full(k, 1.0 / k)
+                c = 1e-300
+            alpha[t] = a / c
+            scale[t] = c
+        return alpha, scale
+
+    def _expectations(self, X):
+        """
+        E-step for one sequence: state posteriors, summed transition
+        posteriors and log-likelihood.
+        """
+        B, offset = self._emissions(X)
+        alpha, scale = self._forward(B)
+
+        T, k = B.shape
+        A = self.transmat
+        beta = np.empty((T, k))
+        beta[-1] = 1.0
+        for t in range(T - 2, -1, -1):
+            beta[t] = A @ (B[t + 1] * beta[t + 1]) / scale[t + 1]
+
+        gamma = alpha * beta
+        gamma /= gamma.sum(axis=1, keepdims=True)
+
+        # Sum over t of xi_t(i, j) in one matrix product
+        weighted = B[1:] * beta[1:] / scale[1:, None]
+        xi_sum = A * (alpha[:-1].T @ weighted)
+
+        loglik = float(np.sum(np.log(scale)) + np.sum(offset))
+        return gamma, xi_sum, loglik
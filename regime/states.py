@@ -1,8 +1,74 @@
 from enum import Enum
 
+import numpy as np
+
 class MarketRegime(Enum):
     TREND = 1
     MEAN_REVERT = 2
     VOLATILE = 3
     ILLIQUID = 4
     SHOCK = 5
+
+
+# Regime codes are the MarketRegime values. Code 0 is reserved for labels
+# outside the enum (e.g. "QUIET") so per-regime tables can be indexed
+# directly by code, with slot 0 holding the default parameters.
+UNKNOWN_REGIME = 0
+NUM_REGIME_CODES = max(r.value for r in MarketRegime) + 1
+
+_CODE_BY_NAME = {r.name: r.value for r in MarketRegime}
+
+# Labels indexed by code, for the reporting boundary only
+_labels = ["UNKNOWN"] * NUM_REGIME_CODES
+for _r in MarketRegime:
+    _labels[_r.value] = _r.name
+REGIME_LABELS = tuple(_labels)
+del _labels, _r
+
+
+def regime_code(regime):
+    """
+    Map a regime to its integer code.
+
+    Parameters:
+        regime : MarketRegime, label string, integer code or None
+
+    Returns:
+        int in [0, NUM_REGIME_CODES)
+    """
+    if type(regime) is int:
+        return regime if 0 <= regime < NUM_REGIME_CODES else UNKNOWN_REGIME
+    if isinstance(regime, MarketRegime):
+        return regime.value
+    if isinstance(regime, str):
+        return _CODE_BY_NAME.get(regime, UNKNOWN_REGIME)
+    if regime is None:
+        return UNKNOWN_REGIME
+    code = int(regime)
+    return code if 0 <= code < NUM_REGIME_CODES else UNKNOWN_REGIME
+
+
+def regime_codes(regimes):
+    """
+    Vectorized regime_code: map a sequence of regimes to an integer array.
+    Integer input keeps its dtype; codes outside [0, NUM_REGIME_CODES) map
+    to UNKNOWN_REGIME, as in regime_code.
+    """
+    arr = np.asarray(regimes)
+    if arr.dtype.kind in "iu":
+        return np.where((arr >= 0) & (arr < NUM_REGIME_CODES), arr, UNKNOWN_REGIME)
+    return np.array([regime_code(r) for r in arr.ravel()], dtype=np.intp).reshape(arr.shape)
+
+
+def regime_label(code):
+    """
+    Label string for an integer regime code.
+    """
+    return REGIME_LABELS[regime_code(code)]
+
+
+def regime_labels(codes):
+    """
+    Vectorized regime_label: map an integer code array to a label array.
+    """
+    return np.asarray(REGIME_LABELS, dtype=object)[np.asarray(codes, dtype=np.intp)]
@@ -1,3 +1,6 @@
+from regime.states import NUM_REGIME_CODES, regime_code
+
+
 class RiskGovernor:
     """
     Central risk control layer.
@@ -12,13 +15,19 @@ class RiskGovernor:
         Parameters:
             max_drawdown  : max allowable drawdown (fraction)
             max_exposure  : absolute exposure limit
-            regime_limits : optional dict {regime: exposure_cap}
+            regime_limits : optional dict {regime: exposure_cap}, keyed by
+                            label, MarketRegime or regime code
         """
         self.equity_peak = 0.0
         self.max_drawdown = max_drawdown
         self.max_exposure = max_exposure
         self.regime_limits = regime_limits or {}
 
+        # Per-regime caps indexed by regime code (inf = no cap)
+        self.exposure_caps = [float("inf")] * NUM_REGIME_CODES
+        for regime, cap in self.regime_limits.items():
+            self.exposure_caps[regime_code(regime)] = cap
+
     def update(self, equity):
         """
         Update equity peak and evaluate drawdown stop.
@@ -36,7 +45,7 @@ class RiskGovernor:
         Decide whether a new trade is allowed.
 
         Parameters:
-            regime   : current market regime
+            regime   : current market regime (code or label)
             exposure : current absolute exposure
 
         Returns:
@@ -47,8 +56,7 @@ class RiskGovernor:
             return False
 
         # Regime-specific caps
-        if regime in self.regime_limits:
-            if exposure > self.regime_limits[regime]:
-                return False
+        if exposure > self.exposure_caps[regime_code(regime)]:
+            return False
 
         return True
@@ -0,0 +1,45 @@
+"""
+RAMME snapshot monitor
+----------------------------------
+Read-only consumer of the shared-memory snapshots published by
+main.py --publish NAME. Runs in its own process and never slows the
+publisher; several monitors can attach to the same segment.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from engine.shm import SnapshotReader
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RAMME snapshot monitor")
+    parser.add_argument("name", help="shared-memory segment name")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between lines")
+    parser.add_argument("--window", type=int, default=256,
+                        help="recent snapshots summarised per line")
+    parser.add_argument("--count", type=int, default=None, help="stop after this many lines")
+    args = parser.parse_args()
+
+    with SnapshotReader(args.name) as reader:
+        lines = 0
+        seen = 0
+        while args.count is None or lines < args.count:
+            seen = reader.wait(seen, timeout=args.interval)
+            snap = reader.latest()
+            if snap is not None:
+                recent = reader.history(args.window)
+                ret = np.diff(np.log(recent["mid"])) if len(recent["mid"]) > 1 else np.zeros(1)
+                print(
+                    f"tick {snap['tick']} | {snap['label']} | mid {snap['mid']:.4f} | "
+                    f"equity {snap['equity']:.2f} | position {snap['position']:.3f} | "
+                    f"vol({len(recent['mid'])}) {ret.std():.5f}"
+                )
+                lines += 1
+            time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+RAMME event log tool
+----------------------------------
+Inspect, replay and diff the per-tick event logs written by
+main.py --event-log PATH (backtest/eventlog.py).
+
+    python -m simulation.replay_log show run.log --tick 1200 --count 5
+    python -m simulation.replay_log replay run.log
+    python -m simulation.replay_log replay run.log --loop
+    python -m simulation.replay_log diff before.log after.log
+
+replay re-feeds the logged ticks through a fresh RAMMEEngine and reports
+the first tick whose mid, features or regime differ. --loop re-runs the
+whole default BacktestLoop instead; that only matches runs whose global
+RNG was used by the loop alone (main.py's ShockGenerator draws from it
+too, so compare such runs with diff instead).
+"""
+
+import argparse
+import random
+import sys
+
+import numpy as np
+
+from backtest.eventlog import EventLog, diff, replay
+from backtest.loop import BacktestLoop
+from regime.states import REGIME_LABELS
+
+
+def _print_divergence(first):
+    print(f"first divergence at tick {first['tick']} (record {first['index']}), "
+          f"stage: {first['stage']}")
+    for name, (a, b) in first["fields"].items():
+        print(f"  {name}: {a!r} != {b!r}")
+
+
+def show(args):
+    log = EventLog(args.log)
+    print(f"{args.log}: {len(log)} records, ticks {log.start_tick}..{log.start_tick + len(log) - 1}, "
+          f"features {', '.join(log.features)}")
+    tick = log.start_tick if args.tick is None else args.tick
+    for t in range(tick, min(tick + args.count, log.start_tick + len(log))):
+        rec = log.at(t)
+        print(f"tick {rec['tick']} | {REGIME_LABELS[rec['regime']]} | bid {rec['bid']:.4f} ask {rec['ask']:.4f} "
+              f"| signal {rec['signal']:+d} delta {rec['delta']:+.4f} | fill {rec['fill_ratio']:.4f} "
+              f"@ {rec['executed_price']:.4f} | position {rec['position']:.4f} | equity {rec['equity']:.2f}")
+    return 0
+
+
+def run_replay(args):
+    loop = None
+    if args.loop:
+        random.seed(args.seed)
+        np.random.seed(args.seed)
+        loop = BacktestLoop()
+    result = replay(args.log, loop=loop, start=args.start, stop=args.stop,
+                    rtol=args.rtol, atol=args.atol)
+    if result["first"] is None:
+        print(f"replayed {result['replayed']} records: no divergence")
+        return 0
+    _print_divergence(result["first"])
+    return 1
+
+
+def run_diff(args):
+    result = diff(args.a, args.b, rtol=args.rtol, atol=args.atol)
+    len_a, len_b = result["lengths"]
+    print(f"compared {result['compared']} records ({len_a} vs {len_b})")
+    if result["first"] is None:
+        print("no differences" if len_a == len_b else "identical over the common length")
+        return 0 if len_a == len_b else 1
+    _print_divergence(result["first"])
+    print("records differing per field:")
+    for name, count in result["counts"].items():
+        if count:
+            print(f"  {name}: {count}")
+    return 1
+
+
+def _add_tolerances(parser):
+    parser.add_argument("--rtol", type=float, default=0.0, help="relative float tolerance")
+    parser.add_argument("--atol", type=float, default=0.0, help="absolute float tolerance")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RAMME event log tool")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("show", help="print records")
+    p.add_argument("log")
+    p.add_argument("--tick", type=int, default=None, help="first tick (default: start of log)")
+    p.add_argument("--count", type=int, default=10)
+    p.set_defaults(func=show)
+
+    p = sub.add_parser("replay", help="re-run a log and report the first divergence")
+    p.add_argument("log")
+    p.add_argument("--loop", action="store_true", help="replay the whole BacktestLoop, not just the engine")
+    p.add_argument("--seed", type=int, default=42, help="global RNG seed for --loop")
+    p.add_argument("--start", type=int, default=0, help="first record")
+    p.add_argument("--stop", type=int, default=None, help="record to stop before")
+    _add_tolerances(p)
+    p.set_defaults(func=run_replay)
+
+    p = sub.add_parser("diff", help="compare two logs")
+    p.add_argument("a")
+    p.add_argument("b")
+    _add_tolerances(p)
+    p.set_defaults(func=run_diff)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,8 +4,16 @@ User-Friendly Runner Script with Trades, CSV Export, and Corrected Logic
 ----------------------------------
 This script demonstrates RAMME in a stochastic market.
 Equity, trades, and PnL per regime are tracked and saved for visualization.
+
+    python -m simulation.run_simulation --ticks 10000000 --ring 65536 --spill-dir runs/ticks
+
+--ring keeps only the last N ticks in memory (backtest.history.TickRing),
+so long runs stay in constant memory; with --spill-dir every wrap of the
+ring is written to disk and backtest.history.read_spill() reloads the run.
 """
 
+import argparse
+
 from engine.engine import RAMMEEngine
 from strategy.signal import DirectionalSignal
 from strategy.position import PositionManager
@@ -15,10 +23,24 @@ from execution.latency import LatencyModel
 from backtest.simulator import BacktestSimulator
 from backtest.pnl_attribution import RegimePnLTracker
 from backtest.shock import ShockGenerator
+from backtest.history import TickHistory, TickRing
 from risk.governor import RiskGovernor
+from regime.states import MarketRegime, REGIME_LABELS
 import random
 import pandas as pd
 
+parser = argparse.ArgumentParser(description="RAMME stochastic simulation")
+parser.add_argument("--ticks", type=int, default=30)
+parser.add_argument("--ring", type=int, default=None, metavar="N",
+                    help="keep only the last N ticks in memory (default: all)")
+parser.add_argument("--spill-dir", default=None,
+                    help="write each wrap of the --ring buffer to this directory")
+parser.add_argument("--print-every", type=int, default=1, metavar="N",
+                    help="print every Nth tick")
+args = parser.parse_args()
+if args.spill_dir and not args.ring:
+    parser.error("--spill-dir needs --ring")
+
 # -------------------------
 # Introduction
 # -------------------------
@@ -38,7 +60,8 @@ position_mgr = PositionManager()
 fill_model = PartialFillModel()
 slippage_model = SlippageModel()
 latency_model = LatencyModel()
-sim = BacktestSimulator(initial_cash=100000)
+# Bounded runs keep no per-trade records either
+sim = BacktestSimulator(initial_cash=100000, max_history=0 if args.ring else None)
 risk = RiskGovernor(max_drawdown=0.05)
 pnl_tracker = RegimePnLTracker()
 shock = ShockGenerator()
@@ -48,15 +71,17 @@ price = 100.0
 vol_base = 0.01
 vol_noise = 0.005
 
+VOLATILE = MarketRegime.VOLATILE.value
+
 # -------------------------
 # Store per-tick data
 # -------------------------
-tick_data = []
+history = TickRing(args.ring, args.spill_dir) if args.ring else TickHistory()
 
 # -------------------------
 # Simulation Loop
 # -------------------------
-for tick in range(30):
+for tick in range(args.ticks):
     # Apply stochastic shock to price
     stochastic_ret = random.gauss(0, vol_noise)
     price = shock.apply(price) * (1 + stochastic_ret)
@@ -69,13 +94,13 @@ for tick in range(30):
     engine.orderbook.update(bids, asks)
 
     # Engine observes market
-    mid_price, regime, features = engine.on_tick(bid, ask, 10, 10)
+    mid_price, regime, features = engine.on_tick_code(bid, ask, 10, 10)
 
     # --- Generate signal ---
     ret = features.get("return", 0.0)
 
     # Force trades in VOLATILE regime for demonstration
-    if regime == "VOLATILE":
+    if regime == VOLATILE:
         signal = 1  # buy
         strength = 10
     else:
@@ -105,16 +130,11 @@ for tick in range(30):
     pnl_tracker.update(regime, equity, traded=traded)
 
     # Store tick data
-    tick_data.append({
-        "tick": tick,
-        "regime": regime,
-        "equity": equity,
-        "traded": traded,
-        "return": ret
-    })
+    history.append(tick, regime, mid_price, equity, traded, ret)
 
     # Print tick summary
-    print(f"Tick {tick:02d} | Regime: {regime} | Equity: {equity:,.2f} | Trades: {'Yes' if traded else 'No'}")
+    if tick % args.print_every == 0:
+        print(f"Tick {tick:02d} | Regime: {REGIME_LABELS[regime]} | Equity: {equity:,.2f} | Trades: {'Yes' if traded else 'No'}")
 
 # -------------------------
 # Final Summary
@@ -132,9 +152,14 @@ print("========================================\n")
 # -------------------------
 # Export CSV for visualization
 # -------------------------
-df = pd.DataFrame(tick_data)
+df = pd.DataFrame(history.to_columns())
 df.to_csv("RAMME/simulation_results.csv", index=False)
 print("Per-tick simulation results saved to 'RAMME/simulation_results.csv'.")
+if args.ring:
+    print(f"(last {len(history):,} of {args.ticks:,} ticks)")
+    if args.spill_dir:
+        history.spill()
+        print(f"Full run: {history.chunks} chunks in '{args.spill_dir}' (backtest.history.read_spill).")
 print("Run 'visualize_simulation.py' to see plots of equity and PnL by regime.")
 
 print("\nThank you for running RAMME! Demonstrates regime-adaptive microstructure trading in a stochastic environment.")
@@ -0,0 +1,102 @@
+"""
+RAMME streaming runner
+----------------------------------
+Feeds RAMME from an asyncio feed adapter instead of a synchronous loop.
+By default a replay file is recorded from the scenario generator and
+served on localhost, standing in for a live feed.
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+
+from backtest.loop import BacktestLoop
+from backtest.scenario import ScenarioGenerator
+from data.stream import (
+    ReplayFeedAdapter,
+    ReplayServer,
+    SocketFeedAdapter,
+    StreamingPipeline,
+    write_replay,
+)
+
+
+def record_scenario(path, n_ticks, seed=42, tick_interval=0.001):
+    """
+    Write one ScenarioGenerator path as a replay file.
+    """
+    scenario = ScenarioGenerator(seed=seed).generate(1, n_ticks)
+    write_replay(path, (
+        (i * tick_interval,
+         float(scenario["bid"][0, i]), float(scenario["ask"][0, i]),
+         int(scenario["bid_size"][0, i]), int(scenario["ask_size"][0, i]))
+        for i in range(n_ticks)
+    ))
+
+
+async def run(args):
+    replay = args.replay
+    if replay is None:
+        replay = os.path.join(tempfile.gettempdir(), "ramme_replay.csv")
+        record_scenario(replay, args.ticks)
+
+    loop = BacktestLoop()
+
+    def on_result(tick, result):
+        alive = result[-1]
+        if not alive:
+            print("KILL SWITCH TRIGGERED")
+        return alive
+
+    server = None
+    if args.source == "socket":
+        server = await ReplayServer(replay, port=args.port, speed=args.speed).start()
+        adapter = SocketFeedAdapter(port=server.port)
+    else:
+        adapter = ReplayFeedAdapter(replay, speed=args.speed)
+
+    pipeline = StreamingPipeline(
+        adapter,
+        loop.step,
+        on_result=on_result,
+        queue_size=args.queue_size,
+        batch_size=args.batch_size,
+        coalesce=args.coalesce,
+        conflate_updates=args.conflate,
+        conflate_interval=args.conflate_interval,
+        threaded=args.threaded,
+    )
+    try:
+        stats = await pipeline.run()
+    finally:
+        if server is not None:
+            await server.stop()
+
+    print("Pipeline stats:", stats)
+    print("\nPnL Attribution by Regime:")
+    print(loop.pnl_tracker.report())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RAMME streaming runner")
+    parser.add_argument("--source", choices=("socket", "replay"), default="socket")
+    parser.add_argument("--replay", default=None,
+                        help="replay file (default: record a synthetic scenario)")
+    parser.add_argument("--ticks", type=int, default=10000,
+                        help="ticks to record when no replay file is given")
+    parser.add_argument("--port", type=int, default=0,
+                        help="localhost port for the replay server (0 = any free port)")
+    parser.add_argument("--speed", type=float, default=None,
+                        help="replay at recorded pace x speed (default: as fast as possible)")
+    parser.add_argument("--queue-size", type=int, default=1024)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--coalesce", action="store_true",
+                        help="drop stale top-of-book updates under overload")
+    parser.add_argument("--conflate", type=int, default=None, metavar="N",
+                        help="merge up to N updates per engine call (nothing dropped)")
+    parser.add_argument("--conflate-interval", type=float, default=None, metavar="SECONDS",
+                        help="close merged buckets after this much feed time")
+    parser.add_argument("--threaded", action="store_true",
+                        help="run compute in a worker thread")
+    asyncio.run(run(parser.parse_args()))
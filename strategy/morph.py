@@ -1,23 +1,42 @@
-from regime.states import MarketRegime
+from config.loader import RegimeParams
+from regime.states import regime_code, regime_codes
 
 class StrategyMorpher:
-    def morph(self, regime):
-        params = {}
+    """
+    Regime-dependent strategy parameters, looked up from the regime-indexed
+    tables in RegimeParams (config/regimes.yaml, "morph" section).
+    """
 
-        if regime == MarketRegime.TREND:
-            params["position_size"] = 1.5
-            params["stop_loss"] = 2.0
+    def __init__(self, params=None):
+        """
+        Parameters:
+            params : RegimeParams (defaults to config/*.yaml)
+        """
+        self.params = params if params is not None else RegimeParams.from_config()
 
-        elif regime == MarketRegime.MEAN_REVERT:
-            params["position_size"] = 0.7
-            params["stop_loss"] = 0.5
+    def morph(self, regime):
+        """
+        Parameters:
+            regime : regime code, MarketRegime or label string
 
-        elif regime == MarketRegime.SHOCK:
-            params["position_size"] = 0.2
-            params["stop_loss"] = 0.2
+        Returns:
+            dict with position_size and stop_loss
+        """
+        code = regime_code(regime)
+        return {
+            "position_size": float(self.params.position_size[code]),
+            "stop_loss": float(self.params.stop_loss[code]),
+        }
 
-        else:
-            params["position_size"] = 0.5
-            params["stop_loss"] = 1.0
+    def morph_batch(self, regimes):
+        """
+        Vectorized morph over an array of regime codes (or labels).
 
-        return params
+        Returns:
+            dict of arrays with position_size and stop_loss
+        """
+        codes = regime_codes(regimes)
+        return {
+            "position_size": self.params.position_size[codes],
+            "stop_loss": self.params.stop_loss[codes],
+        }
@@ -1,3 +1,9 @@
+import numpy as np
+
+from config.loader import RegimeParams
+from regime.states import regime_code, regime_codes
+
+
 class DirectionalSignal:
     """
     Regime-aware directional signal generator.
@@ -5,43 +11,104 @@ class DirectionalSignal:
     Output:
         signal: -1 (SHORT), 0 (FLAT), +1 (LONG)
         strength: [0.0 – 1.0] confidence used for sizing later
+
+    Behaviour per regime is read from the regime-indexed tables in
+    RegimeParams (config/regimes.yaml, "signal" section).
     """
 
+    # Engine features read by generate(); backtest.loop.required_features()
+    # adds the execution stage's to form the RAMMEEngine feature_set
+    required_features = ("return", "volatility")
+
+    def __init__(self, params=None):
+        """
+        Parameters:
+            params : RegimeParams (defaults to config/*.yaml)
+        """
+        self.params = params if params is not None else RegimeParams.from_config()
+
+    @property
+    def params(self):
+        return self._params
+
+    @params.setter
+    def params(self, params):
+        """
+        Swap parameter tables, e.g. between sweep runs.
+        """
+        self._params = params
+        # Plain-list mirrors: scalar indexing into a list is cheaper than
+        # into an ndarray on the per-tick path.
+        self._direction = params.signal_direction.tolist()
+        self._gain = params.signal_gain.tolist()
+        self._vol_scaled = params.signal_vol_scaled.tolist()
+
     def generate(self, ret, regime, volatility=None):
         """
         Parameters:
             ret         : return or price delta
-            regime      : market regime string
+            regime      : regime code, MarketRegime or label string
             volatility  : optional volatility metric
 
         Returns:
             (signal, strength)
         """
+        code = regime_code(regime)
+        direction = self._direction[code]
+        side = 1 if ret > 0 else -1
 
-        # Default
-        signal = 0
-        strength = 0.0
+        if self._vol_scaled[code]:
+            # Trade ONLY if move is strong enough
+            if volatility is None or not abs(ret) > volatility:
+                return 0, 0.0
+            strength = min(abs(ret) / volatility, 1.0) if volatility > 0 else 1.0
+            return direction * side, strength
 
-        if regime == "TREND":
-            signal = 1 if ret > 0 else -1
-            strength = min(abs(ret) * 10, 1.0)
+        if direction == 0:
+            return 0, 0.0
 
-        elif regime == "MEAN_REVERT":
-            signal = -1 if ret > 0 else 1
-            strength = min(abs(ret) * 8, 1.0)
+        return direction * side, min(abs(ret) * self._gain[code], 1.0)
 
-        elif regime == "VOLATILE":
-            # Trade ONLY if move is strong enough
-            if volatility is not None and abs(ret) > volatility:
-                signal = 1 if ret > 0 else -1
-                strength = min(abs(ret) / volatility, 1.0)
-            else:
-                signal = 0
-                strength = 0.0
+    def generate_batch(self, rets, regimes, volatility=None):
+        """
+        Vectorized generate over arrays of ticks.
+
+        Parameters:
+            rets       : array of returns
+            regimes    : array of regime codes (or labels)
+            volatility : optional scalar or array of volatility
+
+        Returns:
+            (signal, strength) arrays
+        """
+        rets = np.asarray(rets, dtype=float)
+        codes = regime_codes(regimes)
+        p = self._params
+
+        abs_ret = np.abs(rets)
+        direction = p.signal_direction[codes].astype(np.int64)
+        side = np.where(rets > 0, 1, -1)
+        signal = direction * side
+        strength = np.where(
+            direction != 0, np.minimum(abs_ret * p.signal_gain[codes], 1.0), 0.0
+        )
 
-        elif regime == "QUIET":
-            # Avoid trading low-entropy markets
-            signal = 0
-            strength = 0.0
+        vol_scaled = p.signal_vol_scaled[codes]
+        if vol_scaled.any():
+            if volatility is None:
+                active = np.zeros_like(vol_scaled)
+                vol_strength = np.zeros_like(rets)
+            else:
+                vol = np.broadcast_to(np.asarray(volatility, dtype=float), rets.shape)
+                active = abs_ret > vol
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    vol_strength = np.where(
+                        vol > 0, np.minimum(abs_ret / vol, 1.0), 1.0
+                    )
+            traded = vol_scaled & active
+            signal = np.where(vol_scaled, np.where(traded, signal, 0), signal)
+            strength = np.where(
+                vol_scaled, np.where(traded, vol_strength, 0.0), strength
+            )
 
         return signal, strength